@@ -0,0 +1,141 @@
+"""calculate_design_batch() must give the same numbers as the scalar calculate_design()"""
+import copy
+import importlib.util
+import os
+import unittest
+
+import numpy as np
+
+MODULE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "transformer design.py")
+spec = importlib.util.spec_from_file_location("transformer_design", MODULE_PATH)
+td = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(td)
+
+# BATCH_DTYPE field -> the same number in a scalar DesignResult
+SCALAR_FIELDS = {
+    "core_area": lambda r: r.geometry.core_area,
+    "gross_core_area": lambda r: r.geometry.gross_core_area,
+    "core_width": lambda r: r.geometry.core_width,
+    "core_depth": lambda r: r.geometry.core_depth,
+    "window_width": lambda r: r.geometry.window_width,
+    "window_height": lambda r: r.geometry.window_height,
+    "yoke_height": lambda r: r.geometry.yoke_height,
+    "core_building_factor": lambda r: r.geometry.building_factor,
+    "primary_turns": lambda r: r.turns.primary,
+    "secondary_turns": lambda r: r.turns.secondary,
+    "primary_current": lambda r: r.currents.primary,
+    "secondary_current": lambda r: r.currents.secondary,
+    "primary_conductor_area": lambda r: r.primary_conductor.area,
+    "secondary_conductor_area": lambda r: r.secondary_conductor.area,
+    "primary_swg": lambda r: r.primary_conductor.gauge["SWG"],
+    "secondary_swg": lambda r: r.secondary_conductor.gauge["SWG"],
+    "primary_strands": lambda r: r.primary_conductor.gauge.get("Strands", 0),
+    "secondary_strands": lambda r: r.secondary_conductor.gauge.get("Strands", 0),
+    "primary_mlt": lambda r: r.primary_winding.mean_turn_length,
+    "secondary_mlt": lambda r: r.secondary_winding.mean_turn_length,
+    "primary_resistance": lambda r: r.primary_winding.resistance,
+    "secondary_resistance": lambda r: r.secondary_winding.resistance,
+    "primary_copper_loss": lambda r: r.primary_winding.copper_loss,
+    "secondary_copper_loss": lambda r: r.secondary_winding.copper_loss,
+    "core_volume": lambda r: r.losses.core.volume,
+    "core_weight": lambda r: r.losses.core.weight,
+    "core_loss": lambda r: r.losses.core.loss,
+    "primary_eddy_loss": lambda r: r.losses.primary_eddy.loss,
+    "secondary_eddy_loss": lambda r: r.losses.secondary_eddy.loss,
+    "stray_loss": lambda r: r.losses.stray.loss,
+    "harmonic_copper_loss": lambda r: r.losses.harmonic.copper_loss,
+    "harmonic_eddy_loss": lambda r: r.losses.harmonic.eddy_loss,
+    "total_copper_loss": lambda r: r.losses.total_copper,
+    "total_eddy_loss": lambda r: r.losses.total_eddy,
+    "total_losses": lambda r: r.losses.total,
+    "surface_area": lambda r: r.surface_area,
+    "temp_rise": lambda r: r.thermal.temp_rise,
+    "hot_spot": lambda r: r.thermal.hot_spot,
+    "noise": lambda r: r.noise.total,
+    "copper_weight": lambda r: r.copper_weight,
+    "core_cost": lambda r: r.cost.core_cost,
+    "winding_cost": lambda r: r.cost.winding_cost,
+    "cooling_cost": lambda r: r.cost.cooling_cost,
+    "total_cost": lambda r: r.cost.total_cost,
+    "efficiency": lambda r: r.efficiency,
+}
+
+# Per-row batch inputs and the design attribute each one sets on the scalar side
+ROW_ATTRIBUTES = ("power", "V1", "V2", "frequency", "Bm", "J", "k", "harmonic_factor", "ambient_temp",
+                  "altitude", "rho_cu", "core_material", "core_shape", "cooling_type")
+
+
+def random_columns(rng, size):
+    columns = {
+        "power": rng.uniform(5e3, 2e6, size),
+        "V1": rng.uniform(3300, 33000, size),
+        "V2": rng.uniform(230, 1000, size),
+        "frequency": rng.choice([50.0, 60.0, 400.0], size),
+        "Bm": rng.uniform(0.8, 1.8, size),
+        "J": rng.uniform(1.5, 6.0, size),
+        "k": rng.uniform(0.85, 0.97, size),
+        "harmonic_factor": rng.uniform(1.0, 1.3, size),
+        "ambient_temp": rng.uniform(20, 45, size),
+        "altitude": rng.uniform(0, 3000, size),
+        "rho_cu": rng.uniform(1.6e-8, 1.8e-8, size),
+        "core_material": rng.choice(td.MATERIALS.material_names, size),
+        "core_shape": rng.choice(td.MATERIALS.shape_names, size),
+        "cooling_type": rng.choice(td.MATERIALS.cooling_names, size),
+    }
+    # A few very low secondary voltages give conductors too thick for the window
+    columns["V2"][::10] = rng.uniform(1, 5, len(columns["V2"][::10]))
+    return columns
+
+
+def scalar_result(base, row):
+    """DesignResult of the scalar path for one row, or None when it cannot lay out the winding"""
+    design = copy.copy(base)
+    for name, value in row.items():
+        setattr(design, name, value.item())
+    try:
+        design.calculate_design()
+    except ZeroDivisionError:
+        return None
+    return design.design_result
+
+
+class BatchMatchesScalarTest(unittest.TestCase):
+    
+    def check(self, base, size=300, seed=0):
+        rng = np.random.default_rng(seed)
+        columns = random_columns(rng, size)
+        batch = base.calculate_design_batch(**columns)
+        self.assertTrue(batch["valid"].any() and not batch["valid"].all(), "need valid and invalid rows")
+        for i in range(size):
+            result = scalar_result(base, {name: columns[name][i] for name in ROW_ATTRIBUTES})
+            with self.subTest(row=i):
+                self.assertEqual(bool(batch["valid"][i]), result is not None)
+                if result is None:
+                    continue
+                for field, scalar in SCALAR_FIELDS.items():
+                    expected = scalar(result)
+                    if isinstance(expected, str):
+                        self.assertEqual(batch[field][i], expected, field)
+                    else:
+                        np.testing.assert_allclose(batch[field][i], expected, rtol=1e-9, atol=1e-12,
+                                                   err_msg=field)
+    
+    def test_three_phase(self):
+        base = td.TransformerDesign.from_spec(dict(td.BENCHMARK_SPEC, noise_limit=70))
+        self.check(base)
+    
+    def test_single_phase(self):
+        base = td.TransformerDesign.from_spec(dict(td.BENCHMARK_SPEC, phase="Single Phase",
+                                                   transformer_type="Power Transformer", noise_limit=70))
+        self.check(base, seed=1)
+    
+    def test_covers_every_material_shape_and_cooling(self):
+        columns = random_columns(np.random.default_rng(0), 300)
+        for name, choices in (("core_material", td.MATERIALS.material_names),
+                              ("core_shape", td.MATERIALS.shape_names),
+                              ("cooling_type", td.MATERIALS.cooling_names)):
+            self.assertEqual(set(columns[name]), set(choices), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Incremental calculate_design() must match a design calculated from scratch"""
+import importlib.util
+import os
+import random
+import unittest
+
+MODULE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "transformer design.py")
+spec = importlib.util.spec_from_file_location("transformer_design", MODULE_PATH)
+td = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(td)
+
+# Every input attribute, including ones no stage reads (changing those must not matter either)
+INPUTS = sorted(set(td.DESIGN_INPUT_FIELDS) | set(td.STAGE_INVALIDATION))
+
+CHOICES = {
+    "standard": ["IEC 60076", "ANSI C57", "IS 2026"],
+    "transformer_type": list(td.MATERIALS.data["labor_factors"]),
+    "core_material": list(td.MATERIALS.material_names),
+    "cooling_type": list(td.MATERIALS.cooling_names),
+    "phase": ["Single Phase", "Three Phase"],
+    "core_shape": list(td.MATERIALS.shape_names),
+    "winding_type": list(td.MATERIALS.data["windings"]),
+    "connection_type": ["Delta-Delta", "Delta-Wye", "Wye-Delta", "Wye-Wye"],
+    "gauge_table": list(td.GAUGE_TABLES),
+    "optimization_target": list(td.OPTIMIZATION_TARGETS),
+    "noise_limit": [None, 55, 70],
+    "max_losses": [None, 5000],
+    "max_weight": [None, 2000],
+    "max_cost": [None, 20000],
+}
+
+RANGES = {
+    "V1": (3300, 33000), "V2": (230, 1000), "frequency": (50, 60), "power": (25e3, 1e6),
+    "efficiency": (0.9, 0.99), "regulation": (0.02, 0.08), "harmonic_factor": (1.0, 1.3),
+    "rho_cu": (1.6e-8, 1.8e-8), "rho_fe": (7.5, 7.8), "max_temp_rise": (50, 75),
+    "ambient_temp": (20, 45), "altitude": (0, 3000), "Bm": (0.8, 1.8), "J": (1.5, 6.0),
+    "k": (0.85, 0.97), "kw": (0.2, 0.4),
+}
+
+
+def random_value(rng, name):
+    if name in CHOICES:
+        return rng.choice(CHOICES[name])
+    low, high = RANGES[name]
+    return rng.uniform(low, high)
+
+
+def outcome(design):
+    """repr of the DesignResult, or the exception type calculate_design() raised"""
+    try:
+        design.calculate_design()
+    except Exception as error:
+        return type(error)
+    return repr(design.design_result)
+
+
+def fresh_outcome(design):
+    fresh = td.TransformerDesign()
+    fresh.__dict__.update({name: getattr(design, name) for name in INPUTS})
+    return outcome(fresh)
+
+
+class StageInvalidationTest(unittest.TestCase):
+    
+    def test_every_input_is_covered(self):
+        missing = [name for name in INPUTS if name not in CHOICES and name not in RANGES]
+        self.assertEqual(missing, [], "add a value range for new inputs")
+    
+    def test_random_changes_match_fresh_design(self):
+        rng = random.Random(2024)
+        for sequence in range(200):
+            design = td.TransformerDesign.from_spec(td.BENCHMARK_SPEC)
+            design.calculate_design()
+            for step in range(10):
+                for name in rng.sample(INPUTS, rng.randint(1, 3)):
+                    setattr(design, name, random_value(rng, name))
+                with self.subTest(sequence=sequence, step=step):
+                    self.assertEqual(outcome(design), fresh_outcome(design))
+    
+    def test_material_data_update_recalculates(self):
+        design = td.TransformerDesign.from_spec(td.BENCHMARK_SPEC)
+        design.calculate_design()
+        price = td.MATERIALS.data["materials"][design.core_material]["price"]
+        try:
+            td.MATERIALS.update({"materials": {design.core_material: {"price": price * 10}}})
+            self.assertEqual(outcome(design), fresh_outcome(design))
+        finally:
+            td.MATERIALS.update({"materials": {design.core_material: {"price": price}}})
+        self.assertEqual(outcome(design), fresh_outcome(design))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,1144 @@
+import argparse
+import bisect
+import contextlib
+import copy
+import csv
+import dataclasses
+import functools
+import hashlib
+import itertools
+import json
 import math
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
 import numpy as np
-import pandas as pd
-from fpdf import FPDF
 from datetime import datetime
-import matplotlib.pyplot as plt
-from scipy.optimize import minimize
 import warnings
 warnings.filterwarnings("ignore")
 
+# fpdf, matplotlib and scipy are imported inside build_pdf_report,
+# draw_core_diagram and optimize_from so that quick calculations and
+# short-lived worker processes do not pay for them.
+
+# Import-time budget (seconds) for this module, checked by benchmark_startup()
+STARTUP_BUDGET = 0.25
+
+# Reference design timed by run_benchmarks(), the slowdown against the baseline
+# that counts as a regression, and the number of earlier passing history entries
+# whose median forms the baseline
+BENCHMARK_SPEC = {
+    "standard": "IEC 60076", "transformer_type": "Distribution Transformer", "core_material": "CRGO Steel",
+    "cooling_type": "ONAN", "phase": "Three Phase", "core_shape": "EI Core", "winding_type": "Disc Winding",
+    "connection_type": "Delta-Wye", "V1": 11000, "V2": 415, "frequency": 50, "power": 250000
+}
+BENCHMARK_TOLERANCE = 0.2
+BENCHMARK_BASELINE_RUNS = 5
+
+# Salt of DesignCache keys; bump whenever a calculation changes so stale entries miss
+DESIGN_CACHE_VERSION = "1"
+
+# Standard wire gauge table (extended)
+SWG_TABLE = [
+    {"SWG": "4/0", "Diameter": 11.684, "Area": 107.22, "Resistance": 0.160},
+    {"SWG": "3/0", "Diameter": 10.404, "Area": 85.01, "Resistance": 0.202},
+    {"SWG": "2/0", "Diameter": 9.266, "Area": 67.43, "Resistance": 0.255},
+    {"SWG": "1/0", "Diameter": 8.252, "Area": 53.48, "Resistance": 0.322},
+    {"SWG": "1", "Diameter": 7.348, "Area": 42.41, "Resistance": 0.406},
+    {"SWG": "2", "Diameter": 6.544, "Area": 33.63, "Resistance": 0.512},
+    {"SWG": "3", "Diameter": 5.827, "Area": 26.67, "Resistance": 0.646},
+    {"SWG": "4", "Diameter": 5.189, "Area": 21.15, "Resistance": 0.815},
+    {"SWG": "5", "Diameter": 4.621, "Area": 16.77, "Resistance": 1.028},
+    {"SWG": "6", "Diameter": 4.115, "Area": 13.30, "Resistance": 1.296},
+    {"SWG": "7", "Diameter": 3.665, "Area": 10.55, "Resistance": 1.634},
+    {"SWG": "8", "Diameter": 3.264, "Area": 8.37, "Resistance": 2.060},
+    {"SWG": "9", "Diameter": 2.906, "Area": 6.63, "Resistance": 2.599},
+    {"SWG": "10", "Diameter": 2.588, "Area": 5.26, "Resistance": 3.277},
+    {"SWG": "11", "Diameter": 2.305, "Area": 4.17, "Resistance": 4.132},
+    {"SWG": "12", "Diameter": 2.053, "Area": 3.31, "Resistance": 5.211},
+    {"SWG": "13", "Diameter": 1.828, "Area": 2.63, "Resistance": 6.571},
+    {"SWG": "14", "Diameter": 1.628, "Area": 2.08, "Resistance": 8.286},
+    {"SWG": "15", "Diameter": 1.450, "Area": 1.65, "Resistance": 10.45},
+    {"SWG": "16", "Diameter": 1.291, "Area": 1.31, "Resistance": 13.18},
+    {"SWG": "17", "Diameter": 1.150, "Area": 1.04, "Resistance": 16.62},
+    {"SWG": "18", "Diameter": 1.024, "Area": 0.82, "Resistance": 20.96},
+    {"SWG": "19", "Diameter": 0.912, "Area": 0.65, "Resistance": 26.43},
+    {"SWG": "20", "Diameter": 0.812, "Area": 0.52, "Resistance": 33.33},
+    {"SWG": "21", "Diameter": 0.723, "Area": 0.41, "Resistance": 42.03},
+    {"SWG": "22", "Diameter": 0.644, "Area": 0.33, "Resistance": 53.00},
+    {"SWG": "23", "Diameter": 0.573, "Area": 0.26, "Resistance": 66.84},
+    {"SWG": "24", "Diameter": 0.511, "Area": 0.20, "Resistance": 84.29},
+    {"SWG": "25", "Diameter": 0.455, "Area": 0.16, "Resistance": 106.3},
+    {"SWG": "26", "Diameter": 0.405, "Area": 0.13, "Resistance": 134.0},
+    {"SWG": "27", "Diameter": 0.361, "Area": 0.10, "Resistance": 169.0},
+    {"SWG": "28", "Diameter": 0.321, "Area": 0.08, "Resistance": 213.1},
+    {"SWG": "29", "Diameter": 0.286, "Area": 0.06, "Resistance": 268.7},
+    {"SWG": "30", "Diameter": 0.255, "Area": 0.05, "Resistance": 338.8}
+]
+
+
+class GaugeTable:
+    """Conductor gauge table held sorted by area for O(log n) nearest-size lookup.
+
+    Rows are dicts with at least "SWG" (the gauge designation, kept under that
+    key for every table), "Diameter" (mm), "Area" (mm²) and "Resistance"
+    (ohm/km). Ties between two equally close sizes go to the larger one.
+    """
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = sorted(rows, key=lambda row: row["Area"])
+        self.areas = [row["Area"] for row in self.rows]
+        self.area_array = np.array(self.areas)
+        self.names = np.array([row["SWG"] for row in self.rows])
+    
+    def nearest_index(self, area):
+        """Index of the closest size to a single area"""
+        upper = bisect.bisect_left(self.areas, area)
+        if upper == 0:
+            return 0
+        if upper == len(self.areas):
+            return upper - 1
+        lower = upper - 1
+        return upper if abs(self.areas[upper] - area) <= abs(self.areas[lower] - area) else lower
+    
+    def nearest(self, area):
+        """Copy of the closest row for a single area"""
+        return dict(self.rows[self.nearest_index(area)])
+    
+    def nearest_indices(self, areas):
+        """Vectorized nearest_index() for an array of areas"""
+        areas = np.asarray(areas, dtype=float)
+        upper = np.clip(np.searchsorted(self.area_array, areas), 0, len(self.areas) - 1)
+        lower = np.clip(upper - 1, 0, len(self.areas) - 1)
+        take_upper = np.abs(self.area_array[upper] - areas) <= np.abs(self.area_array[lower] - areas)
+        return np.where(take_upper, upper, lower)
+
+
+def _round_wire(name, diameter):
+    area = math.pi * diameter ** 2 / 4
+    return {"SWG": name, "Diameter": round(diameter, 3), "Area": round(area, 4),
+            "Resistance": round(17.24 / area, 4)}
+
+
+# American Wire Gauge from the defining formula, 4/0 down to 40
+AWG_TABLE = [_round_wire(f"{-n + 1}/0" if n < 1 else str(n), 0.127 * 92 ** ((36 - n) / 39))
+             for n in range(-3, 41)]
+
+# IEC 60228 metric nominal cross-sections (mm²) with the equivalent solid diameter
+METRIC_TABLE = [_round_wire(f"{area:g}", math.sqrt(4 * area / math.pi))
+                for area in (0.5, 0.75, 1, 1.5, 2.5, 4, 6, 10, 16, 25, 35, 50, 70, 95, 120,
+                             150, 185, 240, 300, 400, 500, 630)]
+
+# Rectangular copper strip, thickness x width (mm); "Diameter" is the equivalent round size
+STRIP_TABLE = [dict(_round_wire(f"{t:g}x{w:g}", math.sqrt(4 * t * w / math.pi)), Thickness=t, Width=w)
+               for t in (1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0)
+               for w in (5.0, 8.0, 10.0, 12.5, 16.0, 20.0, 25.0)]
+
+# Gauge tables selectable through TransformerDesign.gauge_table
+GAUGE_TABLES = {
+    "SWG": GaugeTable("SWG", SWG_TABLE),
+    "AWG": GaugeTable("AWG", AWG_TABLE),
+    "Metric": GaugeTable("Metric", METRIC_TABLE),
+    "Rectangular Strip": GaugeTable("Rectangular Strip", STRIP_TABLE)
+}
+
+
+def register_gauge_table(name, rows):
+    """Add or replace a gauge table usable through TransformerDesign.gauge_table"""
+    GAUGE_TABLES[name] = GaugeTable(name, rows)
+    return GAUGE_TABLES[name]
+
+# Records of the material registry; code is the row in the gather arrays (-1 = default entry)
+MaterialGrade = namedtuple("MaterialGrade", [
+    "code", "loss_factor", "price", "stacking_factor", "noise_base", "noise_slope"])
+CoolingMethod = namedtuple("CoolingMethod", [
+    "code", "current_density_factor", "coefficient", "cost_per_va", "forced"])
+CoreShapeRatios = namedtuple("CoreShapeRatios", [
+    "code", "area", "depth", "window_width", "window_height", "yoke", "building_factor", "toroidal"])
+
+# Columns of a CSV material file, see read_material_data; flux and current density
+# apply to the row's standard, or to every standard when it is empty
+MATERIAL_CSV_FIELDS = ("material", "standard", "flux_density", "current_density", "loss_factor", "price",
+                       "stacking_factor", "noise_base", "noise_slope")
+
+
+def read_material_data(path):
+    """Material data from a JSON, TOML or CSV file, in the layout of transformer_materials.json.
+
+    A CSV file holds one row per material (and optionally standard) with
+    the MATERIAL_CSV_FIELDS columns, which is convenient for adding
+    in-house core grades; empty cells are left out.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    if extension == ".toml":
+        import tomllib
+        with open(path, "rb") as handle:
+            return tomllib.load(handle)
+    if extension == ".csv":
+        materials = {}
+        with open(path, newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                entry = materials.setdefault(row["material"], {})
+                standard = row.get("standard") or "*"
+                for name in MATERIAL_CSV_FIELDS[2:]:
+                    if row.get(name) not in (None, ""):
+                        if name in ("flux_density", "current_density"):
+                            entry.setdefault(name, {})[standard] = float(row[name])
+                        else:
+                            entry[name] = float(row[name])
+        return {"materials": materials}
+    raise ValueError(f"Unsupported material data file type: {path}")
+
+
+def _merge_material_data(base, update):
+    """Merge update into base in place, recursing into nested tables"""
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge_material_data(base[key], value)
+        else:
+            base[key] = copy.deepcopy(value)
+
+
+class MaterialRegistry:
+    """Material, cooling, core shape, winding and labor data, loaded once and indexed.
+
+    The data comes from versioned files (see read_material_data) layered
+    with update(), so in-house grades or revised prices need no code
+    change. Scalar lookups are single dict accesses returning the records
+    above, with the "defaults" table for unknown names; the batch engine
+    encodes names with codes() and gathers whole columns from the arrays
+    in gather(), whose trailing entry is the default. fingerprint changes
+    with the data and is part of DesignCache keys.
+    """
+    def __init__(self, data=None):
+        self.data = {}
+        self.sources = []
+        if data:
+            self.update(data)
+    
+    @classmethod
+    def load(cls, *paths):
+        """Registry built from the given data files, later files overriding earlier ones"""
+        registry = cls()
+        for path in paths:
+            registry.update(read_material_data(path), path)
+        return registry
+    
+    def update(self, data, source=None):
+        """Layer more data (a dict, or a file path) over the registry and rebuild the indexes.
+
+        Changes fingerprint, so the next calculate_design() of an existing
+        design recomputes all of its stages.
+        """
+        if isinstance(data, (str, os.PathLike)):
+            source = source or data
+            data = read_material_data(data)
+        _merge_material_data(self.data, data)
+        if source:
+            self.sources.append(str(source))
+        self._index()
+        return self
+    
+    def _index(self):
+        data = self.data
+        defaults = data["defaults"]
+        self.version = data.get("version")
+        self.copper_price = float(data["copper_price"])
+        self.fingerprint = hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        
+        material_default = defaults["material"]
+        self.material_names = tuple(data["materials"])
+        self._materials = {}
+        self._flux_density = {}
+        self._current_density = {}
+        for code, (name, entry) in enumerate(data["materials"].items()):
+            entry = {**material_default, **entry}
+            self._materials[name] = MaterialGrade(code, *(float(entry[field]) for field in MaterialGrade._fields[1:]))
+            for standard, value in entry.get("flux_density", {}).items():
+                self._flux_density[standard, name] = float(value)
+            for standard, value in entry.get("current_density", {}).items():
+                self._current_density[standard, name] = float(value)
+        self._default_material = MaterialGrade(-1, *(float(material_default[field])
+                                                      for field in MaterialGrade._fields[1:]))
+        self._default_flux_density = float(defaults["flux_density"])
+        self._default_current_density = float(defaults["current_density"])
+        
+        cooling_default = defaults["cooling"]
+        self.cooling_names = tuple(data["cooling"])
+        self._cooling = {}
+        for code, (name, entry) in enumerate(data["cooling"].items()):
+            entry = {**cooling_default, **entry}
+            self._cooling[name] = CoolingMethod(code, float(entry["current_density_factor"]),
+                                                float(entry["coefficient"]), float(entry["cost_per_va"]),
+                                                bool(entry["forced"]))
+        self._default_cooling = CoolingMethod(-1, float(cooling_default["current_density_factor"]),
+                                              float(cooling_default["coefficient"]),
+                                              float(cooling_default["cost_per_va"]), bool(cooling_default["forced"]))
+        
+        self.shape_names = tuple(data["shapes"])
+        self._shapes = {}
+        for code, (name, entry) in enumerate(data["shapes"].items()):
+            self._shapes[name] = CoreShapeRatios(code, *(float(entry.get(field, 0.0)) for field in
+                                                        CoreShapeRatios._fields[1:-1]), bool(entry.get("toroidal")))
+        self._default_shape = self._shapes[defaults["shape"]]._replace(code=-1)
+        
+        self._winding_factors = {name: float(value) for name, value in data["windings"].items()}
+        self._default_winding_factor = float(defaults["winding_factor"])
+        self._labor_factors = {name: float(value) for name, value in data["labor_factors"].items()}
+        self._default_labor_factor = float(defaults["labor_factor"])
+        
+        # Gather arrays for the batch engine: one entry per code plus the default
+        self._arrays = {}
+        for kind, records, default in (("materials", self._materials, self._default_material),
+                                       ("cooling", self._cooling, self._default_cooling),
+                                       ("shapes", self._shapes, self._default_shape)):
+            rows = list(records.values()) + [default]
+            for index, field in enumerate(default._fields[1:], 1):
+                self._arrays[kind, field] = np.array([row[index] for row in rows])
+    
+    def material(self, name):
+        """MaterialGrade of a core material"""
+        return self._materials.get(name, self._default_material)
+    
+    def cooling(self, name):
+        """CoolingMethod of a cooling type"""
+        return self._cooling.get(name, self._default_cooling)
+    
+    def shape(self, name):
+        """CoreShapeRatios of a core shape"""
+        return self._shapes.get(name, self._default_shape)
+    
+    def flux_density(self, standard, material):
+        """Design flux density (T) of a material under a standard"""
+        value = self._flux_density.get((standard, material))
+        if value is None:
+            value = self._flux_density.get(("*", material), self._default_flux_density)
+        return value
+    
+    def current_density(self, standard, material):
+        """Design current density (A/mm²) of a material under a standard, before the cooling factor"""
+        value = self._current_density.get((standard, material))
+        if value is None:
+            value = self._current_density.get(("*", material), self._default_current_density)
+        return value
+    
+    def winding_factor(self, winding_type):
+        """Winding space factor kw of a winding type"""
+        return self._winding_factors.get(winding_type, self._default_winding_factor)
+    
+    def labor_factor(self, transformer_type):
+        """Labor cost multiplier of a transformer type"""
+        return self._labor_factors.get(transformer_type, self._default_labor_factor)
+    
+    def lookup(self, standard, material, shape, cooling):
+        """Everything the registry holds for one (standard, material, shape, cooling) combination"""
+        return {"Flux Density (T)": self.flux_density(standard, material),
+                "Current Density (A/mm²)": self.current_density(standard, material) *
+                self.cooling(cooling).current_density_factor,
+                "Material": self.material(material),
+                "Shape": self.shape(shape),
+                "Cooling": self.cooling(cooling)}
+    
+    def codes(self, kind, values):
+        """Integer codes of names (or codes) for kind "materials", "shapes" or "cooling"; -1 when unknown"""
+        names = {"materials": self.material_names, "shapes": self.shape_names, "cooling": self.cooling_names}
+        return encode_categories(values, names[kind])
+    
+    def gather(self, kind, field, codes):
+        """Vectorized field lookup (e.g. ("materials", "loss_factor")) for an array of codes"""
+        return self._arrays[kind, field][codes]
+
+
+# Versioned material/standard data shipped next to this module; files listed in the
+# TRANSFORMER_MATERIALS environment variable (os.pathsep separated) are layered on top
+MATERIAL_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transformer_materials.json")
+MATERIALS = MaterialRegistry.load(MATERIAL_DATA_PATH, *filter(None, os.environ.get("TRANSFORMER_MATERIALS",
+                                                                                    "").split(os.pathsep)))
+
+# Category encodings of the built-in data (MATERIALS also knows any names added later)
+CORE_MATERIALS = MATERIALS.material_names
+CORE_SHAPES = MATERIALS.shape_names
+COOLING_TYPES = MATERIALS.cooling_names
+
+# Columns returned by TransformerDesign.calculate_design_batch
+BATCH_DTYPE = np.dtype([
+    ("core_area", "f8"), ("gross_core_area", "f8"),
+    ("core_width", "f8"), ("core_depth", "f8"),
+    ("window_width", "f8"), ("window_height", "f8"),
+    ("yoke_height", "f8"), ("core_building_factor", "f8"),
+    ("primary_turns", "f8"), ("secondary_turns", "f8"),
+    ("primary_current", "f8"), ("secondary_current", "f8"),
+    ("primary_conductor_area", "f8"), ("secondary_conductor_area", "f8"),
+    ("primary_swg", "U12"), ("secondary_swg", "U12"),
+    ("primary_strands", "i8"), ("secondary_strands", "i8"),
+    ("primary_mlt", "f8"), ("secondary_mlt", "f8"),
+    ("primary_resistance", "f8"), ("secondary_resistance", "f8"),
+    ("primary_copper_loss", "f8"), ("secondary_copper_loss", "f8"),
+    ("core_volume", "f8"), ("core_weight", "f8"), ("core_loss", "f8"),
+    ("primary_eddy_loss", "f8"), ("secondary_eddy_loss", "f8"),
+    ("stray_loss", "f8"), ("harmonic_copper_loss", "f8"), ("harmonic_eddy_loss", "f8"),
+    ("total_copper_loss", "f8"), ("total_eddy_loss", "f8"), ("total_losses", "f8"),
+    ("surface_area", "f8"), ("temp_rise", "f8"), ("hot_spot", "f8"),
+    ("noise", "f8"), ("copper_weight", "f8"),
+    ("core_cost", "f8"), ("winding_cost", "f8"), ("cooling_cost", "f8"), ("total_cost", "f8"),
+    ("efficiency", "f8"),
+    ("valid", "?")
+])
+
+# Rows returned by TransformerDesign.pareto_front: the candidate inputs followed by BATCH_DTYPE
+PARETO_DTYPE = np.dtype([
+    ("Bm", "f8"), ("J", "f8"),
+    ("core_material", "U24"), ("core_shape", "U12"), ("cooling_type", "U12")
+] + BATCH_DTYPE.descr)
+
+# Rows yielded by TransformerDesign.sweep_records: every batch input followed by BATCH_DTYPE
+SWEEP_DTYPE = np.dtype([
+    ("power", "f8"), ("V1", "f8"), ("V2", "f8"), ("frequency", "f8"),
+    ("Bm", "f8"), ("J", "f8"), ("k", "f8"),
+    ("core_material", "U24"), ("core_shape", "U12"), ("cooling_type", "U12")
+] + BATCH_DTYPE.descr)
+
+# Compact numeric summary returned by TransformerDesign.evaluate
+DesignRecord = namedtuple("DesignRecord", [
+    "total_losses", "copper_loss", "eddy_loss", "core_loss", "stray_loss",
+    "core_weight", "copper_weight", "total_cost",
+    "temp_rise", "hot_spot", "noise", "efficiency"
+])
+
+class ResultRecord:
+    """Base of the slotted result records returned by the calculate_* methods.
+
+    DISPLAY_NAMES holds one report name per field; to_dict() rebuilds the
+    string-keyed dict that the calculate_* methods used to return, with
+    nested records converted as well.
+    """
+    __slots__ = ()
+    DISPLAY_NAMES = ()
+    
+    def to_dict(self):
+        return {name: _display_value(getattr(self, field)) for name, field in zip(self.DISPLAY_NAMES, self.__slots__)}
+
+
+def _display_value(value):
+    """Convert nested records (and copy plain dicts) for to_dict()"""
+    if isinstance(value, ResultRecord):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+@dataclass(slots=True)
+class CoreGeometry(ResultRecord):
+    """Core dimensions from calculate_core_dimensions (areas in cm², lengths in mm)"""
+    core_area: float
+    gross_core_area: float
+    core_width: float
+    core_depth: float
+    window_width: float
+    window_height: float
+    yoke_height: float
+    building_factor: float
+    DISPLAY_NAMES = ("Core Area (cm²)", "Gross Core Area (cm²)", "Core Width (mm)", "Core Depth (mm)",
+                     "Window Width (mm)", "Window Height (mm)", "Yoke Height (mm)", "Core Building Factor")
+
+
+@dataclass(slots=True)
+class TurnsResult(ResultRecord):
+    """Turns per winding from calculate_turns"""
+    primary: float
+    secondary: float
+    DISPLAY_NAMES = ("Primary Turns", "Secondary Turns")
+
+
+@dataclass(slots=True)
+class CurrentsResult(ResultRecord):
+    """Winding currents in A from calculate_currents"""
+    primary: float
+    secondary: float
+    DISPLAY_NAMES = ("Primary Current (A)", "Secondary Current (A)")
+
+
+@dataclass(slots=True)
+class ConductorResult(ResultRecord):
+    """Conductor sizing from calculate_conductor_size; gauge is the gauge table row"""
+    area: float
+    gauge: dict
+    skin_depth: float
+    effective_radius: float
+    DISPLAY_NAMES = ("Conductor Area (mm²)", "SWG", "Skin Depth (mm)", "Effective Radius (mm)")
+
+
+@dataclass(slots=True)
+class WindingResult(ResultRecord):
+    """Winding layout and copper loss from calculate_winding"""
+    configuration: dict
+    mean_turn_length: float
+    resistance: float
+    copper_loss: float
+    DISPLAY_NAMES = ("Winding Configuration", "Mean Turn Length (m)", "Resistance (Ohm)", "Copper Loss (W)")
+
+
+@dataclass(slots=True)
+class CoreLossResult(ResultRecord):
+    """Core volume, weight and loss from calculate_core_loss"""
+    volume: float
+    weight: float
+    loss_factor: float
+    loss: float
+    DISPLAY_NAMES = ("Core Volume (cm³)", "Core Weight (kg)", "Core Loss Factor (W/kg)", "Core Loss (W)")
+
+
+@dataclass(slots=True)
+class EddyLossResult(ResultRecord):
+    """Winding eddy loss from calculate_eddy_losses (lengths in μm)"""
+    conductor_diameter: float
+    skin_depth: float
+    loss_factor: float
+    loss: float
+    DISPLAY_NAMES = ("Conductor Diameter (μm)", "Skin Depth (μm)", "Eddy Loss Factor", "Eddy Loss (W)")
+
+
+@dataclass(slots=True)
+class StrayLossResult(ResultRecord):
+    """Stray loss from calculate_stray_losses"""
+    loss: float
+    DISPLAY_NAMES = ("Stray Loss (W)",)
+
+
+@dataclass(slots=True)
+class HarmonicLossResult(ResultRecord):
+    """Additional harmonic losses from calculate_harmonic_losses"""
+    copper_loss: float
+    eddy_loss: float
+    total: float
+    DISPLAY_NAMES = ("Harmonic Copper Loss (W)", "Harmonic Eddy Loss (W)", "Total Harmonic Loss (W)")
+
+
+@dataclass(slots=True)
+class LossBreakdown(ResultRecord):
+    """All loss components of a design; totals include the harmonic losses"""
+    core: CoreLossResult
+    primary_eddy: EddyLossResult
+    secondary_eddy: EddyLossResult
+    stray: StrayLossResult
+    harmonic: HarmonicLossResult
+    total_copper: float
+    total_eddy: float
+    total: float
+    DISPLAY_NAMES = ("Core Loss", "Primary Eddy Loss", "Secondary Eddy Loss", "Stray Loss", "Harmonic Loss",
+                     "Total Copper Loss (W)", "Total Eddy Loss (W)", "Total Losses (W)")
+
+
+@dataclass(slots=True)
+class ThermalResult(ResultRecord):
+    """Temperature rise from calculate_temperature_rise"""
+    cooling_coefficient: float
+    adjusted_coefficient: float
+    temp_rise: float
+    hot_spot: float
+    DISPLAY_NAMES = ("Cooling Coefficient (W/m²°C)", "Adjusted Coefficient (W/m²°C)",
+                     "Temperature Rise (°C)", "Hot Spot Temperature (°C)")
+
+
+@dataclass(slots=True)
+class NoiseResult(ResultRecord):
+    """Noise levels in dB from calculate_noise_level"""
+    core: float
+    flux_adjusted: float
+    frequency_adjusted: float
+    cooling: float
+    total: float
+    DISPLAY_NAMES = ("Core Noise (dB)", "Flux Adjusted Noise (dB)", "Frequency Adjusted Noise (dB)",
+                     "Cooling System Noise (dB)", "Total Noise Level (dB)")
+
+
+@dataclass(slots=True)
+class ShortCircuitResult(ResultRecord):
+    """Short-circuit withstand from calculate_short_circuit"""
+    reactance: float
+    current: float
+    radial_force: float
+    thermal_capacity: float
+    DISPLAY_NAMES = ("Reactance (Ohm)", "Short-Circuit Current (A)", "Radial Force (N)", "Thermal Capacity (A²s)")
+
+
+@dataclass(slots=True)
+class InrushResult(ResultRecord):
+    """Inrush estimate from calculate_inrush_current"""
+    peak_current: float
+    duration: float
+    DISPLAY_NAMES = ("Peak Inrush Current (A)", "Inrush Duration (cycles)")
+
+
+@dataclass(slots=True)
+class CostResult(ResultRecord):
+    """Cost estimate in USD from calculate_cost"""
+    core_cost: float
+    winding_cost: float
+    labor_factor: float
+    cooling_cost: float
+    total_cost: float
+    DISPLAY_NAMES = ("Core Cost (USD)", "Winding Cost (USD)", "Labor Factor", "Cooling Cost (USD)", "Total Cost (USD)")
+
+
+@dataclass(slots=True)
+class DesignResult(ResultRecord):
+    """Everything calculate_design computes; noise is None without a noise limit.
+
+    to_dict() gives the flat layout of TransformerDesign.results; cost is
+    reported separately as cost_results.
+    """
+    geometry: CoreGeometry
+    turns: TurnsResult
+    currents: CurrentsResult
+    primary_conductor: ConductorResult
+    secondary_conductor: ConductorResult
+    primary_winding: WindingResult
+    secondary_winding: WindingResult
+    losses: LossBreakdown
+    thermal: ThermalResult
+    noise: NoiseResult
+    mechanical: dict
+    short_circuit: ShortCircuitResult
+    inrush: InrushResult
+    cost: CostResult
+    copper_weight: float
+    surface_area: float
+    efficiency: float
+    
+    def to_dict(self):
+        results = {
+            **self.geometry.to_dict(),
+            **self.turns.to_dict(),
+            **self.currents.to_dict(),
+            "Primary Conductor": self.primary_conductor.to_dict(),
+            "Secondary Conductor": self.secondary_conductor.to_dict(),
+            "Primary Winding": self.primary_winding.to_dict(),
+            "Secondary Winding": self.secondary_winding.to_dict(),
+            **self.losses.to_dict(),
+            "Thermal Analysis": self.thermal.to_dict(),
+            "Mechanical Design": dict(self.mechanical),
+            "Short-Circuit Analysis": self.short_circuit.to_dict(),
+            "Inrush Current": self.inrush.to_dict(),
+            "Copper Weight (kg)": self.copper_weight,
+            "Surface Area (m²)": self.surface_area
+        }
+        if self.noise is not None:
+            results["Noise Level (dB)"] = self.noise.total
+            results["Noise Analysis"] = self.noise.to_dict()
+        results["Efficiency (%)"] = self.efficiency
+        return results
+
+# Search bounds for (Bm in T, J in A/mm²) used by the optimizers
+OPTIMIZATION_BOUNDS = [(0.8, 1.8), (1.5, 6.0)]
+
+# Default parameter ranges and BATCH_DTYPE outputs for the sensitivity analyses
+SENSITIVITY_RANGES = {
+    "Bm": OPTIMIZATION_BOUNDS[0],
+    "J": OPTIMIZATION_BOUNDS[1],
+    "harmonic_factor": (1.0, 1.5),
+    "ambient_temp": (0.0, 50.0),
+    "altitude": (0.0, 3000.0)
+}
+SENSITIVITY_OUTPUTS = ("total_losses", "total_cost", "temp_rise")
+
+# Keyword inputs of TransformerDesign.calculate_design_batch, accepted as map_batch columns
+BATCH_INPUTS = ("power", "V1", "V2", "frequency", "Bm", "J", "k", "harmonic_factor", "ambient_temp", "altitude",
+                "rho_cu", "core_loss_factor", "core_material", "core_shape", "cooling_type")
+
+# BATCH_DTYPE outputs summarised by TransformerDesign.tolerance_analysis
+TOLERANCE_OUTPUTS = ("total_losses", "core_loss", "temp_rise", "hot_spot", "total_cost", "efficiency")
+
+# Inputs TransformerDesign.tolerance_analysis can vary
+TOLERANCE_INPUTS = ("k", "kw", "rho_cu", "core_loss_factor")
+
+# DesignRecord / batch fields summed into each optimization target
+OPTIMIZATION_TARGETS = {
+    "cost": ("total_cost",),
+    "weight": ("core_weight", "copper_weight"),
+    "losses": ("total_losses",)
+}
+
+# Attributes a design specification (CSV/JSON row) may set, see TransformerDesign.from_spec
+SPEC_TEXT_FIELDS = ("standard", "transformer_type", "core_material", "cooling_type", "phase",
+                    "core_shape", "winding_type", "connection_type", "optimization_target", "gauge_table")
+SPEC_NUMERIC_FIELDS = ("V1", "V2", "frequency", "power", "efficiency", "regulation", "harmonic_factor",
+                       "rho_cu", "rho_fe", "max_temp_rise", "max_losses", "max_weight", "max_cost",
+                       "ambient_temp", "altitude", "noise_limit")
+# Applied after set_material_parameters() so a spec can pin them explicitly
+SPEC_OVERRIDE_FIELDS = ("Bm", "J", "k", "kw")
+
+# Every input attribute of a design; together they determine all results
+DESIGN_INPUT_FIELDS = SPEC_TEXT_FIELDS + SPEC_NUMERIC_FIELDS + SPEC_OVERRIDE_FIELDS
+
+# Stages of calculate_design() in evaluation order: name -> (input attributes, upstream stages)
+DESIGN_STAGES = {
+    "geometry": (("power", "k", "core_shape"), ()),
+    "turns": (("V1", "V2", "frequency", "Bm", "regulation", "phase", "connection_type"), ("geometry",)),
+    "currents": (("power", "V1", "V2", "phase", "connection_type"), ()),
+    "conductors": (("J", "frequency", "gauge_table"), ("currents",)),
+    "windings": (("core_shape", "rho_cu"), ("geometry", "turns", "currents", "conductors")),
+    "core_loss": (("rho_fe", "core_material", "frequency"), ("geometry",)),
+    "eddy": (("frequency", "rho_cu"), ("turns", "currents", "conductors", "windings")),
+    "losses": (("harmonic_factor",), ("core_loss", "windings", "eddy")),
+    "thermal": (("cooling_type", "altitude", "ambient_temp"), ("geometry", "losses")),
+    "noise": (("noise_limit", "core_material", "Bm", "frequency", "cooling_type", "power"), ("core_loss",)),
+    "mechanical": (("cooling_type", "power"), ("geometry",)),
+    "dynamics": (("V1", "frequency", "Bm"), ("geometry", "turns", "windings")),
+    "copper_weight": ((), ("turns", "conductors", "windings")),
+    "cost": (("core_material", "transformer_type", "cooling_type", "power"), ("core_loss", "copper_weight")),
+}
+
+
+def _downstream_stages(stage):
+    """stage followed by every stage that depends on it, directly or not"""
+    found = [stage]
+    for name, (_, upstream) in DESIGN_STAGES.items():
+        if any(dependency in found for dependency in upstream):
+            found.append(name)
+    return tuple(found)
+
+
+# Stages to drop when a stage result changes
+STAGE_DOWNSTREAM = {stage: _downstream_stages(stage) for stage in DESIGN_STAGES}
+
+
+def _invalidated_stages():
+    """Map each input attribute to the stages that must be recomputed when it changes"""
+    invalidation = {}
+    for stage, (inputs, _) in DESIGN_STAGES.items():
+        for name in inputs:
+            invalidation.setdefault(name, {}).update(dict.fromkeys(STAGE_DOWNSTREAM[stage]))
+    return {name: tuple(stages) for name, stages in invalidation.items()}
+
+
+# Stages to drop when an input attribute changes, used by TransformerDesign.__setattr__
+STAGE_INVALIDATION = _invalidated_stages()
+
+# Columns of TransformerDesign.summary_record, used by the batch CLI
+SUMMARY_FIELDS = (
+    "Power Rating (VA)", "Primary Voltage (V)", "Secondary Voltage (V)", "Frequency (Hz)",
+    "Core Material", "Core Shape", "Cooling Type", "Flux Density (T)", "Current Density (A/mm²)",
+    "Core Area (cm²)", "Primary Turns", "Secondary Turns", "Primary Current (A)", "Secondary Current (A)",
+    "Primary Conductor", "Secondary Conductor", "Total Losses (W)", "Efficiency (%)",
+    "Temperature Rise (°C)", "Hot Spot Temperature (°C)", "Core Weight (kg)", "Copper Weight (kg)",
+    "Total Cost (USD)", "Noise Level (dB)"
+)
+
+
+def latin_hypercube(n, bounds, seed=None):
+    """Latin hypercube sample of n points inside the given (low, high) bounds"""
+    rng = np.random.default_rng(seed)
+    dims = len(bounds)
+    strata = np.array([rng.permutation(n) for _ in range(dims)]).T
+    unit = (strata + rng.random((n, dims))) / max(n, 1)
+    low, high = np.array(bounds, dtype=float).T
+    return low + unit * (high - low)
+
+
+def non_dominated(objectives, block=512):
+    """Mask of the rows of an (n, m) objective matrix that no other row dominates (minimization).
+
+    Rows are swept in lexicographic order, so a row can only be dominated by
+    rows before it. Each block of rows is compared against the front found so
+    far and against the rest of its block with whole-array operations, which
+    keeps the sort fast for 10^5 candidates.
+    """
+    F = np.asarray(objectives, dtype=float)
+    mask = np.zeros(len(F), dtype=bool)
+    order = np.lexsort(F.T[::-1])
+    front = F[:0]
+    for start in range(0, len(F), block):
+        index = order[start:start + block]
+        # Cheap pass against the front first, then the survivors against each other
+        for others in (front, None):
+            rows = F[index]
+            others = rows if others is None else others
+            better_or_equal = (others[None, :, :] <= rows[:, None, :]).all(axis=-1)
+            strictly_better = (others[None, :, :] < rows[:, None, :]).any(axis=-1)
+            index = index[~(better_or_equal & strictly_better).any(axis=1)]
+        mask[index] = True
+        front = np.concatenate([front, F[index]])
+    return mask
+
+
+def encode_categories(values, choices):
+    """Convert category names (or codes) into integer codes for the batch engine"""
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values.astype(np.intp)
+    lookup = {name: code for code, name in enumerate(choices)}
+    return np.array([lookup.get(v, -1) for v in values.ravel()], dtype=np.intp).reshape(values.shape)
+
+
+class EvaluationCache:
+    """Bounded LRU memo of TransformerDesign.evaluate() keyed on the rounded (Bm, J) vector.
+
+    The optimizer's objective and constraint functions all call the cache for
+    the same point, so each point is evaluated once; gradient() does the same
+    for the analytic Jacobians. hits counts lookups served from the cache,
+    misses and gradient_misses count fresh evaluations.
+    """
+    def __init__(self, design, maxsize=256, decimals=12):
+        self.design = design
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self.gradient_misses = 0
+        self._records = OrderedDict()
+        self._gradients = OrderedDict()
+    
+    def key(self, x):
+        """Rounded, hashable form of a design vector"""
+        return tuple(round(float(v), self.decimals) for v in x)
+    
+    def _lookup(self, store, x, compute):
+        key = self.key(x)
+        value = store.get(key)
+        if value is not None:
+            store.move_to_end(key)
+            self.hits += 1
+            return value
+        
+        value = compute(*(float(v) for v in x))
+        store[key] = value
+        if len(store) > self.maxsize:
+            store.popitem(last=False)
+        return value
+    
+    def _evaluate(self, *x):
+        self.misses += 1
+        return self.design.evaluate(*x)
+    
+    def _evaluate_gradient(self, *x):
+        self.gradient_misses += 1
+        return self.design.evaluate_gradient(*x)
+    
+    def __call__(self, x):
+        return self._lookup(self._records, x, self._evaluate)
+    
+    def gradient(self, x):
+        """(d/dBm, d/dJ) DesignRecords at x"""
+        return self._lookup(self._gradients, x, self._evaluate_gradient)
+    
+    def __len__(self):
+        return len(self._records)
+    
+    def clear(self):
+        """Drop all cached records and reset the counters"""
+        self._records.clear()
+        self._gradients.clear()
+        self.hits = 0
+        self.misses = 0
+        self.gradient_misses = 0
+    
+    def stats(self):
+        """Hit/miss counters for reporting"""
+        return {"Hits": self.hits, "Misses": self.misses,
+                "Gradient Misses": self.gradient_misses, "Size": len(self._records)}
+
+
+class FigureCache:
+    """Thread-safe bounded LRU of rendered images (PNG bytes) keyed on their drawing inputs"""
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, render):
+        """Cached image for key, calling render() to draw it on a miss"""
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+        image = render()
+        with self._lock:
+            self._images[key] = image
+            if len(self._images) > self.maxsize:
+                self._images.popitem(last=False)
+        return image
+    
+    def __len__(self):
+        return len(self._images)
+    
+    def clear(self):
+        """Drop all images and reset the counters"""
+        with self._lock:
+            self._images.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """Hit/miss counters for reporting"""
+        return {"Hits": self.hits, "Misses": self.misses, "Size": len(self._images)}
+
+
+# Core dimensions are rounded to this step (mm) before a diagram is drawn, so
+# near-identical cores share one CORE_DIAGRAMS image; labels show 0.1 cm anyway
+DIAGRAM_QUANTUM = 1.0
+
+# Rendered core diagrams shared by every design in the process
+CORE_DIAGRAMS = FigureCache()
+
+
+def embed_png(pdf, png, x=None, y=None, w=0):
+    """Place PNG bytes on an FPDF page; fpdf 1.x only reads image files, so it gets a temporary one"""
+    if hasattr(pdf, "rect_clip"):
+        import io
+        pdf.image(io.BytesIO(png), x=x, y=y, w=w)
+        return
+    import tempfile
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as handle:
+        handle.write(png)
+    try:
+        pdf.image(handle.name, x=x, y=y, w=w)
+    finally:
+        os.remove(handle.name)
+
+
+def cached_outcome(method):
+    """Route an optimizer through self.design_cache when one is set.
+
+    On a hit the cached inputs (Bm, J and any categorical choices the
+    optimizer changed) and optimization_results are restored and the design
+    is recalculated; on a miss the optimizer runs and its outcome is stored.
+    The verbose flag does not take part in the key.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.design_cache
+        if cache is None:
+            return method(self, *args, **kwargs)
+        params = [args, sorted((k, v) for k, v in kwargs.items() if k != "verbose")]
+        key = cache.key(self, method.__name__, params)
+        outcome = cache.get(key)
+        if outcome is not None:
+            inputs, self.optimization_results = outcome
+            for name, value in inputs.items():
+                setattr(self, name, value)
+            self.calculate_design()
+            return None
+        result = method(self, *args, **kwargs)
+        cache.put(key, (self.design_inputs(), self.optimization_results))
+        return result
+    return wrapper
+
+
+class DesignCache:
+    """Persistent, size-bounded store of design and optimization outcomes in SQLite.
+
+    Entries are keyed by key(): a SHA-256 over DESIGN_CACHE_VERSION, the kind
+    of computation and every attribute in DESIGN_INPUT_FIELDS, so any change
+    to the inputs (or a bumped model version) misses. Values are pickled;
+    when the file grows beyond max_bytes the least recently used entries are
+    evicted. Only open cache files you created yourself, since unpickling
+    executes code. The connection is opened lazily and is not pickled, so a
+    cache attached to a design can travel to worker processes.
+    """
+    def __init__(self, path="transformer_design_cache.sqlite", max_bytes=64 * 2 ** 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._lock = threading.Lock()
+    
+    def __getstate__(self):
+        return {"path": self.path, "max_bytes": self.max_bytes}
+    
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_bytes"])
+    
+    @staticmethod
+    def key(design, kind="calculate_design", params=None):
+        """Canonical hash of the design inputs, the material data, the computation kind and its parameters"""
+        inputs = {}
+        for name, value in design.design_inputs().items():
+            # 50 and 50.0 describe the same design
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = float(value)
+            inputs[name] = value
+        payload = json.dumps([DESIGN_CACHE_VERSION, MATERIALS.fingerprint, kind, inputs, params],
+                             sort_keys=True, separators=(",", ":"), default=repr)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _connect(self):
+        if self._connection is None:
+            import sqlite3
+            self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS outcomes ("
+                                     "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                                     "size INTEGER NOT NULL, accessed REAL NOT NULL)")
+            self._connection.commit()
+        return self._connection
+    
+    def get(self, key):
+        """Stored value for key (marking it recently used), or None"""
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT value FROM outcomes WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute("UPDATE outcomes SET accessed = ? WHERE key = ?", (time.time(), key))
+            connection.commit()
+            self.hits += 1
+        return pickle.loads(row[0])
+    
+    def put(self, key, value):
+        """Store value under key, then evict least recently used entries beyond max_bytes"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            connection = self._connect()
+            connection.execute("INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?)",
+                               (key, blob, len(blob), time.time()))
+            excess = connection.execute("SELECT COALESCE(SUM(size), 0) FROM outcomes").fetchone()[0] - self.max_bytes
+            if excess > 0:
+                evict = []
+                for old_key, size in connection.execute("SELECT key, size FROM outcomes ORDER BY accessed"):
+                    if excess <= 0:
+                        break
+                    evict.append((old_key,))
+                    excess -= size
+                connection.executemany("DELETE FROM outcomes WHERE key = ?", evict)
+            connection.commit()
+    
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM outcomes").fetchone()[0]
+    
+    def clear(self):
+        """Delete every stored entry and reset the counters"""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM outcomes")
+            connection.commit()
+            self.hits = 0
+            self.misses = 0
+    
+    def close(self):
+        """Close the database connection; it reopens on next use"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+    
+    def stats(self):
+        """Hit/miss counters and store size for reporting"""
+        with self._lock:
+            entries, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM outcomes").fetchone()
+        return {"Hits": self.hits, "Misses": self.misses, "Entries": entries, "Size (bytes)": size}
+
+
+def evaluate_batch_chunk(design, columns):
+    """Worker for TransformerDesign.map_batch: one chunk of calculate_design_batch() keyword columns"""
+    columns = dict(columns)
+    return design.calculate_design_batch(columns.pop("power", design.power), columns.pop("V1", design.V1),
+                                         columns.pop("V2", design.V2), columns.pop("frequency", design.frequency),
+                                         columns.pop("Bm", design.Bm), columns.pop("J", design.J), **columns)
+
+
+@dataclass(frozen=True, slots=True)
+class DesignSpec:
+    """Immutable set of design inputs (DESIGN_INPUT_FIELDS) for the reentrant API.
+
+    evaluate_spec() and optimize_spec() build a private TransformerDesign
+    from a spec for every call and return new result objects, so specs can
+    be shared freely between threads. Bm, J, k and kw left as None are
+    derived from the material and winding choices by set_material_parameters().
+    """
+    standard: str = ""
+    transformer_type: str = ""
+    core_material: str = ""
+    cooling_type: str = ""
+    phase: str = ""
+    core_shape: str = ""
+    winding_type: str = ""
+    connection_type: str = ""
+    optimization_target: str = "cost"
+    gauge_table: str = "SWG"
+    V1: float = 0
+    V2: float = 0
+    frequency: float = 50
+    power: float = 0
+    efficiency: float = 0.95
+    regulation: float = 0.05
+    harmonic_factor: float = 1.0
+    rho_cu: float = 1.68e-8
+    rho_fe: float = 7.65
+    max_temp_rise: float = 65
+    max_losses: float = None
+    max_weight: float = None
+    max_cost: float = None
+    ambient_temp: float = 30
+    altitude: float = 0
+    noise_limit: float = None
+    Bm: float = None
+    J: float = None
+    k: float = None
+    kw: float = None
+    
+    @classmethod
+    def from_mapping(cls, spec):
+        """Spec from a flat mapping such as a CSV or JSON row; see TransformerDesign.from_spec"""
+        values = {}
+        for name in SPEC_TEXT_FIELDS:
+            if spec.get(name) not in (None, ""):
+                values[name] = str(spec[name])
+        for name in SPEC_NUMERIC_FIELDS + SPEC_OVERRIDE_FIELDS:
+            if spec.get(name) not in (None, ""):
+                values[name] = float(spec[name])
+        return cls(**values)
+    
+    @classmethod
+    def from_design(cls, design):
+        """Snapshot of a design's current inputs, with Bm, J, k and kw pinned"""
+        return cls(**design.design_inputs())
+    
+    def replace(self, **changes):
+        """Copy of the spec with some inputs changed"""
+        return dataclasses.replace(self, **changes)
+    
+    def to_dict(self):
+        """Every input as a dict keyed by attribute name"""
+        return {field.name: getattr(self, field.name) for field in dataclasses.fields(self)}
+    
+    def design(self, design_class=None):
+        """New TransformerDesign (or design_class instance) holding these inputs"""
+        design = (design_class or TransformerDesign)()
+        # A fresh design has no stage results for __setattr__ to invalidate
+        design.__dict__.update({name: getattr(self, name) for name in SPEC_TEXT_FIELDS + SPEC_NUMERIC_FIELDS})
+        design.set_material_parameters()
+        for name in SPEC_OVERRIDE_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                setattr(design, name, value)
+        return design
+
+
+# Outcome of optimize_spec(): the optimized DesignSpec, its DesignResult and the optimizer report
+OptimizedDesign = namedtuple("OptimizedDesign", ["spec", "result", "optimization"])
+
+
 class TransformerDesign:
     def __init__(self):
         # Basic parameters
@@ -36,6 +1167,7 @@ class TransformerDesign:
         self.kw = 0.3
         self.rho_cu = 1.68e-8
         self.rho_fe = 7.65  # g/cm³
+        self.gauge_table = "SWG"  # key into GAUGE_TABLES
         
         # Advanced parameters
         self.max_temp_rise = 65
@@ -46,15 +1178,53 @@ class TransformerDesign:
         self.altitude = 0
         self.noise_limit = None
         
+        # Optional persistent DesignCache for calculate_design() and the optimizers
+        self.design_cache = None
+        
         # Results storage
+        self._stages = {}  # stage results reused by calculate_design()
+        self._stages_fingerprint = None  # MATERIALS.fingerprint the stages were computed with
+        self.design_result = None
         self.results = {}
+        self.cost_results = {}
+        self.thermal_results = {}
         self.design_steps = []
         self.optimization_results = {}
-        self.thermal_results = {}
+        self.tolerance_results = {}
         self.mechanical_results = {}
-        self.cost_results = {}
         self.optimization_target = "cost"  # Added initialization
         
+    def __setattr__(self, name, value):
+        # Changing a design input drops the stages that depend on it
+        stages = STAGE_INVALIDATION.get(name)
+        if stages and self.__dict__.get(name) != value:
+            cached = self.__dict__.get("_stages")
+            if cached:
+                for stage in stages:
+                    cached.pop(stage, None)
+        object.__setattr__(self, name, value)
+    
+    def __copy__(self):
+        # Copies must not share the stage results, which each one updates in place
+        design = type(self).__new__(type(self))
+        design.__dict__.update(self.__dict__)
+        design.__dict__["_stages"] = dict(self._stages)
+        return design
+    
+    def invalidate_stages(self, *stages):
+        """Force the given calculate_design() stages and their dependents to be recomputed (all if none given).
+
+        Needed only for changes __setattr__ cannot see, such as editing a
+        registered gauge table in place.
+        """
+        for stage in stages or DESIGN_STAGES:
+            for name in STAGE_DOWNSTREAM[stage]:
+                self._stages.pop(name, None)
+    
+    def stale_stages(self):
+        """Stages the next calculate_design() will recompute, in evaluation order"""
+        return [stage for stage in DESIGN_STAGES if stage not in self._stages]
+    
     def get_user_inputs(self):
         print("=== Advanced Transformer Design Calculator ===")
         
@@ -103,7 +1273,6 @@ class TransformerDesign:
         print("3. Silicon Steel")
         print("4. Nano-Crystalline")
         print("5. High Permeability Steel")
-        core_choice = input("Select core material (1-5): ")
         materials = {
             "1": "CRGO Steel",
             "2": "Amorphous Metal",
@@ -111,6 +1280,12 @@ class TransformerDesign:
             "4": "Nano-Crystalline",
             "5": "High Permeability Steel"
         }
+        # Grades added through the material data files
+        for name in MATERIALS.material_names:
+            if name not in materials.values():
+                materials[str(len(materials) + 1)] = name
+                print(f"{len(materials)}. {name}")
+        core_choice = input(f"Select core material (1-{len(materials)}): ")
         self.core_material = materials.get(core_choice, "CRGO Steel")
         
         # Cooling type
@@ -225,113 +1400,39 @@ class TransformerDesign:
         self.set_material_parameters()
         
     def set_material_parameters(self):
-        """Set material-specific design parameters based on selected standard"""
+        """Set material-specific design parameters based on selected standard (see MATERIALS)"""
+        material = MATERIALS.material(self.core_material)
+        
         # Flux density (Bm) in Tesla
-        bm_values = {
-            "IEC 60076": {
-                "CRGO Steel": 1.5,
-                "Amorphous Metal": 1.3,
-                "Silicon Steel": 1.2,
-                "Nano-Crystalline": 1.4,
-                "High Permeability Steel": 1.6
-            },
-            "ANSI C57": {
-                "CRGO Steel": 1.4,
-                "Amorphous Metal": 1.25,
-                "Silicon Steel": 1.1,
-                "Nano-Crystalline": 1.35,
-                "High Permeability Steel": 1.5
-            },
-            "IS 2026": {
-                "CRGO Steel": 1.45,
-                "Amorphous Metal": 1.3,
-                "Silicon Steel": 1.15,
-                "Nano-Crystalline": 1.4,
-                "High Permeability Steel": 1.55
-            },
-            "BS EN 60076": {
-                "CRGO Steel": 1.5,
-                "Amorphous Metal": 1.3,
-                "Silicon Steel": 1.2,
-                "Nano-Crystalline": 1.4,
-                "High Permeability Steel": 1.6
-            },
-            "GOST 11677": {
-                "CRGO Steel": 1.35,
-                "Amorphous Metal": 1.2,
-                "Silicon Steel": 1.05,
-                "Nano-Crystalline": 1.3,
-                "High Permeability Steel": 1.45
-            }
-        }
-        self.Bm = bm_values.get(self.standard, {}).get(self.core_material, 1.2)
-        
-        # Current density (J) in A/mm²
-        j_values = {
-            "IEC 60076": {
-                "CRGO Steel": 3.0,
-                "Amorphous Metal": 2.8,
-                "Silicon Steel": 2.5,
-                "Nano-Crystalline": 3.2,
-                "High Permeability Steel": 3.5
-            },
-            "ANSI C57": {
-                "CRGO Steel": 3.2,
-                "Amorphous Metal": 3.0,
-                "Silicon Steel": 2.8,
-                "Nano-Crystalline": 3.4,
-                "High Permeability Steel": 3.7
-            },
-            "IS 2026": {
-                "CRGO Steel": 2.8,
-                "Amorphous Metal": 2.6,
-                "Silicon Steel": 2.4,
-                "Nano-Crystalline": 3.0,
-                "High Permeability Steel": 3.3
-            },
-            "BS EN 60076": {
-                "CRGO Steel": 3.0,
-                "Amorphous Metal": 2.8,
-                "Silicon Steel": 2.5,
-                "Nano-Crystalline": 3.2,
-                "High Permeability Steel": 3.5
-            },
-            "GOST 11677": {
-                "CRGO Steel": 2.7,
-                "Amorphous Metal": 2.5,
-                "Silicon Steel": 2.3,
-                "Nano-Crystalline": 2.9,
-                "High Permeability Steel": 3.1
-            }
-        }
-        base_J = j_values.get(self.standard, {}).get(self.core_material, 3.0)
-        
-        # Adjust for cooling type
-        cooling_adjustment = {
-            "ONAN": 1.0,
-            "ONAF": 1.2,
-            "OFAF": 1.5,
-            "Dry Type": 0.8,
-            "AN": 0.9,
-            "AF": 1.1,
-            "Water Cooled": 1.8
-        }
-        self.J = base_J * cooling_adjustment.get(self.cooling_type, 1.0)
+        self.Bm = MATERIALS.flux_density(self.standard, self.core_material)
+        
+        # Current density (J) in A/mm², adjusted for cooling type
+        self.J = (MATERIALS.current_density(self.standard, self.core_material) *
+                  MATERIALS.cooling(self.cooling_type).current_density_factor)
         
         # Core stacking factor
-        self.k = 0.95 if "CRGO" in self.core_material else 0.90
+        self.k = material.stacking_factor
         
         # Winding space factor
-        if self.winding_type == "Layer Winding":
-            self.kw = 0.3
-        elif self.winding_type == "Helical Winding":
-            self.kw = 0.35
-        elif self.winding_type == "Disc Winding":
-            self.kw = 0.4
-        elif self.winding_type == "Foil Winding":
-            self.kw = 0.45
-        else:  # Interleaved
-            self.kw = 0.5
+        self.kw = MATERIALS.winding_factor(self.winding_type)
+    
+    @classmethod
+    def from_spec(cls, spec):
+        """Create a design from a flat specification mapping (e.g. a CSV or JSON row).
+
+        Keys are attribute names from SPEC_TEXT_FIELDS, SPEC_NUMERIC_FIELDS and
+        SPEC_OVERRIDE_FIELDS; numeric values may be strings and empty values
+        keep the default. Material parameters are derived with
+        set_material_parameters() unless Bm, J, k or kw are given explicitly.
+        A DesignSpec is accepted as well.
+        """
+        if not isinstance(spec, DesignSpec):
+            spec = DesignSpec.from_mapping(spec)
+        return spec.design(cls)
+    
+    def spec(self):
+        """Immutable DesignSpec of the current inputs, for evaluate_spec() and optimize_spec()"""
+        return DesignSpec.from_design(self)
     
     def calculate_core_dimensions(self):
         """Calculate core dimensions based on shape and power"""
@@ -342,35 +1443,9 @@ class TransformerDesign:
         Ac = K * math.sqrt(self.power)
         Ag = Ac / self.k  # Gross core area
         
-        # Core dimensions based on shape
-        if self.core_shape == "EI Core":
-            # For EI core, assume square central limb
-            core_width = math.sqrt(Ag) * 10  # mm
-            core_depth = core_width  # mm
-            window_width = core_width * 0.6  # mm
-            window_height = core_width * 1.8  # mm
-            yoke_height = core_width * 0.7  # mm
-            core_building_factor = 1.15
-            
-        elif self.core_shape == "UI Core":
-            # UI core has rectangular central limb
-            core_width = math.sqrt(Ag * 1.2) * 10  # mm
-            core_depth = core_width * 0.8  # mm
-            window_width = core_width * 0.5  # mm
-            window_height = core_width * 1.5  # mm
-            yoke_height = core_width * 0.6  # mm
-            core_building_factor = 1.2
-            
-        elif self.core_shape == "C Core":
-            # C core is similar to UI but with rounded corners
-            core_width = math.sqrt(Ag) * 10  # mm
-            core_depth = core_width * 0.7  # mm
-            window_width = core_width * 0.4  # mm
-            window_height = core_width * 1.3  # mm
-            yoke_height = core_width * 0.5  # mm
-            core_building_factor = 1.25
-            
-        elif self.core_shape == "Toroidal":
+        # Core dimensions based on shape ratios (mm)
+        shape = MATERIALS.shape(self.core_shape)
+        if shape.toroidal:
             # Toroidal core - different calculation approach
             mean_diameter = (4 * Ac / math.pi) ** 0.5 * 10  # mm
             core_width = mean_diameter * 0.3  # mm (radial thickness)
@@ -378,48 +1453,31 @@ class TransformerDesign:
             window_width = mean_diameter * 0.7  # mm
             window_height = core_depth  # mm
             yoke_height = 0  # Not applicable
-            core_building_factor = 1.0
-            
-        elif self.core_shape == "Shell Type":
-            # Shell type has three limbs
-            core_width = math.sqrt(Ag * 1.5) * 10  # mm
-            core_depth = core_width * 0.6  # mm
-            window_width = core_width * 0.4  # mm
-            window_height = core_width * 1.2  # mm
-            yoke_height = core_width * 0.5  # mm
-            core_building_factor = 1.3
-            
-        else:  # Berry Type
-            # Berry type has distributed core
-            core_width = math.sqrt(Ag * 2) * 10  # mm
-            core_depth = core_width * 0.5  # mm
-            window_width = core_width * 0.3  # mm
-            window_height = core_width * 1.0  # mm
-            yoke_height = core_width * 0.4  # mm
-            core_building_factor = 1.4
-            
-        return {
-            "Core Area (cm²)": Ac,
-            "Gross Core Area (cm²)": Ag,
-            "Core Width (mm)": core_width,
-            "Core Depth (mm)": core_depth,
-            "Window Width (mm)": window_width,
-            "Window Height (mm)": window_height,
-            "Yoke Height (mm)": yoke_height,
-            "Core Building Factor": core_building_factor
-        }
+        else:
+            core_width = math.sqrt(Ag * shape.area) * 10  # mm
+            core_depth = core_width * shape.depth  # mm
+            window_width = core_width * shape.window_width  # mm
+            window_height = core_width * shape.window_height  # mm
+            yoke_height = core_width * shape.yoke  # mm
+        core_building_factor = shape.building_factor
+        
+        return CoreGeometry(Ac, Ag, core_width, core_depth, window_width, window_height,
+                            yoke_height, core_building_factor)
     
-    def calculate_turns(self, Ac):
+    def calculate_turns(self, Ac, Bm=None):
         """Calculate primary and secondary turns"""
+        if Bm is None:
+            Bm = self.Bm
+        
         # For three-phase, divide power by 3 for per-phase calculations
         phase_factor = 3 if self.phase == "Three Phase" else 1
         phase_power = self.power / phase_factor
         
         # Primary turns
-        N1 = self.V1 / (4.44 * self.frequency * self.Bm * Ac * 1e-4)
+        N1 = self.V1 / (4.44 * self.frequency * Bm * Ac * 1e-4)
         
         # Secondary turns (accounting for regulation)
-        N2 = (self.V2 * (1 + self.regulation)) / (4.44 * self.frequency * self.Bm * Ac * 1e-4)
+        N2 = (self.V2 * (1 + self.regulation)) / (4.44 * self.frequency * Bm * Ac * 1e-4)
         
         # Adjust for three-phase connection type
         if self.phase == "Three Phase":
@@ -427,10 +1485,7 @@ class TransformerDesign:
                 N1 /= math.sqrt(3)
                 N2 /= math.sqrt(3)
         
-        return {
-            "Primary Turns": N1,
-            "Secondary Turns": N2
-        }
+        return TurnsResult(N1, N2)
     
     def calculate_currents(self):
         """Calculate primary and secondary currents"""
@@ -448,10 +1503,7 @@ class TransformerDesign:
                 I1 *= math.sqrt(3)
                 I2 *= math.sqrt(3)
         
-        return {
-            "Primary Current (A)": I1,
-            "Secondary Current (A)": I2
-        }
+        return CurrentsResult(I1, I2)
     
     def calculate_conductor_size(self, I):
         """Calculate conductor size for given current"""
@@ -474,56 +1526,12 @@ class TransformerDesign:
             swg["Strand SWG"] = strand_swg["SWG"]
             swg["Strand Diameter"] = strand_swg["Diameter"]
         
-        return {
-            "Conductor Area (mm²)": Aw,
-            "SWG": swg,
-            "Skin Depth (mm)": skin_depth,
-            "Effective Radius (mm)": effective_radius
-        }
+        return ConductorResult(Aw, swg, skin_depth, effective_radius)
     
     def calculate_swg(self, area):
         """Find closest standard wire gauge for given area"""
-        # Standard wire gauge table (extended)
-        swg_table = [
-            {"SWG": "4/0", "Diameter": 11.684, "Area": 107.22, "Resistance": 0.160},
-            {"SWG": "3/0", "Diameter": 10.404, "Area": 85.01, "Resistance": 0.202},
-            {"SWG": "2/0", "Diameter": 9.266, "Area": 67.43, "Resistance": 0.255},
-            {"SWG": "1/0", "Diameter": 8.252, "Area": 53.48, "Resistance": 0.322},
-            {"SWG": "1", "Diameter": 7.348, "Area": 42.41, "Resistance": 0.406},
-            {"SWG": "2", "Diameter": 6.544, "Area": 33.63, "Resistance": 0.512},
-            {"SWG": "3", "Diameter": 5.827, "Area": 26.67, "Resistance": 0.646},
-            {"SWG": "4", "Diameter": 5.189, "Area": 21.15, "Resistance": 0.815},
-            {"SWG": "5", "Diameter": 4.621, "Area": 16.77, "Resistance": 1.028},
-            {"SWG": "6", "Diameter": 4.115, "Area": 13.30, "Resistance": 1.296},
-            {"SWG": "7", "Diameter": 3.665, "Area": 10.55, "Resistance": 1.634},
-            {"SWG": "8", "Diameter": 3.264, "Area": 8.37, "Resistance": 2.060},
-            {"SWG": "9", "Diameter": 2.906, "Area": 6.63, "Resistance": 2.599},
-            {"SWG": "10", "Diameter": 2.588, "Area": 5.26, "Resistance": 3.277},
-            {"SWG": "11", "Diameter": 2.305, "Area": 4.17, "Resistance": 4.132},
-            {"SWG": "12", "Diameter": 2.053, "Area": 3.31, "Resistance": 5.211},
-            {"SWG": "13", "Diameter": 1.828, "Area": 2.63, "Resistance": 6.571},
-            {"SWG": "14", "Diameter": 1.628, "Area": 2.08, "Resistance": 8.286},
-            {"SWG": "15", "Diameter": 1.450, "Area": 1.65, "Resistance": 10.45},
-            {"SWG": "16", "Diameter": 1.291, "Area": 1.31, "Resistance": 13.18},
-            {"SWG": "17", "Diameter": 1.150, "Area": 1.04, "Resistance": 16.62},
-            {"SWG": "18", "Diameter": 1.024, "Area": 0.82, "Resistance": 20.96},
-            {"SWG": "19", "Diameter": 0.912, "Area": 0.65, "Resistance": 26.43},
-            {"SWG": "20", "Diameter": 0.812, "Area": 0.52, "Resistance": 33.33},
-            {"SWG": "21", "Diameter": 0.723, "Area": 0.41, "Resistance": 42.03},
-            {"SWG": "22", "Diameter": 0.644, "Area": 0.33, "Resistance": 53.00},
-            {"SWG": "23", "Diameter": 0.573, "Area": 0.26, "Resistance": 66.84},
-            {"SWG": "24", "Diameter": 0.511, "Area": 0.20, "Resistance": 84.29},
-            {"SWG": "25", "Diameter": 0.455, "Area": 0.16, "Resistance": 106.3},
-            {"SWG": "26", "Diameter": 0.405, "Area": 0.13, "Resistance": 134.0},
-            {"SWG": "27", "Diameter": 0.361, "Area": 0.10, "Resistance": 169.0},
-            {"SWG": "28", "Diameter": 0.321, "Area": 0.08, "Resistance": 213.1},
-            {"SWG": "29", "Diameter": 0.286, "Area": 0.06, "Resistance": 268.7},
-            {"SWG": "30", "Diameter": 0.255, "Area": 0.05, "Resistance": 338.8}
-        ]
-        
-        # Find the closest SWG
-        closest = min(swg_table, key=lambda x: abs(x["Area"] - area))
-        return closest
+        # Binary search in the selected gauge table (SWG unless configured otherwise)
+        return GAUGE_TABLES.get(self.gauge_table, GAUGE_TABLES["SWG"]).nearest(area)
     
     def calculate_winding(self, N, I, Aw, window_width, window_height):
         """Calculate winding parameters"""
@@ -556,9 +1564,7 @@ class TransformerDesign:
             }
         
         # Calculate mean turn length
-        if self.core_shape == "EI Core":
-            lmt = 2 * (window_width + window_height) / 1000  # meters
-        elif self.core_shape == "Toroidal":
+        if MATERIALS.shape(self.core_shape).toroidal:
             mean_diameter = (window_width + (Aw ** 0.5)) / 1000  # meters
             lmt = math.pi * mean_diameter
         else:
@@ -570,12 +1576,7 @@ class TransformerDesign:
         # Calculate copper loss
         Pcu = I ** 2 * R
         
-        return {
-            "Winding Configuration": winding_config,
-            "Mean Turn Length (m)": lmt,
-            "Resistance (Ohm)": R,
-            "Copper Loss (W)": Pcu
-        }
+        return WindingResult(winding_config, lmt, R, Pcu)
     
     def calculate_core_loss(self, Ac, lmt):
         """Calculate core loss based on material and dimensions"""
@@ -585,15 +1586,8 @@ class TransformerDesign:
         # Core weight (kg)
         core_weight = core_volume * self.rho_fe / 1000
         
-        # Core loss factors (W/kg)
-        core_loss_factors = {
-            "CRGO Steel": 1.2,
-            "Amorphous Metal": 0.3,
-            "Silicon Steel": 1.5,
-            "Nano-Crystalline": 0.5,
-            "High Permeability Steel": 1.0
-        }
-        core_loss_factor = core_loss_factors.get(self.core_material, 1.2)
+        # Core loss factor (W/kg)
+        core_loss_factor = MATERIALS.material(self.core_material).loss_factor
         
         # Adjust for frequency
         if self.frequency != 50:
@@ -602,12 +1596,7 @@ class TransformerDesign:
         # Total core loss
         Pcore = core_weight * core_loss_factor
         
-        return {
-            "Core Volume (cm³)": core_volume,
-            "Core Weight (kg)": core_weight,
-            "Core Loss Factor (W/kg)": core_loss_factor,
-            "Core Loss (W)": Pcore
-        }
+        return CoreLossResult(core_volume, core_weight, core_loss_factor, Pcore)
     
     def calculate_eddy_losses(self, I, Aw, N, lmt):
         """Calculate eddy current losses in windings"""
@@ -626,21 +1615,14 @@ class TransformerDesign:
         # Total eddy loss
         Peddy = xi * I ** 2 * N * lmt * (self.rho_cu / (Aw * 1e-6))
         
-        return {
-            "Conductor Diameter (μm)": d,
-            "Skin Depth (μm)": skin_depth,
-            "Eddy Loss Factor": xi,
-            "Eddy Loss (W)": Peddy
-        }
+        return EddyLossResult(d, skin_depth, xi, Peddy)
     
     def calculate_stray_losses(self, total_copper_loss):
         """Estimate stray losses (simplified)"""
         # Stray loss is typically 10-20% of total load loss
         Pstray = 0.15 * total_copper_loss
         
-        return {
-            "Stray Loss (W)": Pstray
-        }
+        return StrayLossResult(Pstray)
     
     def calculate_harmonic_losses(self, Pcu, Peddy):
         """Calculate additional losses due to harmonics"""
@@ -650,25 +1632,12 @@ class TransformerDesign:
         # Also increases copper loss slightly
         Pcu_harmonic = Pcu * (1 + 0.05 * (self.harmonic_factor - 1))
         
-        return {
-            "Harmonic Copper Loss (W)": Pcu_harmonic - Pcu,
-            "Harmonic Eddy Loss (W)": Pharmonic,
-            "Total Harmonic Loss (W)": (Pcu_harmonic - Pcu) + Pharmonic
-        }
+        return HarmonicLossResult(Pcu_harmonic - Pcu, Pharmonic, (Pcu_harmonic - Pcu) + Pharmonic)
     
     def calculate_temperature_rise(self, total_loss, surface_area):
         """Calculate temperature rise based on cooling method"""
-        # Cooling coefficients (W/m²°C)
-        cooling_coefficients = {
-            "ONAN": 6.0,
-            "ONAF": 10.0,
-            "OFAF": 15.0,
-            "Dry Type": 5.0,
-            "AN": 5.5,
-            "AF": 8.0,
-            "Water Cooled": 20.0
-        }
-        h = cooling_coefficients.get(self.cooling_type, 6.0)
+        # Cooling coefficient (W/m²°C)
+        h = MATERIALS.cooling(self.cooling_type).coefficient
         
         # Adjust for altitude
         altitude_factor = 1 / (1 - self.altitude / 9000) ** 0.5
@@ -680,22 +1649,13 @@ class TransformerDesign:
         # Hot spot temperature (simplified)
         hot_spot = self.ambient_temp + temp_rise * 1.2
         
-        return {
-            "Cooling Coefficient (W/m²°C)": h,
-            "Adjusted Coefficient (W/m²°C)": h_adj,
-            "Temperature Rise (°C)": temp_rise,
-            "Hot Spot Temperature (°C)": hot_spot
-        }
+        return ThermalResult(h, h_adj, temp_rise, hot_spot)
     
     def calculate_noise_level(self, core_weight, Bm):
         """Estimate transformer noise level"""
         # Base noise level (dB) at 1.5T and 50Hz
-        if "CRGO" in self.core_material:
-            base_noise = 30 + 20 * math.log10(core_weight)
-        elif "Amorphous" in self.core_material:
-            base_noise = 25 + 18 * math.log10(core_weight)
-        else:
-            base_noise = 32 + 22 * math.log10(core_weight)
+        grade = MATERIALS.material(self.core_material)
+        base_noise = grade.noise_base + grade.noise_slope * math.log10(core_weight)
         
         # Adjust for flux density
         noise_Bm = base_noise + 15 * math.log10(Bm / 1.5)
@@ -705,27 +1665,21 @@ class TransformerDesign:
         
         # Cooling system noise addition
         cooling_noise = 0
-        if "ONAF" in self.cooling_type or "OFAF" in self.cooling_type:
+        if MATERIALS.cooling(self.cooling_type).forced:
             cooling_noise = 5 + math.log10(self.power / 1000)
             total_noise = 10 * math.log10(10 ** (noise_freq / 10) + 10 ** (cooling_noise / 10))
         else:
             total_noise = noise_freq
         
-        return {
-            "Core Noise (dB)": base_noise,
-            "Flux Adjusted Noise (dB)": noise_Bm,
-            "Frequency Adjusted Noise (dB)": noise_freq,
-            "Cooling System Noise (dB)": cooling_noise,
-            "Total Noise Level (dB)": total_noise
-        }
+        return NoiseResult(base_noise, noise_Bm, noise_freq, cooling_noise, total_noise)
     
     def calculate_mechanical_parameters(self, core_dims):
         """Calculate tank size, radiator requirements, etc."""
         # Core dimensions
-        core_width = core_dims["Core Width (mm)"] / 1000  # meters
-        core_depth = core_dims["Core Depth (mm)"] / 1000
-        window_height = core_dims["Window Height (mm)"] / 1000
-        yoke_height = core_dims.get("Yoke Height (mm)", 0) / 1000
+        core_width = core_dims.core_width / 1000  # meters
+        core_depth = core_dims.core_depth / 1000
+        window_height = core_dims.window_height / 1000
+        yoke_height = core_dims.yoke_height / 1000
         
         # Calculate approximate tank size
         if self.cooling_type in ["ONAN", "ONAF", "OFAF"]:
@@ -797,12 +1751,7 @@ class TransformerDesign:
         t_short = 2  # seconds (typical short-circuit duration)
         Q = Isc ** 2 * t_short
         
-        return {
-            "Reactance (Ohm)": X,
-            "Short-Circuit Current (A)": Isc,
-            "Radial Force (N)": F,
-            "Thermal Capacity (A²s)": Q
-        }
+        return ShortCircuitResult(X, Isc, F, Q)
     
     def calculate_inrush_current(self, V1, N1, Ac):
         """Estimate inrush current"""
@@ -815,344 +1764,1348 @@ class TransformerDesign:
         # Duration of inrush (cycles)
         tau = N1 * Ac * 1e-4 * (self.Bm + Br) / V1 * self.frequency
         
-        return {
-            "Peak Inrush Current (A)": Iinrush,
-            "Inrush Duration (cycles)": tau
-        }
+        return InrushResult(Iinrush, tau)
     
     def calculate_cost(self, core_weight, cu_weight, design_complexity=1.0):
         """Estimate transformer cost"""
-        # Material prices (USD/kg)
-        material_costs = {
-            "CRGO Steel": 3.5,
-            "Amorphous Metal": 6.0,
-            "Silicon Steel": 2.5,
-            "Nano-Crystalline": 8.0,
-            "High Permeability Steel": 4.5,
-            "Copper": 9.0,
-            "Aluminum": 3.0
-        }
-        
-        # Core cost
-        core_cost = core_weight * material_costs.get(self.core_material, 3.0)
+        # Core cost (material prices in USD/kg)
+        core_cost = core_weight * MATERIALS.material(self.core_material).price
         
         # Winding cost (assuming copper)
-        winding_cost = cu_weight * material_costs["Copper"]
+        winding_cost = cu_weight * MATERIALS.copper_price
         
         # Labor cost factor
-        labor_factors = {
-            "Distribution Transformer": 1.0,
-            "Power Transformer": 1.5,
-            "Instrument Transformer": 2.0,
-            "Autotransformer": 0.8,
-            "Isolation Transformer": 1.2,
-            "Rectifier Transformer": 1.3,
-            "Phase Shifting Transformer": 2.5
-        }
-        labor_factor = labor_factors.get(self.transformer_type, 1.0)
+        labor_factor = MATERIALS.labor_factor(self.transformer_type)
         
         # Cooling system cost
-        cooling_costs = {
-            "ONAN": 0.1 * self.power,
-            "ONAF": 0.15 * self.power,
-            "OFAF": 0.2 * self.power,
-            "Dry Type": 0.05 * self.power,
-            "AN": 0.03 * self.power,
-            "AF": 0.08 * self.power,
-            "Water Cooled": 0.3 * self.power
-        }
-        cooling_cost = cooling_costs.get(self.cooling_type, 0.1 * self.power)
+        cooling_cost = MATERIALS.cooling(self.cooling_type).cost_per_va * self.power
         
         # Total cost
         total_cost = (core_cost + winding_cost) * labor_factor * design_complexity + cooling_cost
         
-        return {
-            "Core Cost (USD)": core_cost,
-            "Winding Cost (USD)": winding_cost,
-            "Labor Factor": labor_factor,
-            "Cooling Cost (USD)": cooling_cost,
-            "Total Cost (USD)": total_cost
-        }
+        return CostResult(core_cost, winding_cost, labor_factor, cooling_cost, total_cost)
     
-    def optimize_design(self):
+    @cached_outcome
+    def optimize_design(self, verbose=True):
         """Optimize the design for cost, weight, or losses"""
-        # Define objective function (minimize cost by default)
-        def objective(x):
-            # x[0] = Bm, x[1] = J
-            self.Bm = x[0]
-            self.J = x[1]
-            self.calculate_design()
-            
-            # Get the parameter we want to optimize
-            if self.optimization_target == "cost":
-                return self.cost_results["Total Cost (USD)"]
-            elif self.optimization_target == "weight":
-                return self.results["Core Weight (kg)"] + self.results["Copper Weight (kg)"]
-            else:  # losses
-                return self.results["Total Losses (W)"]
-        
-        # Constraints
-        constraints = []
-        
-        # Temperature rise constraint
-        def temp_constraint(x):
-            self.Bm = x[0]
-            self.J = x[1]
-            self.calculate_design()
-            return self.max_temp_rise - self.thermal_results["Temperature Rise (°C)"]
-        constraints.append({'type': 'ineq', 'fun': temp_constraint})
-        
-        # Losses constraint if specified
-        if self.max_losses:
-            def loss_constraint(x):
-                self.Bm = x[0]
-                self.J = x[1]
-                self.calculate_design()
-                return self.max_losses - self.results["Total Losses (W)"]
-            constraints.append({'type': 'ineq', 'fun': loss_constraint})
-        
-        # Weight constraint if specified
-        if self.max_weight:
-            def weight_constraint(x):
-                self.Bm = x[0]
-                self.J = x[1]
-                self.calculate_design()
-                return self.max_weight - (self.results["Core Weight (kg)"] + self.results["Copper Weight (kg)"])
-            constraints.append({'type': 'ineq', 'fun': weight_constraint})
-        
-        # Cost constraint if specified
-        if self.max_cost:
-            def cost_constraint(x):
-                self.Bm = x[0]
-                self.J = x[1]
-                self.calculate_design()
-                return self.max_cost - self.cost_results["Total Cost (USD)"]
-            constraints.append({'type': 'ineq', 'fun': cost_constraint})
-        
-        # Noise constraint if specified
-        if self.noise_limit:
-            def noise_constraint(x):
-                self.Bm = x[0]
-                self.J = x[1]
-                self.calculate_design()
-                return self.noise_limit - self.results["Noise Level (dB)"]
-            constraints.append({'type': 'ineq', 'fun': noise_constraint})
-        
-        # Bounds (Bm between 0.8 and 1.8 T, J between 1.5 and 6 A/mm²)
-        bounds = [(0.8, 1.8), (1.5, 6.0)]
-        
         # Initial guess
         x0 = [self.Bm, self.J]
         
         # Optimization
-        print("\nRunning design optimization...")
-        result = minimize(objective, x0, method='SLSQP', bounds=bounds, constraints=constraints)
+        if verbose:
+            print("\nRunning design optimization...")
+        run = self.optimize_from(x0)
         
         # Update with optimized parameters
-        self.Bm = result.x[0]
-        self.J = result.x[1]
+        self.Bm = run["Flux Density (T)"]
+        self.J = run["Current Density (A/mm²)"]
+        self.calculate_design()
         
         # Store optimization results
         self.optimization_results = {
             "Optimization Target": self.optimization_target,
-            "Optimal Flux Density (T)": result.x[0],
-            "Optimal Current Density (A/mm²)": result.x[1],
-            "Final Objective Value": result.fun,
-            "Success": result.success,
-            "Message": result.message
+            "Optimal Flux Density (T)": run["Flux Density (T)"],
+            "Optimal Current Density (A/mm²)": run["Current Density (A/mm²)"],
+            "Final Objective Value": run["Objective Value"],
+            "Success": run["Success"],
+            "Message": run["Message"],
+            "Design Evaluations": run["Design Evaluations"],
+            "Gradient Evaluations": run["Gradient Evaluations"],
+            "Cache Hits": run["Cache Hits"]
         }
     
-    def calculate_design(self):
-        """Perform all design calculations"""
-        self.design_steps = ["=== Design Methodology ==="]
-        
-        # 1. Core dimensions
-        core_dims = self.calculate_core_dimensions()
-        Ac = core_dims["Core Area (cm²)"]
-        Ag = core_dims["Gross Core Area (cm²)"]
-        
-        self.design_steps.append(f"\n1. Core Dimensions ({self.core_shape}):")
-        self.design_steps.append(f"   Core area: A_c = K*sqrt(P) = 0.9 × sqrt({self.power}) = {Ac:.2f} cm²")
-        self.design_steps.append(f"   Gross core area: A_g = A_c/k = {Ac:.2f}/{self.k} = {Ag:.2f} cm²")
-        for key, value in core_dims.items():
-            if "mm" in key:
-                self.design_steps.append(f"   {key}: {value:.1f}")
+    @cached_outcome
+    def optimize_design_multistart(self, starts=8, max_workers=None, seed=None, verbose=True):
+        """Optimize from several starting points in parallel and keep the best result.
+
+        The SWG snapping and the floor/ceil winding layout make the design
+        landscape piecewise, so a single SLSQP run can stop in a local optimum.
+        The current (Bm, J) plus a Latin hypercube sample of the bounds are
+        each solved in a ProcessPoolExecutor worker (one per core by default).
+        The best feasible run is applied to the design; the statistics of every
+        run are kept under "Starts" in optimization_results.
+        """
+        x0s = [[self.Bm, self.J]] + latin_hypercube(starts - 1, OPTIMIZATION_BOUNDS, seed).tolist()
+        if max_workers is None:
+            max_workers = min(len(x0s), os.cpu_count() or 1)
+        
+        if verbose:
+            print(f"\nRunning design optimization from {len(x0s)} starting points...")
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            runs = list(executor.map(self.optimize_from, x0s))
+        
+        # Feasible runs rank by objective, infeasible ones by constraint violation
+        best = min(range(len(runs)), key=lambda i: (0, runs[i]["Objective Value"]) if runs[i]["Feasible"]
+                   else (1, runs[i]["Constraint Violation"]))
+        run = runs[best]
+        
+        self.Bm = run["Flux Density (T)"]
+        self.J = run["Current Density (A/mm²)"]
+        self.calculate_design()
         
-        # 2. Turns calculation
-        turns = self.calculate_turns(Ac)
-        N1 = turns["Primary Turns"]
-        N2 = turns["Secondary Turns"]
+        self.optimization_results = {
+            "Optimization Target": self.optimization_target,
+            "Optimal Flux Density (T)": run["Flux Density (T)"],
+            "Optimal Current Density (A/mm²)": run["Current Density (A/mm²)"],
+            "Final Objective Value": run["Objective Value"],
+            "Success": run["Success"],
+            "Message": run["Message"],
+            "Design Evaluations": sum(r["Design Evaluations"] for r in runs),
+            "Gradient Evaluations": sum(r["Gradient Evaluations"] for r in runs),
+            "Cache Hits": sum(r["Cache Hits"] for r in runs),
+            "Best Start": best,
+            "Feasible Starts": sum(r["Feasible"] for r in runs),
+            "Workers": max_workers,
+            "Wall Time (s)": time.perf_counter() - started,
+            "Starts": runs
+        }
+    
+    @cached_outcome
+    def optimize_design_global(self, core_materials=None, core_shapes=None,
+                               winding_types=None, cooling_types=None, verbose=True):
+        """Search core material, core shape, winding and cooling type together with Bm and J.
+
+        Branch and bound over the categorical choices: every combination gets
+        a cheap lower bound from design_lower_bounds(), combinations whose
+        bound already breaks a limit are dropped, and the rest are solved with
+        optimize_from() in order of increasing bound until the bound reaches
+        the best feasible objective found so far. Choices default to the
+        design's current selection; pass lists (e.g. MATERIALS.material_names) to widen
+        the search. Winding type only sets the space factor kw, which the loss
+        and cost models do not use, so winding alternatives share one solve.
+        The best combination is applied to the design.
+        """
+        started = time.perf_counter()
+        choices = list(itertools.product(core_materials or [self.core_material],
+                                         core_shapes or [self.core_shape],
+                                         winding_types or [self.winding_type],
+                                         cooling_types or [self.cooling_type]))
+        target_fields = OPTIMIZATION_TARGETS.get(self.optimization_target, OPTIMIZATION_TARGETS["losses"])
+        limits = self.design_limits()
+        
+        # Bound every combination and drop the ones that cannot be feasible
+        candidates = []
+        pruned_infeasible = 0
+        for core_material, core_shape, winding_type, cooling_type in choices:
+            design = copy.copy(self)
+            design.core_material = core_material
+            design.core_shape = core_shape
+            design.winding_type = winding_type
+            design.cooling_type = cooling_type
+            design.set_material_parameters()
+            try:
+                bounds = design.design_lower_bounds()
+            except ZeroDivisionError:
+                # Winding does not fit at a corner of the box; no bound available
+                candidates.append((-math.inf, design))
+                continue
+            if any(sum(getattr(bounds, f) for f in fields) > limit for limit, fields in limits):
+                pruned_infeasible += 1
+                continue
+            candidates.append((sum(getattr(bounds, f) for f in target_fields), design))
+        candidates.sort(key=lambda candidate: candidate[0])
+        
+        # Solve in bound order until no remaining combination can win
+        best = None
+        solved = {}
+        pruned_bound = 0
+        for index, (bound, design) in enumerate(candidates):
+            if best is not None and bound >= best[0]["Objective Value"]:
+                pruned_bound = len(candidates) - index
+                break
+            key = (design.core_material, design.core_shape, design.cooling_type)
+            if key not in solved:
+                try:
+                    solved[key] = design.optimize_from([design.Bm, design.J])
+                except ZeroDivisionError:
+                    solved[key] = None
+            run = solved[key]
+            if run is not None and run["Feasible"] and (best is None or run["Objective Value"] < best[0]["Objective Value"]):
+                best = (run, design)
+        
+        if best is None:
+            if verbose:
+                print("\nNo feasible combination found; design left unchanged.")
+            success = False
+        else:
+            run, design = best
+            self.core_material = design.core_material
+            self.core_shape = design.core_shape
+            self.winding_type = design.winding_type
+            self.cooling_type = design.cooling_type
+            self.k = design.k
+            self.kw = design.kw
+            self.Bm = run["Flux Density (T)"]
+            self.J = run["Current Density (A/mm²)"]
+            self.calculate_design()
+            success = run["Success"]
+        
+        self.optimization_results = {
+            "Optimization Target": self.optimization_target,
+            "Core Material": self.core_material,
+            "Core Shape": self.core_shape,
+            "Winding Type": self.winding_type,
+            "Cooling Type": self.cooling_type,
+            "Optimal Flux Density (T)": self.Bm,
+            "Optimal Current Density (A/mm²)": self.J,
+            "Final Objective Value": best[0]["Objective Value"] if best else None,
+            "Success": success,
+            "Combinations": len(choices),
+            "Continuous Solves": len(solved),
+            "Pruned (Infeasible Bound)": pruned_infeasible,
+            "Pruned (Objective Bound)": pruned_bound,
+            "Design Evaluations": sum(r["Design Evaluations"] for r in solved.values() if r),
+            "Wall Time (s)": time.perf_counter() - started
+        }
+    
+    def design_limits(self):
+        """(limit, record fields) pairs for the temperature limit and every optional limit that is set"""
+        limits = [(self.max_temp_rise, ("temp_rise",))]
+        if self.max_losses:
+            limits.append((self.max_losses, ("total_losses",)))
+        if self.max_weight:
+            limits.append((self.max_weight, ("core_weight", "copper_weight")))
+        if self.max_cost:
+            limits.append((self.max_cost, ("total_cost",)))
+        if self.noise_limit:
+            limits.append((self.noise_limit, ("noise",)))
+        return limits
+    
+    def design_lower_bounds(self, bounds=OPTIMIZATION_BOUNDS):
+        """Lower bounds of the design figures over the whole (Bm, J) search box.
+
+        Copper weight falls with both Bm and J, raw copper loss falls with Bm
+        and rises with J, core loss and weight do not depend on either, and
+        noise rises with Bm. Evaluating the matching corners therefore bounds
+        weight, cost, losses (eddy loss bounded by zero), temperature rise and
+        noise from below. The efficiency field is an upper bound.
+        """
+        (Bm_low, Bm_high), (J_low, J_high) = bounds
+        light = self.evaluate(Bm_high, J_high)
+        low_loss = self.evaluate(Bm_high, J_low)
+        total_losses = low_loss.total_losses - low_loss.eddy_loss
+        temp_rise = low_loss.temp_rise * total_losses / low_loss.total_losses
+        return DesignRecord(
+            total_losses=total_losses,
+            copper_loss=low_loss.copper_loss,
+            eddy_loss=0.0,
+            core_loss=low_loss.core_loss,
+            stray_loss=low_loss.stray_loss,
+            core_weight=light.core_weight,
+            copper_weight=light.copper_weight,
+            total_cost=light.total_cost,
+            temp_rise=temp_rise,
+            hot_spot=self.ambient_temp + temp_rise * 1.2,
+            noise=self.evaluate(Bm_low, J_low).noise,
+            efficiency=self.power / (self.power + total_losses) * 100
+        )
+    
+    def pareto_front(self, objectives=("cost", "losses", "weight"), candidates=20000, seed=None,
+                     core_materials=None, core_shapes=None, cooling_types=None, chunk_size=50000):
+        """Non-dominated trade-off set between several optimization targets.
+
+        Samples (Bm, J) over OPTIMIZATION_BOUNDS with a Latin hypercube, and
+        the listed categorical choices uniformly (default: the current ones),
+        evaluates the candidates chunk by chunk with calculate_design_batch(),
+        drops rows that break a design limit and keeps each chunk's front.
+        Returns the overall front as a PARETO_DTYPE structured array sorted
+        by the first objective. The design itself is not modified.
+        """
+        rng = np.random.default_rng(seed)
+        x = latin_hypercube(candidates, OPTIMIZATION_BOUNDS, rng)
+        materials = list(core_materials or [self.core_material])
+        shapes = list(core_shapes or [self.core_shape])
+        coolings = list(cooling_types or [self.cooling_type])
+        
+        # Stacking factor follows the material as in set_material_parameters()
+        if core_materials is None:
+            stacking = np.array([self.k])
+        else:
+            stacking = []
+            for core_material in materials:
+                design = copy.copy(self)
+                design.core_material = core_material
+                design.set_material_parameters()
+                stacking.append(design.k)
+            stacking = np.array(stacking)
+        
+        choice = np.stack([rng.integers(len(materials), size=candidates),
+                           rng.integers(len(shapes), size=candidates),
+                           rng.integers(len(coolings), size=candidates)], axis=1)
+        
+        fronts = []
+        for start in range(0, candidates, chunk_size):
+            rows = slice(start, start + chunk_size)
+            m, sh, c = choice[rows].T
+            batch = self.calculate_design_batch(self.power, self.V1, self.V2, self.frequency,
+                                                x[rows, 0], x[rows, 1],
+                                                MATERIALS.codes("materials", materials)[m],
+                                                MATERIALS.codes("shapes", shapes)[sh],
+                                                MATERIALS.codes("cooling", coolings)[c],
+                                                k=stacking[m])
+            feasible = batch["valid"].copy()
+            for limit, fields in self.design_limits():
+                feasible &= sum(batch[f] for f in fields) <= limit
+            
+            chunk = np.empty(int(feasible.sum()), dtype=PARETO_DTYPE)
+            chunk["Bm"] = x[rows, 0][feasible]
+            chunk["J"] = x[rows, 1][feasible]
+            chunk["core_material"] = np.array(materials)[m[feasible]]
+            chunk["core_shape"] = np.array(shapes)[sh[feasible]]
+            chunk["cooling_type"] = np.array(coolings)[c[feasible]]
+            for name in BATCH_DTYPE.names:
+                chunk[name] = batch[name][feasible]
+            fronts.append(chunk[non_dominated(self._objective_matrix(chunk, objectives))])
+        
+        candidates = np.concatenate(fronts)
+        front = candidates[non_dominated(self._objective_matrix(candidates, objectives))]
+        return front[np.argsort(self._objective_matrix(front, objectives)[:, 0], kind="stable")]
+    
+    @staticmethod
+    def _objective_matrix(rows, objectives):
+        """(n, m) matrix of the named optimization targets for batch or Pareto rows"""
+        return np.column_stack([sum(rows[f] for f in OPTIMIZATION_TARGETS[name]) for name in objectives])
+    
+    def optimize_from(self, x0):
+        """Run SLSQP from one starting point without modifying the design.
+
+        Returns a dict describing the run: start and end point, objective
+        value, solver status, feasibility and evaluation counts.
+        """
+        # x[0] = Bm, x[1] = J; every point is evaluated once and shared
+        # between the objective and all constraints through the cache
+        evaluate = EvaluationCache(self)
         
-        self.design_steps.append(f"\n2. Turns Calculation:")
-        self.design_steps.append(f"   Primary turns: N1 = V1/(4.44×f×Bm×Ac) = {self.V1}/(4.44×{self.frequency}×{self.Bm}×{Ac:.2f}e-4) = {N1:.0f}")
-        self.design_steps.append(f"   Secondary turns: N2 = V2×(1+alpha)/(4.44×f×Bm×Ac) = {self.V2}×1.05/(4.44×{self.frequency}×{self.Bm}×{Ac:.2f}e-4) = {N2:.0f}")
+        def total(record, fields):
+            return sum(getattr(record, field) for field in fields)
         
-        # 3. Current calculation
-        currents = self.calculate_currents()
-        I1 = currents["Primary Current (A)"]
-        I2 = currents["Secondary Current (A)"]
+        def jacobian(x, fields):
+            dBm, dJ = evaluate.gradient(x)
+            return np.array([total(dBm, fields), total(dJ, fields)])
         
-        self.design_steps.append(f"\n3. Current Calculation:")
-        self.design_steps.append(f"   Primary current: I1 = P/V1 = {self.power}/{self.V1} = {I1:.2f} A")
-        self.design_steps.append(f"   Secondary current: I2 = P/V2 = {self.power}/{self.V2} = {I2:.2f} A")
+        # Define objective function (minimize cost by default, anything unknown means losses)
+        target_fields = OPTIMIZATION_TARGETS.get(self.optimization_target, OPTIMIZATION_TARGETS["losses"])
         
-        # 4. Conductor sizing
-        primary_conductor = self.calculate_conductor_size(I1)
-        secondary_conductor = self.calculate_conductor_size(I2)
-        Aw1 = primary_conductor["Conductor Area (mm²)"]
-        Aw2 = secondary_conductor["Conductor Area (mm²)"]
+        def objective(x):
+            return total(evaluate(x), target_fields)
         
-        self.design_steps.append(f"\n4. Conductor Sizing:")
-        self.design_steps.append(f"   Primary conductor area: Aw1 = I1/J = {I1:.2f}/{self.J} = {Aw1:.4f} mm²")
-        self.design_steps.append(f"   Secondary conductor area: Aw2 = I2/J = {I2:.2f}/{self.J} = {Aw2:.4f} mm²")
-        self.design_steps.append(f"   Primary wire: {primary_conductor['SWG']['SWG']} ({primary_conductor['SWG']['Diameter']} mm)")
-        self.design_steps.append(f"   Secondary wire: {secondary_conductor['SWG']['SWG']} ({secondary_conductor['SWG']['Diameter']} mm)")
+        def objective_jacobian(x):
+            return jacobian(x, target_fields)
         
-        # Check for Litz wire
-        if 'Strands' in primary_conductor['SWG']:
-            self.design_steps.append(f"   Primary requires Litz wire: {primary_conductor['SWG']['Strands']} strands of {primary_conductor['SWG']['Strand SWG']}")
-        if 'Strands' in secondary_conductor['SWG']:
-            self.design_steps.append(f"   Secondary requires Litz wire: {secondary_conductor['SWG']['Strands']} strands of {secondary_conductor['SWG']['Strand SWG']}")
+        # Constraints: limit - value >= 0 with the analytic gradient of -value
+        constraints = []
         
-        # 5. Winding design
-        primary_winding = self.calculate_winding(N1, I1, Aw1, core_dims["Window Width (mm)"], core_dims["Window Height (mm)"])
-        secondary_winding = self.calculate_winding(N2, I2, Aw2, core_dims["Window Width (mm)"], core_dims["Window Height (mm)"])
+        def add_limit(limit, fields):
+            constraints.append({'type': 'ineq',
+                                'fun': lambda x: limit - total(evaluate(x), fields),
+                                'jac': lambda x: -jacobian(x, fields)})
         
-        self.design_steps.append(f"\n5. Winding Design ({self.winding_type}):")
-        self.design_steps.append("   Primary Winding:")
-        for key, value in primary_winding["Winding Configuration"].items():
-            self.design_steps.append(f"      {key}: {value}")
-        self.design_steps.append("   Secondary Winding:")
-        for key, value in secondary_winding["Winding Configuration"].items():
-            self.design_steps.append(f"      {key}: {value}")
+        # Temperature rise plus any losses, weight, cost and noise limits
+        for limit, fields in self.design_limits():
+            add_limit(limit, fields)
         
-        # 6. Loss calculations
-        core_loss = self.calculate_core_loss(Ac, core_dims["Core Building Factor"])
-        primary_eddy = self.calculate_eddy_losses(I1, Aw1, N1, primary_winding["Mean Turn Length (m)"])
-        secondary_eddy = self.calculate_eddy_losses(I2, Aw2, N2, secondary_winding["Mean Turn Length (m)"])
-        
-        # Calculate total copper loss before stray losses
-        total_copper_loss = primary_winding["Copper Loss (W)"] + secondary_winding["Copper Loss (W)"]
-        
-        # Now calculate stray losses
-        stray_loss = self.calculate_stray_losses(total_copper_loss)
-        
-        harmonic_loss = self.calculate_harmonic_losses(total_copper_loss, 
-                                                     primary_eddy["Eddy Loss (W)"] + secondary_eddy["Eddy Loss (W)"])
-        
-        total_copper_loss += harmonic_loss["Harmonic Copper Loss (W)"]
-        total_eddy_loss = primary_eddy["Eddy Loss (W)"] + secondary_eddy["Eddy Loss (W)"] + harmonic_loss["Harmonic Eddy Loss (W)"]
-        total_losses = total_copper_loss + core_loss["Core Loss (W)"] + total_eddy_loss + stray_loss["Stray Loss (W)"]
-        
-        self.design_steps.append(f"\n6. Loss Calculations:")
-        self.design_steps.append(f"   Primary copper loss: {primary_winding['Copper Loss (W)']:.2f} W")
-        self.design_steps.append(f"   Secondary copper loss: {secondary_winding['Copper Loss (W)']:.2f} W")
-        self.design_steps.append(f"   Harmonic copper loss: {harmonic_loss['Harmonic Copper Loss (W)']:.2f} W")
-        self.design_steps.append(f"   Primary eddy loss: {primary_eddy['Eddy Loss (W)']:.2f} W")
-        self.design_steps.append(f"   Secondary eddy loss: {secondary_eddy['Eddy Loss (W)']:.2f} W")
-        self.design_steps.append(f"   Harmonic eddy loss: {harmonic_loss['Harmonic Eddy Loss (W)']:.2f} W")
-        self.design_steps.append(f"   Core loss: {core_loss['Core Loss (W)']:.2f} W")
-        self.design_steps.append(f"   Stray loss: {stray_loss['Stray Loss (W)']:.2f} W")
-        self.design_steps.append(f"   Total losses: {total_losses:.2f} W")
+        from scipy.optimize import minimize
         
-        # 7. Temperature rise
-        # Calculate surface area (simplified)
-        surface_area = 2 * ((core_dims["Core Width (mm)"]/1000 * core_dims["Core Depth (mm)"]/1000) +
-                           (core_dims["Core Width (mm)"]/1000 * core_dims["Window Height (mm)"]/1000) +
-                           (core_dims["Core Depth (mm)"]/1000 * core_dims["Window Height (mm)"]/1000))
+        started = time.perf_counter()
+        result = minimize(objective, x0, method='SLSQP', jac=objective_jacobian,
+                          bounds=OPTIMIZATION_BOUNDS, constraints=constraints)
+        violation = max([0.0] + [-c['fun'](result.x) for c in constraints])
+        
+        return {
+            "Start Flux Density (T)": float(x0[0]),
+            "Start Current Density (A/mm²)": float(x0[1]),
+            "Flux Density (T)": float(result.x[0]),
+            "Current Density (A/mm²)": float(result.x[1]),
+            "Objective Value": float(result.fun),
+            "Success": bool(result.success),
+            "Message": result.message,
+            "Feasible": violation <= 1e-6,
+            "Constraint Violation": violation,
+            "Iterations": result.nit,
+            "Design Evaluations": evaluate.misses,
+            "Gradient Evaluations": evaluate.gradient_misses,
+            "Cache Hits": evaluate.hits,
+            "Time (s)": time.perf_counter() - started
+        }
+    
+    def evaluate(self, Bm=None, J=None):
+        """Evaluate the design at the given flux and current density without side effects.
+
+        Returns a DesignRecord of headline numbers. Unlike calculate_design(),
+        no report text is formatted and no attribute of the instance is
+        modified, so this is the path used inside the optimizer.
+        """
+        Bm = self.Bm if Bm is None else Bm
+        J = self.J if J is None else J
         
+        core_dims = self.calculate_core_dimensions()
+        Ac = core_dims.core_area
+        turns = self.calculate_turns(Ac, Bm)
+        N1 = turns.primary
+        N2 = turns.secondary
+        currents = self.calculate_currents()
+        I1 = currents.primary
+        I2 = currents.secondary
+        Aw1 = I1 / J
+        Aw2 = I2 / J
+        
+        primary_winding = self.calculate_winding(N1, I1, Aw1, core_dims.window_width, core_dims.window_height)
+        secondary_winding = self.calculate_winding(N2, I2, Aw2, core_dims.window_width, core_dims.window_height)
+        lmt1 = primary_winding.mean_turn_length
+        lmt2 = secondary_winding.mean_turn_length
+        
+        core_loss = self.calculate_core_loss(Ac, core_dims.building_factor)
+        core_weight = core_loss.weight
+        eddy_loss = (self.calculate_eddy_losses(I1, Aw1, N1, lmt1).loss +
+                     self.calculate_eddy_losses(I2, Aw2, N2, lmt2).loss)
+        copper_loss = primary_winding.copper_loss + secondary_winding.copper_loss
+        stray_loss = self.calculate_stray_losses(copper_loss).loss
+        harmonic_loss = self.calculate_harmonic_losses(copper_loss, eddy_loss)
+        copper_loss += harmonic_loss.copper_loss
+        eddy_loss += harmonic_loss.eddy_loss
+        total_losses = copper_loss + core_loss.loss + eddy_loss + stray_loss
+        
+        surface_area = 2 * ((core_dims.core_width/1000 * core_dims.core_depth/1000) +
+                           (core_dims.core_width/1000 * core_dims.window_height/1000) +
+                           (core_dims.core_depth/1000 * core_dims.window_height/1000))
         thermal = self.calculate_temperature_rise(total_losses, surface_area)
+        noise = self.calculate_noise_level(core_weight, Bm).total
+        
+        cu_weight = (lmt1 * N1 * Aw1 * 1e-6 + lmt2 * N2 * Aw2 * 1e-6) * 8960
+        cost = self.calculate_cost(core_weight, cu_weight)
+        
+        return DesignRecord(
+            total_losses=total_losses,
+            copper_loss=copper_loss,
+            eddy_loss=eddy_loss,
+            core_loss=core_loss.loss,
+            stray_loss=stray_loss,
+            core_weight=core_weight,
+            copper_weight=cu_weight,
+            total_cost=cost.total_cost,
+            temp_rise=thermal.temp_rise,
+            hot_spot=thermal.hot_spot,
+            noise=noise,
+            efficiency=self.power / (self.power + total_losses) * 100
+        )
+    
+    def evaluate_gradient(self, Bm=None, J=None):
+        """Analytic partial derivatives of evaluate() with respect to Bm and J.
+
+        Returns a pair of DesignRecords holding d/dBm and d/dJ of every field.
+        Turns scale with 1/Bm and conductor areas with 1/J, and the loss,
+        thermal and cost models are closed-form in both, so no extra design
+        evaluations are needed. The eddy factor is treated as zero below the
+        skin-depth threshold, matching calculate_eddy_losses().
+        """
+        Bm = self.Bm if Bm is None else Bm
+        J = self.J if J is None else J
         
-        self.design_steps.append(f"\n7. Thermal Analysis:")
-        self.design_steps.append(f"   Surface area: {surface_area:.2f} m²")
-        self.design_steps.append(f"   Cooling coefficient: {thermal['Cooling Coefficient (W/m²°C)']:.1f} W/m²°C")
-        self.design_steps.append(f"   Temperature rise: {thermal['Temperature Rise (°C)']:.1f} °C")
-        self.design_steps.append(f"   Hot spot temperature: {thermal['Hot Spot Temperature (°C)']:.1f} °C")
+        core_dims = self.calculate_core_dimensions()
+        turns = self.calculate_turns(core_dims.core_area, Bm)
+        currents = self.calculate_currents()
+        window_width = core_dims.window_width
+        window_height = core_dims.window_height
+        
+        copper_loss = [0.0, 0.0]  # (d/dBm, d/dJ) of the raw copper loss
+        eddy_loss = [0.0, 0.0]
+        copper_weight = [0.0, 0.0]
+        for N, I in ((turns.primary, currents.primary), (turns.secondary, currents.secondary)):
+            Aw = I / J
+            winding = self.calculate_winding(N, I, Aw, window_width, window_height)
+            lmt = winding.mean_turn_length
+            Pcu = winding.copper_loss
+            
+            # Relative change of the mean turn length with J (toroidal only)
+            if MATERIALS.shape(self.core_shape).toroidal:
+                dlmt_rel = -math.pi * (Aw ** 0.5) / (2 * J * 1000 * lmt)
+            else:
+                dlmt_rel = 0.0
+            
+            dPcu_dBm = -Pcu / Bm
+            dPcu_dJ = Pcu * (dlmt_rel + 1 / J)
+            
+            # Eddy loss is xi * Pcu with xi = u / (192 + 0.8 u), u = (d/skin)^4 ~ J^-2
+            eddy = self.calculate_eddy_losses(I, Aw, N, lmt)
+            xi = eddy.loss_factor
+            if xi:
+                u = (eddy.conductor_diameter / eddy.skin_depth) ** 4
+                dxi_dJ = 192 / (192 + 0.8 * u) ** 2 * (-2 * u / J)
+            else:
+                dxi_dJ = 0.0
+            
+            weight = lmt * N * Aw * 1e-6 * 8960
+            copper_loss[0] += dPcu_dBm
+            copper_loss[1] += dPcu_dJ
+            eddy_loss[0] += xi * dPcu_dBm
+            eddy_loss[1] += dxi_dJ * Pcu + xi * dPcu_dJ
+            copper_weight[0] += -weight / Bm
+            copper_weight[1] += weight * (dlmt_rel - 1 / J)
+        
+        # Harmonic and stray losses scale the raw copper and eddy losses linearly
+        harmonic_copper = 1 + 0.05 * (self.harmonic_factor - 1)
+        harmonic_eddy = 1 + self.harmonic_factor ** 2
+        stray_fraction = self.calculate_stray_losses(1.0).loss
+        
+        # Temperature rise per watt of loss and cost per kg of copper
+        surface_area = 2 * ((core_dims.core_width/1000 * core_dims.core_depth/1000) +
+                           (core_dims.core_width/1000 * window_height/1000) +
+                           (core_dims.core_depth/1000 * window_height/1000))
+        rise_per_watt = self.calculate_temperature_rise(1.0, surface_area).temp_rise
+        unit_cost = self.calculate_cost(0.0, 1.0)
+        cost_per_kg = unit_cost.winding_cost * unit_cost.labor_factor
+        
+        record = self.evaluate(Bm, J)
+        efficiency_per_watt = -100 * self.power / (self.power + record.total_losses) ** 2
+        
+        # Flux only moves the core noise, which forced-cooling fan noise dilutes
+        noise = self.calculate_noise_level(record.core_weight, Bm)
+        core_share = 10 ** ((noise.frequency_adjusted - noise.total) / 10)
+        
+        gradients = []
+        for i, noise in ((0, 15 / (Bm * math.log(10)) * core_share), (1, 0.0)):
+            total_losses = (copper_loss[i] * (harmonic_copper + stray_fraction) +
+                            eddy_loss[i] * harmonic_eddy)
+            gradients.append(DesignRecord(
+                total_losses=total_losses,
+                copper_loss=copper_loss[i] * harmonic_copper,
+                eddy_loss=eddy_loss[i] * harmonic_eddy,
+                core_loss=0.0,
+                stray_loss=copper_loss[i] * stray_fraction,
+                core_weight=0.0,
+                copper_weight=copper_weight[i],
+                total_cost=copper_weight[i] * cost_per_kg,
+                temp_rise=total_losses * rise_per_watt,
+                hot_spot=total_losses * rise_per_watt * 1.2,
+                noise=noise,
+                efficiency=total_losses * efficiency_per_watt
+            ))
+        return gradients[0], gradients[1]
+    
+    @property
+    def design_steps(self):
+        """Design methodology narrative, built on first access after calculate_design()"""
+        if self._design_steps is None:
+            self._design_steps = self.build_design_steps()
+        return self._design_steps
+    
+    @design_steps.setter
+    def design_steps(self, steps):
+        self._design_steps = steps
+    
+    def calculate_design(self):
+        """Perform all design calculations"""
+        # The methodology text is only formatted when a report asks for it
+        self._design_steps = None
+        self._design_inputs = (self.core_shape, self.power, self.k, self.V1, self.V2,
+                               self.frequency, self.Bm, self.J, self.winding_type)
+        
+        if self.design_cache is not None:
+            cache_key = self.design_cache.key(self)
+            cached = self.design_cache.get(cache_key)
+            if cached is not None:
+                self.design_result = cached
+                self._results = self._cost_results = self._thermal_results = None
+                return
+        
+        # Each stage is only recomputed when __setattr__ dropped it because
+        # one of its inputs (or an upstream stage) changed; see DESIGN_STAGES.
+        # All of them depend on the material data.
+        stages = self._stages
+        if self._stages_fingerprint != MATERIALS.fingerprint:
+            stages.clear()
+            self._stages_fingerprint = MATERIALS.fingerprint
+        
+        # 1. Core dimensions
+        if "geometry" not in stages:
+            stages["geometry"] = self.calculate_core_dimensions()
+        core_dims = stages["geometry"]
+        Ac = core_dims.core_area
+        
+        # 2. Turns calculation
+        if "turns" not in stages:
+            stages["turns"] = self.calculate_turns(Ac)
+        turns = stages["turns"]
+        N1 = turns.primary
+        N2 = turns.secondary
+        
+        # 3. Current calculation
+        if "currents" not in stages:
+            stages["currents"] = self.calculate_currents()
+        currents = stages["currents"]
+        I1 = currents.primary
+        I2 = currents.secondary
+        
+        # 4. Conductor sizing
+        if "conductors" not in stages:
+            stages["conductors"] = (self.calculate_conductor_size(I1), self.calculate_conductor_size(I2))
+        primary_conductor, secondary_conductor = stages["conductors"]
+        Aw1 = primary_conductor.area
+        Aw2 = secondary_conductor.area
+        
+        # 5. Winding design
+        if "windings" not in stages:
+            stages["windings"] = (
+                self.calculate_winding(N1, I1, Aw1, core_dims.window_width, core_dims.window_height),
+                self.calculate_winding(N2, I2, Aw2, core_dims.window_width, core_dims.window_height))
+        primary_winding, secondary_winding = stages["windings"]
+        
+        # 6. Loss calculations
+        if "core_loss" not in stages:
+            stages["core_loss"] = self.calculate_core_loss(Ac, core_dims.building_factor)
+        core_loss = stages["core_loss"]
+        if "eddy" not in stages:
+            stages["eddy"] = (self.calculate_eddy_losses(I1, Aw1, N1, primary_winding.mean_turn_length),
+                              self.calculate_eddy_losses(I2, Aw2, N2, secondary_winding.mean_turn_length))
+        primary_eddy, secondary_eddy = stages["eddy"]
+        
+        if "losses" not in stages:
+            # Calculate total copper loss before stray losses
+            total_copper_loss = primary_winding.copper_loss + secondary_winding.copper_loss
+            
+            # Now calculate stray losses
+            stray_loss = self.calculate_stray_losses(total_copper_loss)
+            
+            harmonic_loss = self.calculate_harmonic_losses(total_copper_loss, 
+                                                         primary_eddy.loss + secondary_eddy.loss)
+            
+            total_copper_loss += harmonic_loss.copper_loss
+            total_eddy_loss = primary_eddy.loss + secondary_eddy.loss + harmonic_loss.eddy_loss
+            total_losses = total_copper_loss + core_loss.loss + total_eddy_loss + stray_loss.loss
+            stages["losses"] = LossBreakdown(core_loss, primary_eddy, secondary_eddy, stray_loss, harmonic_loss,
+                                             total_copper_loss, total_eddy_loss, total_losses)
+        losses = stages["losses"]
+        
+        # 7. Temperature rise
+        if "thermal" not in stages:
+            # Calculate surface area (simplified)
+            surface_area = 2 * ((core_dims.core_width/1000 * core_dims.core_depth/1000) +
+                               (core_dims.core_width/1000 * core_dims.window_height/1000) +
+                               (core_dims.core_depth/1000 * core_dims.window_height/1000))
+            
+            stages["thermal"] = (surface_area, self.calculate_temperature_rise(losses.total, surface_area))
+        surface_area, thermal = stages["thermal"]
         
         # 8. Noise calculation
-        if self.noise_limit:
-            noise = self.calculate_noise_level(core_loss["Core Weight (kg)"], self.Bm)
-            self.design_steps.append(f"\n8. Noise Calculation:")
-            self.design_steps.append(f"   Core noise: {noise['Core Noise (dB)']:.1f} dB")
-            self.design_steps.append(f"   Flux adjusted noise: {noise['Flux Adjusted Noise (dB)']:.1f} dB")
-            self.design_steps.append(f"   Frequency adjusted noise: {noise['Frequency Adjusted Noise (dB)']:.1f} dB")
-            if noise['Cooling System Noise (dB)'] > 0:
-                self.design_steps.append(f"   Cooling system noise: {noise['Cooling System Noise (dB)']:.1f} dB")
-            self.design_steps.append(f"   Total noise level: {noise['Total Noise Level (dB)']:.1f} dB")
+        if "noise" not in stages:
+            stages["noise"] = self.calculate_noise_level(core_loss.weight, self.Bm) if self.noise_limit else None
+        noise = stages["noise"]
         
         # 9. Mechanical design
-        mech = self.calculate_mechanical_parameters(core_dims)
-        
-        self.design_steps.append(f"\n9. Mechanical Design:")
-        for key, value in mech.items():
-            self.design_steps.append(f"   {key}: {value:.2f}")
+        if "mechanical" not in stages:
+            stages["mechanical"] = self.calculate_mechanical_parameters(core_dims)
+        mech = stages["mechanical"]
         
         # 10. Short-circuit and inrush
-        short_circuit = self.calculate_short_circuit(self.V1, N1, Ac, primary_winding["Mean Turn Length (m)"])
-        inrush = self.calculate_inrush_current(self.V1, N1, Ac)
-        
-        self.design_steps.append(f"\n10. Dynamic Performance:")
-        self.design_steps.append(f"   Reactance: {short_circuit['Reactance (Ohm)']:.4f} Ohm")
-        self.design_steps.append(f"   Short-circuit current: {short_circuit['Short-Circuit Current (A)']:.1f} A")
-        self.design_steps.append(f"   Radial force: {short_circuit['Radial Force (N)']:.1f} N")
-        self.design_steps.append(f"   Thermal capacity: {short_circuit['Thermal Capacity (A²s)']:.1f} A²s")
-        self.design_steps.append(f"   Peak inrush current: {inrush['Peak Inrush Current (A)']:.1f} A")
-        self.design_steps.append(f"   Inrush duration: {inrush['Inrush Duration (cycles)']:.1f} cycles")
+        if "dynamics" not in stages:
+            stages["dynamics"] = (self.calculate_short_circuit(self.V1, N1, Ac, primary_winding.mean_turn_length),
+                                  self.calculate_inrush_current(self.V1, N1, Ac))
+        short_circuit, inrush = stages["dynamics"]
         
         # 11. Cost estimation
-        # Calculate copper weight
-        cu_volume = (primary_winding["Mean Turn Length (m)"] * N1 * Aw1 * 1e-6 +
-                    secondary_winding["Mean Turn Length (m)"] * N2 * Aw2 * 1e-6)  # m³
-        cu_weight = cu_volume * 8960  # kg (density of copper)
-        
-        cost = self.calculate_cost(core_loss["Core Weight (kg)"], cu_weight)
-        
-        self.design_steps.append(f"\n11. Cost Estimation:")
-        self.design_steps.append(f"   Core weight: {core_loss['Core Weight (kg)']:.1f} kg")
-        self.design_steps.append(f"   Copper weight: {cu_weight:.1f} kg")
-        self.design_steps.append(f"   Core cost: ${cost['Core Cost (USD)']:.2f}")
-        self.design_steps.append(f"   Winding cost: ${cost['Winding Cost (USD)']:.2f}")
-        self.design_steps.append(f"   Cooling cost: ${cost['Cooling Cost (USD)']:.2f}")
-        self.design_steps.append(f"   Total cost: ${cost['Total Cost (USD)']:.2f}")
-        
-        # Store all results
-        self.results = {
-            **core_dims,
-            **turns,
-            **currents,
-            "Primary Conductor": primary_conductor,
-            "Secondary Conductor": secondary_conductor,
-            "Primary Winding": primary_winding,
-            "Secondary Winding": secondary_winding,
-            "Core Loss": core_loss,
-            "Primary Eddy Loss": primary_eddy,
-            "Secondary Eddy Loss": secondary_eddy,
-            "Stray Loss": stray_loss,
-            "Harmonic Loss": harmonic_loss,
-            "Total Copper Loss (W)": total_copper_loss,
-            "Total Eddy Loss (W)": total_eddy_loss,
-            "Total Losses (W)": total_losses,
-            "Thermal Analysis": thermal,
-            "Mechanical Design": mech,
-            "Short-Circuit Analysis": short_circuit,
-            "Inrush Current": inrush,
-            "Copper Weight (kg)": cu_weight,
-            "Surface Area (m²)": surface_area
-        }
-        
-        if self.noise_limit:
-            self.results["Noise Level (dB)"] = noise["Total Noise Level (dB)"]
+        if "copper_weight" not in stages:
+            # Calculate copper weight
+            cu_volume = (primary_winding.mean_turn_length * N1 * Aw1 * 1e-6 +
+                        secondary_winding.mean_turn_length * N2 * Aw2 * 1e-6)  # m³
+            stages["copper_weight"] = cu_volume * 8960  # kg (density of copper)
+        cu_weight = stages["copper_weight"]
         
-        self.cost_results = cost
-        self.thermal_results = thermal
+        if "cost" not in stages:
+            stages["cost"] = self.calculate_cost(core_loss.weight, cu_weight)
+        cost = stages["cost"]
         
         # Calculate efficiency
-        input_power = self.power + total_losses
+        input_power = self.power + losses.total
         calculated_efficiency = self.power / input_power
-        self.results["Efficiency (%)"] = calculated_efficiency * 100
+        
+        # Store all results; display-name dicts are only built when a report asks
+        self.design_result = DesignResult(
+            core_dims, turns, currents, primary_conductor, secondary_conductor,
+            primary_winding, secondary_winding, losses, thermal, noise,
+            mech, short_circuit, inrush, cost,
+            cu_weight, surface_area, calculated_efficiency * 100)
+        self._results = self._cost_results = self._thermal_results = None
+        if self.design_cache is not None:
+            self.design_cache.put(cache_key, self.design_result)
+    
+    def design_inputs(self):
+        """Every input attribute (DESIGN_INPUT_FIELDS) as a dict"""
+        return {name: getattr(self, name) for name in DESIGN_INPUT_FIELDS}
+    
+    @property
+    def results(self):
+        """Display-name dict of the last design_result, in the layout used by the reports"""
+        if self._results is None:
+            self._results = self.design_result.to_dict() if self.design_result else {}
+        return self._results
+    
+    @results.setter
+    def results(self, results):
+        self._results = results
+    
+    @property
+    def cost_results(self):
+        """Display-name dict of the last cost estimate"""
+        if self._cost_results is None:
+            self._cost_results = self.design_result.cost.to_dict() if self.design_result else {}
+        return self._cost_results
+    
+    @cost_results.setter
+    def cost_results(self, cost_results):
+        self._cost_results = cost_results
+    
+    @property
+    def thermal_results(self):
+        """Display-name dict of the last thermal analysis"""
+        if self._thermal_results is None:
+            self._thermal_results = self.design_result.thermal.to_dict() if self.design_result else {}
+        return self._thermal_results
+    
+    @thermal_results.setter
+    def thermal_results(self, thermal_results):
+        self._thermal_results = thermal_results
+    
+    def summary_record(self):
+        """Flat summary of the inputs and last calculate_design() results, keyed by SUMMARY_FIELDS"""
+        result = self.design_result
+        return {
+            "Power Rating (VA)": self.power,
+            "Primary Voltage (V)": self.V1,
+            "Secondary Voltage (V)": self.V2,
+            "Frequency (Hz)": self.frequency,
+            "Core Material": self.core_material,
+            "Core Shape": self.core_shape,
+            "Cooling Type": self.cooling_type,
+            "Flux Density (T)": self.Bm,
+            "Current Density (A/mm²)": self.J,
+            "Core Area (cm²)": result.geometry.core_area,
+            "Primary Turns": result.turns.primary,
+            "Secondary Turns": result.turns.secondary,
+            "Primary Current (A)": result.currents.primary,
+            "Secondary Current (A)": result.currents.secondary,
+            "Primary Conductor": result.primary_conductor.gauge["SWG"],
+            "Secondary Conductor": result.secondary_conductor.gauge["SWG"],
+            "Total Losses (W)": result.losses.total,
+            "Efficiency (%)": result.efficiency,
+            "Temperature Rise (°C)": result.thermal.temp_rise,
+            "Hot Spot Temperature (°C)": result.thermal.hot_spot,
+            "Core Weight (kg)": result.losses.core.weight,
+            "Copper Weight (kg)": result.copper_weight,
+            "Total Cost (USD)": result.cost.total_cost,
+            "Noise Level (dB)": result.noise.total if result.noise else None
+        }
+    
+    def build_design_steps(self):
+        """Format the design methodology narrative from the last calculate_design() results"""
+        if not self.results:
+            return []
+        core_shape, power, k, V1, V2, frequency, Bm, J, winding_type = self._design_inputs
+        results = self.results
+        cost = self.cost_results
+        steps = ["=== Design Methodology ==="]
+        
+        Ac = results["Core Area (cm²)"]
+        Ag = results["Gross Core Area (cm²)"]
+        steps.append(f"\n1. Core Dimensions ({core_shape}):")
+        steps.append(f"   Core area: A_c = K*sqrt(P) = 0.9 × sqrt({power}) = {Ac:.2f} cm²")
+        steps.append(f"   Gross core area: A_g = A_c/k = {Ac:.2f}/{k} = {Ag:.2f} cm²")
+        for key in ("Core Width (mm)", "Core Depth (mm)", "Window Width (mm)", "Window Height (mm)", "Yoke Height (mm)"):
+            steps.append(f"   {key}: {results[key]:.1f}")
+        
+        N1 = results["Primary Turns"]
+        N2 = results["Secondary Turns"]
+        steps.append(f"\n2. Turns Calculation:")
+        steps.append(f"   Primary turns: N1 = V1/(4.44×f×Bm×Ac) = {V1}/(4.44×{frequency}×{Bm}×{Ac:.2f}e-4) = {N1:.0f}")
+        steps.append(f"   Secondary turns: N2 = V2×(1+alpha)/(4.44×f×Bm×Ac) = {V2}×1.05/(4.44×{frequency}×{Bm}×{Ac:.2f}e-4) = {N2:.0f}")
+        
+        I1 = results["Primary Current (A)"]
+        I2 = results["Secondary Current (A)"]
+        steps.append(f"\n3. Current Calculation:")
+        steps.append(f"   Primary current: I1 = P/V1 = {power}/{V1} = {I1:.2f} A")
+        steps.append(f"   Secondary current: I2 = P/V2 = {power}/{V2} = {I2:.2f} A")
+        
+        primary_conductor = results["Primary Conductor"]
+        secondary_conductor = results["Secondary Conductor"]
+        steps.append(f"\n4. Conductor Sizing:")
+        steps.append(f"   Primary conductor area: Aw1 = I1/J = {I1:.2f}/{J} = {primary_conductor['Conductor Area (mm²)']:.4f} mm²")
+        steps.append(f"   Secondary conductor area: Aw2 = I2/J = {I2:.2f}/{J} = {secondary_conductor['Conductor Area (mm²)']:.4f} mm²")
+        steps.append(f"   Primary wire: {primary_conductor['SWG']['SWG']} ({primary_conductor['SWG']['Diameter']} mm)")
+        steps.append(f"   Secondary wire: {secondary_conductor['SWG']['SWG']} ({secondary_conductor['SWG']['Diameter']} mm)")
+        
+        # Check for Litz wire
+        if 'Strands' in primary_conductor['SWG']:
+            steps.append(f"   Primary requires Litz wire: {primary_conductor['SWG']['Strands']} strands of {primary_conductor['SWG']['Strand SWG']}")
+        if 'Strands' in secondary_conductor['SWG']:
+            steps.append(f"   Secondary requires Litz wire: {secondary_conductor['SWG']['Strands']} strands of {secondary_conductor['SWG']['Strand SWG']}")
+        
+        steps.append(f"\n5. Winding Design ({winding_type}):")
+        steps.append("   Primary Winding:")
+        for key, value in results["Primary Winding"]["Winding Configuration"].items():
+            steps.append(f"      {key}: {value}")
+        steps.append("   Secondary Winding:")
+        for key, value in results["Secondary Winding"]["Winding Configuration"].items():
+            steps.append(f"      {key}: {value}")
+        
+        steps.append(f"\n6. Loss Calculations:")
+        steps.append(f"   Primary copper loss: {results['Primary Winding']['Copper Loss (W)']:.2f} W")
+        steps.append(f"   Secondary copper loss: {results['Secondary Winding']['Copper Loss (W)']:.2f} W")
+        steps.append(f"   Harmonic copper loss: {results['Harmonic Loss']['Harmonic Copper Loss (W)']:.2f} W")
+        steps.append(f"   Primary eddy loss: {results['Primary Eddy Loss']['Eddy Loss (W)']:.2f} W")
+        steps.append(f"   Secondary eddy loss: {results['Secondary Eddy Loss']['Eddy Loss (W)']:.2f} W")
+        steps.append(f"   Harmonic eddy loss: {results['Harmonic Loss']['Harmonic Eddy Loss (W)']:.2f} W")
+        steps.append(f"   Core loss: {results['Core Loss']['Core Loss (W)']:.2f} W")
+        steps.append(f"   Stray loss: {results['Stray Loss']['Stray Loss (W)']:.2f} W")
+        steps.append(f"   Total losses: {results['Total Losses (W)']:.2f} W")
+        
+        thermal = results["Thermal Analysis"]
+        steps.append(f"\n7. Thermal Analysis:")
+        steps.append(f"   Surface area: {results['Surface Area (m²)']:.2f} m²")
+        steps.append(f"   Cooling coefficient: {thermal['Cooling Coefficient (W/m²°C)']:.1f} W/m²°C")
+        steps.append(f"   Temperature rise: {thermal['Temperature Rise (°C)']:.1f} °C")
+        steps.append(f"   Hot spot temperature: {thermal['Hot Spot Temperature (°C)']:.1f} °C")
+        
+        if "Noise Analysis" in results:
+            noise = results["Noise Analysis"]
+            steps.append(f"\n8. Noise Calculation:")
+            steps.append(f"   Core noise: {noise['Core Noise (dB)']:.1f} dB")
+            steps.append(f"   Flux adjusted noise: {noise['Flux Adjusted Noise (dB)']:.1f} dB")
+            steps.append(f"   Frequency adjusted noise: {noise['Frequency Adjusted Noise (dB)']:.1f} dB")
+            if noise['Cooling System Noise (dB)'] > 0:
+                steps.append(f"   Cooling system noise: {noise['Cooling System Noise (dB)']:.1f} dB")
+            steps.append(f"   Total noise level: {noise['Total Noise Level (dB)']:.1f} dB")
+        
+        steps.append(f"\n9. Mechanical Design:")
+        for key, value in results["Mechanical Design"].items():
+            steps.append(f"   {key}: {value:.2f}")
+        
+        short_circuit = results["Short-Circuit Analysis"]
+        inrush = results["Inrush Current"]
+        steps.append(f"\n10. Dynamic Performance:")
+        steps.append(f"   Reactance: {short_circuit['Reactance (Ohm)']:.4f} Ohm")
+        steps.append(f"   Short-circuit current: {short_circuit['Short-Circuit Current (A)']:.1f} A")
+        steps.append(f"   Radial force: {short_circuit['Radial Force (N)']:.1f} N")
+        steps.append(f"   Thermal capacity: {short_circuit['Thermal Capacity (A²s)']:.1f} A²s")
+        steps.append(f"   Peak inrush current: {inrush['Peak Inrush Current (A)']:.1f} A")
+        steps.append(f"   Inrush duration: {inrush['Inrush Duration (cycles)']:.1f} cycles")
+        
+        steps.append(f"\n11. Cost Estimation:")
+        steps.append(f"   Core weight: {results['Core Loss']['Core Weight (kg)']:.1f} kg")
+        steps.append(f"   Copper weight: {results['Copper Weight (kg)']:.1f} kg")
+        steps.append(f"   Core cost: ${cost['Core Cost (USD)']:.2f}")
+        steps.append(f"   Winding cost: ${cost['Winding Cost (USD)']:.2f}")
+        steps.append(f"   Cooling cost: ${cost['Cooling Cost (USD)']:.2f}")
+        steps.append(f"   Total cost: ${cost['Total Cost (USD)']:.2f}")
+        return steps
+
+    def calculate_design_batch(self, power, V1, V2, frequency, Bm, J,
+                               core_material=None, core_shape=None, cooling_type=None, k=None,
+                               harmonic_factor=None, ambient_temp=None, altitude=None,
+                               rho_cu=None, core_loss_factor=None):
+        """Evaluate many designs at once using whole-array NumPy operations.
+
+        Numeric arguments (including the optional stacking factor k,
+        harmonic_factor, ambient_temp, altitude, rho_cu and the 50 Hz core
+        loss factor in W/kg, which defaults to the material's) are broadcast
+        against each other. core_material, core_shape and
+        cooling_type take names or codes into the MATERIALS registry (see
+        MaterialRegistry.codes) and default to this design's selection; all remaining
+        inputs come from the instance. Returns a structured array
+        of BATCH_DTYPE whose numbers match calculate_design(). Rows whose
+        winding does not fit the window (where the scalar path would divide by
+        zero) are flagged with valid=False.
+        """
+        mat = MATERIALS.codes("materials", self.core_material if core_material is None else core_material)
+        shape = MATERIALS.codes("shapes", self.core_shape if core_shape is None else core_shape)
+        cool = MATERIALS.codes("cooling", self.cooling_type if cooling_type is None else cooling_type)
+        (power, V1, V2, frequency, Bm, J, k, harmonic_factor, ambient_temp, altitude,
+         rho_cu, core_loss_factor, mat, shape, cool) = np.broadcast_arrays(
+            np.asarray(power, dtype=float), np.asarray(V1, dtype=float), np.asarray(V2, dtype=float),
+            np.asarray(frequency, dtype=float), np.asarray(Bm, dtype=float), np.asarray(J, dtype=float),
+            np.asarray(self.k if k is None else k, dtype=float),
+            np.asarray(self.harmonic_factor if harmonic_factor is None else harmonic_factor, dtype=float),
+            np.asarray(self.ambient_temp if ambient_temp is None else ambient_temp, dtype=float),
+            np.asarray(self.altitude if altitude is None else altitude, dtype=float),
+            np.asarray(self.rho_cu if rho_cu is None else rho_cu, dtype=float),
+            MATERIALS.gather("materials", "loss_factor", mat) if core_loss_factor is None else np.asarray(core_loss_factor, dtype=float),
+            mat, shape, cool)
+        out = np.empty(power.shape, dtype=BATCH_DTYPE)
+        wye = self.phase == "Three Phase" and "Wye" in self.connection_type
+        phase_factor = 3 if self.phase == "Three Phase" else 1
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # 1. Core dimensions
+            Ac = np.where(power < 1000, 0.9, 1.1) * np.sqrt(power)
+            Ag = Ac / k
+            toroidal = MATERIALS.gather("shapes", "toroidal", shape)
+            mean_diameter = (4 * Ac / math.pi) ** 0.5 * 10
+            core_width = np.where(toroidal, mean_diameter * 0.3,
+                                  np.sqrt(Ag * MATERIALS.gather("shapes", "area", shape)) * 10)
+            core_depth = np.where(toroidal, mean_diameter * 0.3,
+                                  core_width * MATERIALS.gather("shapes", "depth", shape))
+            window_width = np.where(toroidal, mean_diameter * 0.7,
+                                    core_width * MATERIALS.gather("shapes", "window_width", shape))
+            window_height = np.where(toroidal, core_depth,
+                                     core_width * MATERIALS.gather("shapes", "window_height", shape))
+            yoke_height = np.where(toroidal, 0.0, core_width * MATERIALS.gather("shapes", "yoke", shape))
+            building_factor = MATERIALS.gather("shapes", "building_factor", shape)
+
+            # 2. Turns
+            N1 = V1 / (4.44 * frequency * Bm * Ac * 1e-4)
+            N2 = (V2 * (1 + self.regulation)) / (4.44 * frequency * Bm * Ac * 1e-4)
+            if wye:
+                N1 = N1 / math.sqrt(3)
+                N2 = N2 / math.sqrt(3)
+
+            # 3. Currents
+            I1 = power / (V1 * phase_factor)
+            I2 = power / (V2 * phase_factor)
+            if wye:
+                I1 = I1 * math.sqrt(3)
+                I2 = I2 * math.sqrt(3)
+
+            # 4. Conductor sizing
+            Aw1 = I1 / J
+            Aw2 = I2 / J
+            skin_depth = 66.1 / np.sqrt(frequency)
+
+            def strands(Aw):
+                effective_radius = np.sqrt(Aw / math.pi)
+                return np.where(effective_radius > skin_depth * 2,
+                                np.ceil((effective_radius / skin_depth) ** 2), 0)
+
+            gauges = GAUGE_TABLES.get(self.gauge_table, GAUGE_TABLES["SWG"])
+
+            def gauge(Aw):
+                return gauges.names[gauges.nearest_indices(Aw)]
+
+            # 5. Winding design
+            def winding(N, I, Aw):
+                fits = ((np.floor((window_height * 0.9) / (Aw ** 0.5)) > 0) &
+                        (np.floor((window_width * 0.9) / (Aw ** 0.5)) > 0))
+                lmt = np.where(toroidal, math.pi * ((window_width + (Aw ** 0.5)) / 1000),
+                               2 * (window_width + window_height) / 1000)
+                R = (rho_cu * lmt * N) / (Aw * 1e-6)
+                return fits, lmt, R, I ** 2 * R
+
+            fits1, lmt1, R1, Pcu1 = winding(N1, I1, Aw1)
+            fits2, lmt2, R2, Pcu2 = winding(N2, I2, Aw2)
+
+            # 6. Losses (the scalar path passes the building factor as the core path length)
+            core_volume = Ac * building_factor * 100
+            core_weight = core_volume * self.rho_fe / 1000
+            Pcore = core_weight * (core_loss_factor * (frequency / 50) ** 1.3)
+
+            def eddy(N, I, Aw, lmt):
+                d = 2 * np.sqrt(Aw / math.pi) * 1000
+                skin = 66.1 / np.sqrt(frequency) * 1000
+                ratio = (d / skin) ** 4
+                xi = np.where(d > skin, ratio / (192 + 0.8 * ratio), 0.0)
+                return xi * I ** 2 * N * lmt * (rho_cu / (Aw * 1e-6))
+
+            Peddy1 = eddy(N1, I1, Aw1, lmt1)
+            Peddy2 = eddy(N2, I2, Aw2, lmt2)
+            copper_loss = Pcu1 + Pcu2
+            stray_loss = 0.15 * copper_loss
+            harmonic_eddy = (harmonic_factor ** 2) * (Peddy1 + Peddy2)
+            harmonic_copper = copper_loss * (1 + 0.05 * (harmonic_factor - 1)) - copper_loss
+            total_copper = copper_loss + harmonic_copper
+            total_eddy = Peddy1 + Peddy2 + harmonic_eddy
+            total_losses = total_copper + Pcore + total_eddy + stray_loss
+
+            # 7. Temperature rise
+            surface_area = 2 * ((core_width / 1000 * core_depth / 1000) +
+                                (core_width / 1000 * window_height / 1000) +
+                                (core_depth / 1000 * window_height / 1000))
+            altitude_factor = 1 / (1 - altitude / 9000) ** 0.5
+            h_adj = MATERIALS.gather("cooling", "coefficient", cool) / altitude_factor
+            temp_rise = total_losses / (h_adj * surface_area)
+
+            # 8. Noise
+            base_noise = (MATERIALS.gather("materials", "noise_base", mat) +
+                          MATERIALS.gather("materials", "noise_slope", mat) * np.log10(core_weight))
+            noise = base_noise + 15 * np.log10(Bm / 1.5) + 10 * np.log10(frequency / 50)
+            cooling_noise = 5 + np.log10(power / 1000)
+            noise = np.where(MATERIALS.gather("cooling", "forced", cool),
+                             10 * np.log10(10 ** (noise / 10) + 10 ** (cooling_noise / 10)), noise)
+
+            # 11. Cost (labor factor depends only on transformer_type)
+            cu_weight = (lmt1 * N1 * Aw1 * 1e-6 + lmt2 * N2 * Aw2 * 1e-6) * 8960
+            core_cost = core_weight * MATERIALS.gather("materials", "price", mat)
+            winding_cost = cu_weight * MATERIALS.copper_price
+            cooling_cost = MATERIALS.gather("cooling", "cost_per_va", cool) * power
+            labor_factor = MATERIALS.labor_factor(self.transformer_type)
+            total_cost = (core_cost + winding_cost) * labor_factor + cooling_cost
+
+            out["core_area"] = Ac
+            out["gross_core_area"] = Ag
+            out["core_width"] = core_width
+            out["core_depth"] = core_depth
+            out["window_width"] = window_width
+            out["window_height"] = window_height
+            out["yoke_height"] = yoke_height
+            out["core_building_factor"] = building_factor
+            out["primary_turns"] = N1
+            out["secondary_turns"] = N2
+            out["primary_current"] = I1
+            out["secondary_current"] = I2
+            out["primary_conductor_area"] = Aw1
+            out["secondary_conductor_area"] = Aw2
+            out["primary_swg"] = gauge(Aw1)
+            out["secondary_swg"] = gauge(Aw2)
+            out["primary_strands"] = strands(Aw1)
+            out["secondary_strands"] = strands(Aw2)
+            out["primary_mlt"] = lmt1
+            out["secondary_mlt"] = lmt2
+            out["primary_resistance"] = R1
+            out["secondary_resistance"] = R2
+            out["primary_copper_loss"] = Pcu1
+            out["secondary_copper_loss"] = Pcu2
+            out["core_volume"] = core_volume
+            out["core_weight"] = core_weight
+            out["core_loss"] = Pcore
+            out["primary_eddy_loss"] = Peddy1
+            out["secondary_eddy_loss"] = Peddy2
+            out["stray_loss"] = stray_loss
+            out["harmonic_copper_loss"] = harmonic_copper
+            out["harmonic_eddy_loss"] = harmonic_eddy
+            out["total_copper_loss"] = total_copper
+            out["total_eddy_loss"] = total_eddy
+            out["total_losses"] = total_losses
+            out["surface_area"] = surface_area
+            out["temp_rise"] = temp_rise
+            out["hot_spot"] = ambient_temp + temp_rise * 1.2
+            out["noise"] = noise
+            out["copper_weight"] = cu_weight
+            out["core_cost"] = core_cost
+            out["winding_cost"] = winding_cost
+            out["cooling_cost"] = cooling_cost
+            out["total_cost"] = total_cost
+            out["efficiency"] = power / (power + total_losses) * 100
+            out["valid"] = fits1 & fits2
+
+        return out
+
+    def sweep_records(self, power, V1, V2, frequency, Bm, J,
+                      core_material=None, core_shape=None, cooling_type=None, k=None, chunk_size=65536):
+        """Yield every design of a broadcast parameter grid as flat SWEEP_DTYPE chunks.
+
+        Arguments broadcast as in calculate_design_batch(), e.g. Bm[:, None]
+        against J[None, :], but the grid is never materialised: each chunk
+        of at most chunk_size rows is gathered from read-only broadcast
+        views, evaluated and yielded, so memory use depends on chunk_size
+        only. Rows come out in C order of the broadcast shape.
+        """
+        inputs = [np.asarray(power, dtype=float), np.asarray(V1, dtype=float), np.asarray(V2, dtype=float),
+                  np.asarray(frequency, dtype=float), np.asarray(Bm, dtype=float), np.asarray(J, dtype=float),
+                  np.asarray(self.k if k is None else k, dtype=float),
+                  MATERIALS.codes("materials", self.core_material if core_material is None else core_material),
+                  MATERIALS.codes("shapes", self.core_shape if core_shape is None else core_shape),
+                  MATERIALS.codes("cooling", self.cooling_type if cooling_type is None else cooling_type)]
+        grid = np.broadcast_arrays(*inputs)
+        size = grid[0].size
+        
+        for start in range(0, size, chunk_size):
+            rows = slice(start, min(start + chunk_size, size))
+            p, v1, v2, f, bm, j, stacking, mat, shape, cool = (view.flat[rows] for view in grid)
+            batch = self.calculate_design_batch(p, v1, v2, f, bm, j, mat, shape, cool, k=stacking)
+            
+            chunk = np.empty(len(batch), dtype=SWEEP_DTYPE)
+            for name, values in zip(("power", "V1", "V2", "frequency", "Bm", "J", "k"),
+                                    (p, v1, v2, f, bm, j, stacking)):
+                chunk[name] = values
+            chunk["core_material"] = np.array(MATERIALS.material_names + ("",))[mat]
+            chunk["core_shape"] = np.array(MATERIALS.shape_names + ("",))[shape]
+            chunk["cooling_type"] = np.array(MATERIALS.cooling_names + ("",))[cool]
+            for name in BATCH_DTYPE.names:
+                chunk[name] = batch[name]
+            yield chunk
+    
+    def write_sweep(self, path, power, V1, V2, frequency, Bm, J,
+                    core_material=None, core_shape=None, cooling_type=None, k=None, chunk_size=65536):
+        """Stream sweep_records() for the given grid to path (see write_records); returns the row count"""
+        shape = np.broadcast_shapes(*(np.shape(a) for a in (power, V1, V2, frequency, Bm, J,
+                                                             core_material, core_shape, cooling_type, k)
+                                       if a is not None))
+        records = self.sweep_records(power, V1, V2, frequency, Bm, J,
+                                     core_material, core_shape, cooling_type, k, chunk_size)
+        return write_records(records, path, total=math.prod(shape))
+    
+    def map_batch(self, columns, chunk_size=None, max_workers=None, executor=None):
+        """Evaluate equal-length 1-D input columns with calculate_design_batch() across processes.
+
+        columns maps keyword names of calculate_design_batch() (BATCH_INPUTS:
+        power, V1, V2, frequency, Bm, J, k, harmonic_factor, ambient_temp,
+        altitude, rho_cu, core_loss_factor, core_material, core_shape,
+        cooling_type) to arrays; missing ones come from the design. Rows are cut into chunks (by default about four per
+        worker, at least 10000 rows) so each process start and pickled design
+        is paid for once per chunk rather than per design. Pass an existing
+        executor to reuse warm workers across calls; small inputs are run
+        in-process. Returns a BATCH_DTYPE array in input order.
+        """
+        columns = {name: np.asarray(values) for name, values in columns.items()}
+        if not columns:
+            raise ValueError("map_batch needs at least one column")
+        unknown = sorted(set(columns) - set(BATCH_INPUTS))
+        if unknown:
+            raise ValueError(f"Unknown map_batch columns {unknown}; expected some of {list(BATCH_INPUTS)}")
+        sizes = {name: len(values) for name, values in columns.items()}
+        size = max(sizes.values())
+        if min(sizes.values()) != size:
+            raise ValueError(f"map_batch columns must have equal length, got {sizes}")
+        workers = max_workers or os.cpu_count() or 1
+        chunk_size = chunk_size or max(10000, math.ceil(size / (workers * 4)))
+        chunks = [{name: values[start:start + chunk_size] for name, values in columns.items()}
+                  for start in range(0, size, chunk_size)]
+        
+        if executor is None and len(chunks) <= 1:
+            results = [evaluate_batch_chunk(self, chunk) for chunk in chunks]
+        elif executor is None:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(evaluate_batch_chunk, itertools.repeat(self), chunks))
+        else:
+            results = list(executor.map(evaluate_batch_chunk, itertools.repeat(self), chunks))
+        return np.concatenate(results) if results else np.empty(0, dtype=BATCH_DTYPE)
+    
+    def sweep(self, parameters, grid=True, outputs=None, chunk_size=None, max_workers=None, executor=None):
+        """Evaluate the design over ranges of parameter values.
+
+        parameters maps calculate_design_batch() keywords (e.g. Bm, J,
+        harmonic_factor, ambient_temp, altitude) to sequences of values. With
+        grid=True every combination is evaluated (full factorial); otherwise
+        the sequences are paired row by row and must have equal length. Work
+        is spread over processes as in map_batch(). Returns a tidy structured
+        array with one row per design: a column per swept parameter followed
+        by the requested BATCH_DTYPE outputs (all by default; valid is always
+        included).
+        """
+        names = list(parameters)
+        values = [np.asarray(parameters[name]) for name in names]
+        if grid:
+            values = [v.ravel() for v in np.meshgrid(*values, indexing="ij")]
+        batch = self.map_batch(dict(zip(names, values)), chunk_size, max_workers, executor)
+        
+        outputs = list(outputs or BATCH_DTYPE.names)
+        if "valid" not in outputs:
+            outputs.append("valid")
+        rows = np.empty(len(batch), dtype=[(name, v.dtype if v.dtype.kind == "U" else "f8")
+                                           for name, v in zip(names, values)] +
+                                          [(name, BATCH_DTYPE[name]) for name in outputs])
+        for name, v in zip(names, values):
+            rows[name] = v
+        for name in outputs:
+            rows[name] = batch[name]
+        return rows
+    
+    def sensitivity_one_at_a_time(self, ranges=None, outputs=SENSITIVITY_OUTPUTS, points=21,
+                                  chunk_size=None, max_workers=None, executor=None):
+        """Vary each parameter across its range with the others held at the design's values.
+
+        ranges maps parameter names to (low, high) and defaults to
+        SENSITIVITY_RANGES. Returns a long-format structured array with
+        columns parameter, value and the requested outputs, points rows per
+        parameter, ready to plot one curve per parameter.
+        """
+        ranges = ranges or SENSITIVITY_RANGES
+        parameter = np.repeat(list(ranges), points)
+        value = np.concatenate([np.linspace(low, high, points) for low, high in ranges.values()])
+        columns = {}
+        for index, name in enumerate(ranges):
+            column = np.full(len(value), float(getattr(self, name)))
+            rows = slice(index * points, (index + 1) * points)
+            column[rows] = value[rows]
+            columns[name] = column
+        batch = self.map_batch(columns, chunk_size, max_workers, executor)
+        
+        out = np.empty(len(batch), dtype=[("parameter", "U16"), ("value", "f8")] +
+                                         [(name, "f8") for name in outputs] + [("valid", "?")])
+        out["parameter"] = parameter
+        out["value"] = value
+        for name in outputs:
+            out[name] = batch[name]
+        out["valid"] = batch["valid"]
+        return out
+    
+    def sensitivity_sobol(self, ranges=None, outputs=SENSITIVITY_OUTPUTS, samples=4096, seed=None,
+                          chunk_size=None, max_workers=None, executor=None):
+        """Variance-based (Sobol) first-order and total sensitivity indices.
+
+        Parameters are sampled uniformly over ranges (default
+        SENSITIVITY_RANGES) with two Latin hypercube matrices A and B and the
+        Saltelli cross matrices, samples * (d + 2) designs in all, evaluated
+        in one map_batch() call. First-order indices use the Saltelli (2010)
+        estimator and total indices Jansen's; rows where either design does
+        not fit its window are left out. Returns a structured array with
+        columns output, parameter, first_order and total.
+        """
+        rng = np.random.default_rng(seed)
+        names = list(ranges or SENSITIVITY_RANGES)
+        bounds = [(ranges or SENSITIVITY_RANGES)[name] for name in names]
+        A = latin_hypercube(samples, bounds, rng)
+        B = latin_hypercube(samples, bounds, rng)
+        blocks = [A, B]
+        for i in range(len(names)):
+            AB = A.copy()
+            AB[:, i] = B[:, i]
+            blocks.append(AB)
+        x = np.concatenate(blocks)
+        batch = self.map_batch({name: x[:, i] for i, name in enumerate(names)},
+                               chunk_size, max_workers, executor).reshape(len(blocks), samples)
+        
+        out = np.empty(len(outputs) * len(names), dtype=[("output", "U16"), ("parameter", "U16"),
+                                                         ("first_order", "f8"), ("total", "f8")])
+        row = 0
+        for output in outputs:
+            f = batch[output]
+            valid = batch["valid"]
+            base = valid[0] & valid[1]
+            variance = np.var(np.concatenate([f[0][base], f[1][base]]))
+            for i, name in enumerate(names):
+                ok = base & valid[i + 2]
+                fA, fB, fAB = f[0][ok], f[1][ok], f[i + 2][ok]
+                out[row] = (output, name,
+                            np.mean(fB * (fAB - fA)) / variance,
+                            0.5 * np.mean((fA - fAB) ** 2) / variance)
+                row += 1
+        return out
+    
+    def tolerance_analysis(self, distributions=None, samples=100000, guarantees=None,
+                           outputs=TOLERANCE_OUTPUTS, batch_size=100000, seed=None, keep_samples=False):
+        """Monte-Carlo spread of losses, temperature rise and cost under manufacturing variation.
+
+        distributions maps TOLERANCE_INPUTS: k, kw, rho_cu and core_loss_factor (W/kg at 50 Hz)
+        to either a callable (rng, size) -> values or a tuple naming a numpy
+        Generator method and its arguments, e.g. ("normal", 0.95, 0.01) or
+        ("uniform", 0.93, 0.97). By default k, rho_cu and the material's core
+        loss factor are normal with 1 %, 2 % and 5 % standard deviation. kw
+        is accepted but no loss or cost model uses it yet.
+
+        Samples are drawn and evaluated batch_size at a time with
+        calculate_design_batch(). Guarantees are checked against
+        design_limits() plus any extra {output: upper limit} pairs in
+        guarantees; designs whose winding does not fit are counted separately
+        and left out of the statistics. The results (and the samples when
+        keep_samples is set) are stored in tolerance_results and returned.
+        """
+        started = time.perf_counter()
+        rng = np.random.default_rng(seed)
+        core_loss_factor = MATERIALS.material(self.core_material).loss_factor
+        if distributions is None:
+            distributions = {
+                "k": ("normal", self.k, 0.01 * self.k),
+                "rho_cu": ("normal", self.rho_cu, 0.02 * self.rho_cu),
+                "core_loss_factor": ("normal", core_loss_factor, 0.05 * core_loss_factor)
+            }
+        unknown = sorted(set(distributions) - set(TOLERANCE_INPUTS))
+        if unknown:
+            raise ValueError(f"Unknown tolerance inputs {unknown}; expected some of {list(TOLERANCE_INPUTS)}")
+        checks = [("+".join(fields), limit, fields) for limit, fields in self.design_limits()]
+        checks += [(name, limit, (name,)) for name, limit in (guarantees or {}).items()]
+        
+        values = np.empty((len(outputs), samples))
+        violated = np.zeros((len(checks), samples), dtype=bool)
+        valid = np.empty(samples, dtype=bool)
+        drawn = {name: np.empty(samples) for name in distributions} if keep_samples else None
+        for start in range(0, samples, batch_size):
+            size = min(batch_size, samples - start)
+            rows = slice(start, start + size)
+            draws = {}
+            for name, distribution in distributions.items():
+                if callable(distribution):
+                    draws[name] = np.asarray(distribution(rng, size), dtype=float)
+                else:
+                    method, *args = distribution
+                    draws[name] = getattr(rng, method)(*args, size=size)
+                if keep_samples:
+                    drawn[name][rows] = draws[name]
+            
+            batch = self.calculate_design_batch(self.power, self.V1, self.V2, self.frequency, self.Bm, self.J,
+                                                k=draws.get("k"), rho_cu=draws.get("rho_cu"),
+                                                core_loss_factor=draws.get("core_loss_factor"))
+            valid[rows] = batch["valid"]
+            for i, name in enumerate(outputs):
+                values[i, rows] = batch[name]
+            for i, (_, limit, fields) in enumerate(checks):
+                violated[i, rows] = sum(batch[f] for f in fields) > limit
+        
+        statistics = np.empty(len(outputs), dtype=[("output", "U16"), ("mean", "f8"), ("std", "f8"),
+                                                   ("p05", "f8"), ("p50", "f8"), ("p95", "f8"),
+                                                   ("min", "f8"), ("max", "f8")])
+        fitted = values[:, valid]
+        for i, name in enumerate(outputs):
+            p05, p50, p95 = np.percentile(fitted[i], [5, 50, 95]) if fitted.shape[1] else (np.nan,) * 3
+            statistics[i] = (name, fitted[i].mean(), fitted[i].std(), p05, p50, p95,
+                             fitted[i].min(initial=np.inf), fitted[i].max(initial=-np.inf))
+        
+        self.tolerance_results = {
+            "Samples": samples,
+            "Valid Samples": int(valid.sum()),
+            "Statistics": statistics,
+            "Violation Probability": {name: float(violated[i][valid].mean()) if valid.any() else float("nan")
+                                      for i, (name, _, _) in enumerate(checks)},
+            "Any Violation Probability": float(violated[:, valid].any(axis=0).mean()) if valid.any() else float("nan"),
+            "Invalid Fraction": float(1 - valid.mean()),
+            "Time (s)": time.perf_counter() - started
+        }
+        if keep_samples:
+            self.tolerance_results["Sampled Inputs"] = drawn
+            self.tolerance_results["Sampled Outputs"] = dict(zip(outputs, values))
+            self.tolerance_results["Sample Valid"] = valid
+        return self.tolerance_results
+    
+    def report_sections(self):
+        """Yield (title, (name, value) pairs) for the report writers, walking the last results in place.
+
+        Sections are the design inputs, the scalar results, every nested
+        results group (Core Loss, Thermal Analysis, ...) and the cost
+        estimate. Values may themselves be dicts (e.g. the SWG row).
+        """
+        results = self.results
+        if not results:
+            raise ValueError("No results to report; run calculate_design() first")
+        yield "Design Inputs", self.design_inputs().items()
+        yield "Design Summary", ((name, value) for name, value in results.items() if not isinstance(value, dict))
+        for name, value in results.items():
+            if isinstance(value, dict):
+                yield name, value.items()
+        yield "Cost Estimate", self.cost_results.items()
+    
+    def write_report(self, target, format=None):
+        """Stream a text report (json, html, markdown or csv; see REPORT_WRITERS) to a path or text stream.
+
+        The format defaults to the file extension. Unlike the PDF report
+        this needs neither fpdf nor matplotlib and works on the existing
+        results without recalculating.
+        """
+        if format is None:
+            if not isinstance(target, (str, os.PathLike)):
+                raise ValueError("A format is required when writing to a stream")
+            format = os.path.splitext(target)[1].lower().lstrip(".")
+        writer_class = REPORT_WRITERS.get(format)
+        if writer_class is None:
+            raise ValueError(f"Unknown report format: {format}")
+        
+        with contextlib.ExitStack() as stack:
+            if isinstance(target, (str, os.PathLike)):
+                target = stack.enter_context(open(target, "w", newline="", encoding="utf-8"))
+            writer = writer_class(target)
+            writer.begin(f"Transformer Design Report: {self.power} VA {self.core_shape} ({self.core_material})")
+            for title, items in self.report_sections():
+                writer.section(title, items)
+            writer.end()
     
     def generate_pdf_report(self, filename="transformer_design_report.pdf"):
         """Generate a comprehensive PDF report with all design details"""
+        pdf = self.build_pdf_report()
+        
+        # Save PDF
+        pdf.output(filename)
+        print(f"\nReport generated successfully: {filename}")
+    
+    def build_pdf_report(self):
+        """Lay out the report of generate_pdf_report() and return the FPDF document unsaved"""
+        from fpdf import FPDF
+        
         # Create PDF
         pdf = FPDF()
         pdf.add_page()
@@ -1269,10 +3222,7 @@ class TransformerDesign:
         
         # Add detailed sections
         self.add_detailed_sections(pdf)
-        
-        # Save PDF
-        pdf.output(filename)
-        print(f"\nReport generated successfully: {filename}")
+        return pdf
     
     def add_detailed_sections(self, pdf):
         """Add detailed design sections to the PDF"""
@@ -1491,47 +3441,59 @@ class TransformerDesign:
             pdf.multi_cell(0, 5, step)
             pdf.ln(2)
     
-    def add_core_diagram(self, pdf):
-        """Add a diagram of the core structure to the PDF"""
-        # Create a simple diagram using matplotlib
-        fig, ax = plt.subplots(figsize=(6, 4))
+    def core_diagram_geometry(self):
+        """(core_shape, core width, core depth, window width, window height) in cm, rounded to DIAGRAM_QUANTUM"""
+        geometry = self.design_result.geometry
+        return (self.core_shape,) + tuple(round(value / DIAGRAM_QUANTUM) * DIAGRAM_QUANTUM / 10 for value in (
+            geometry.core_width, geometry.core_depth, geometry.window_width, geometry.window_height))
+    
+    def render_core_diagram(self, dpi=300):
+        """PNG bytes of the core diagram, drawn in memory and shared through CORE_DIAGRAMS"""
+        geometry = self.core_diagram_geometry()
+        return CORE_DIAGRAMS.get(geometry + (dpi,), lambda: self.draw_core_diagram(*geometry, dpi=dpi))
+    
+    @staticmethod
+    def draw_core_diagram(core_shape, core_width, core_depth, window_width, window_height, dpi=300):
+        """Draw the core diagram with matplotlib (dimensions in cm) and return it as PNG bytes"""
+        import io
+        # The object-oriented API keeps pyplot's global figure state (and GUI backends) out of the way
+        from matplotlib.figure import Figure
+        from matplotlib.patches import Circle, Rectangle
         
-        # Get dimensions in cm for drawing
-        core_width = self.results['Core Width (mm)'] / 10
-        core_depth = self.results['Core Depth (mm)'] / 10
-        window_width = self.results['Window Width (mm)'] / 10
-        window_height = self.results['Window Height (mm)'] / 10
+        # Create a simple diagram using matplotlib
+        fig = Figure(figsize=(6, 4))
+        ax = fig.subplots()
         
-        if self.core_shape == "EI Core":
+        if core_shape == "EI Core":
             # Draw EI core
             # Center limb
-            ax.add_patch(plt.Rectangle((window_width/2, window_height/2), 
+            ax.add_patch(Rectangle((window_width/2, window_height/2), 
                                      core_width - window_width, 
                                      core_depth - window_height, 
                                      fill=False, edgecolor='blue', linewidth=2))
             
             # Outer limbs
-            ax.add_patch(plt.Rectangle((0, window_height/2), 
+            ax.add_patch(Rectangle((0, window_height/2), 
                                      window_width/2, 
                                      core_depth - window_height, 
                                      fill=False, edgecolor='blue', linewidth=2))
-            ax.add_patch(plt.Rectangle((core_width - window_width/2, window_height/2), 
+            ax.add_patch(Rectangle((core_width - window_width/2, window_height/2), 
                                      window_width/2, 
                                      core_depth - window_height, 
                                      fill=False, edgecolor='blue', linewidth=2))
             
             # Yokes
-            ax.add_patch(plt.Rectangle((0, 0), 
+            ax.add_patch(Rectangle((0, 0), 
                                      core_width, 
                                      window_height/2, 
                                      fill=False, edgecolor='blue', linewidth=2))
-            ax.add_patch(plt.Rectangle((0, core_depth - window_height/2), 
+            ax.add_patch(Rectangle((0, core_depth - window_height/2), 
                                      core_width, 
                                      window_height/2, 
                                      fill=False, edgecolor='blue', linewidth=2))
             
             # Window
-            ax.add_patch(plt.Rectangle((window_width/2, window_height/2), 
+            ax.add_patch(Rectangle((window_width/2, window_height/2), 
                                      core_width - window_width, 
                                      core_depth - window_height, 
                                      fill=False, edgecolor='red', linestyle='--', linewidth=1))
@@ -1540,16 +3502,16 @@ class TransformerDesign:
             ax.text(core_width/2, -0.5, f"EI Core: {core_width:.1f}cm × {core_depth:.1f}cm", ha='center')
             ax.text(core_width/2, window_height/2, f"Window: {window_width:.1f}cm × {window_height:.1f}cm", ha='center', va='center')
         
-        elif self.core_shape == "Toroidal":
+        elif core_shape == "Toroidal":
             # Draw toroidal core
             mean_radius = (window_width + core_width) / 4
-            torus = plt.Circle((mean_radius, mean_radius), mean_radius, 
+            torus = Circle((mean_radius, mean_radius), mean_radius, 
                              fill=False, edgecolor='blue', linewidth=2)
             ax.add_patch(torus)
             
             # Window representation
             inner_radius = window_width / 2
-            ax.add_patch(plt.Circle((mean_radius, mean_radius), inner_radius,
+            ax.add_patch(Circle((mean_radius, mean_radius), inner_radius,
                                    fill=False, edgecolor='red', linestyle='--', linewidth=1))
             
             # Labels
@@ -1562,15 +3524,1231 @@ class TransformerDesign:
         ax.set_aspect('equal')
         ax.axis('off')
         
-        # Save the plot to a temporary file and add to PDF
-        temp_img = "temp_core_diagram.png"
-        plt.savefig(temp_img, dpi=300, bbox_inches='tight')
-        plt.close()
+        # Render into memory rather than a file in the working directory
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, bbox_inches='tight')
+        return buffer.getvalue()
+    
+    def add_core_diagram(self, pdf, dpi=300, vector=False):
+        """Add a diagram of the core structure to the PDF.
+
+        By default the matplotlib drawing is embedded as a PNG rendered at
+        dpi; with vector=True it is drawn with FPDF lines and shapes instead,
+        which needs no matplotlib and stays sharp at any zoom. fpdf 1.x has
+        neither the clipping and dash calls of the vector drawing nor
+        in-memory images, so there the PNG is always used, via a temporary file.
+        """
+        if vector and hasattr(pdf, "rect_clip"):
+            self.draw_core_diagram_vector(pdf)
+            return
+        embed_png(pdf, self.render_core_diagram(dpi), x=50, y=None, w=100)
+    
+    def draw_core_diagram_vector(self, pdf, x=50, width=100):
+        """Draw the core diagram straight onto the PDF page, width mm wide starting at x mm (needs fpdf2)"""
+        core_shape, core_width, core_depth, window_width, window_height = self.core_diagram_geometry()
+        # Same view as the matplotlib figure: 1 cm margin around the core, y pointing up
+        scale = width / (core_width + 2)
+        height = (core_depth + 2) * scale
+        if pdf.get_y() + height > pdf.h - pdf.b_margin:
+            pdf.add_page()
+        top = pdf.get_y()
+        
+        def point(u, v):
+            return x + (u + 1) * scale, top + (core_depth + 1 - v) * scale
+        
+        def rectangle(u, v, w, h):
+            left, upper = point(u, v + h)
+            pdf.rect(left, upper, w * scale, h * scale)
+        
+        def circle(u, v, radius):
+            left, upper = point(u - radius, v + radius)
+            pdf.ellipse(left, upper, 2 * radius * scale, 2 * radius * scale)
+        
+        def label(u, v, text, middle=False):
+            left, baseline = point(u, v)
+            if middle:
+                baseline += pdf.font_size / 3
+            pdf.text(left - pdf.get_string_width(text) / 2, baseline, text)
+        
+        def core_pen():
+            pdf.set_draw_color(0, 0, 255)
+            pdf.set_line_width(0.5)
+            pdf.set_dash_pattern()
+        
+        def window_pen():
+            pdf.set_draw_color(255, 0, 0)
+            pdf.set_line_width(0.25)
+            pdf.set_dash_pattern(dash=1, gap=1)
+        
+        # Shapes are clipped to the view like the matplotlib axes; labels are not
+        with pdf.rect_clip(x, top, width, height):
+            if core_shape == "EI Core":
+                core_pen()
+                # Center limb, outer limbs and yokes
+                rectangle(window_width/2, window_height/2, core_width - window_width, core_depth - window_height)
+                rectangle(0, window_height/2, window_width/2, core_depth - window_height)
+                rectangle(core_width - window_width/2, window_height/2, window_width/2, core_depth - window_height)
+                rectangle(0, 0, core_width, window_height/2)
+                rectangle(0, core_depth - window_height/2, core_width, window_height/2)
+                window_pen()
+                rectangle(window_width/2, window_height/2, core_width - window_width, core_depth - window_height)
+            elif core_shape == "Toroidal":
+                mean_radius = (window_width + core_width) / 4
+                core_pen()
+                circle(mean_radius, mean_radius, mean_radius)
+                window_pen()
+                circle(mean_radius, mean_radius, window_width / 2)
+        
+        font = (pdf.font_family, pdf.font_style, pdf.font_size_pt)
+        pdf.set_font('Arial', '', 8)
+        if core_shape == "EI Core":
+            label(core_width/2, -0.5, f"EI Core: {core_width:.1f}cm × {core_depth:.1f}cm")
+            label(core_width/2, window_height/2, f"Window: {window_width:.1f}cm × {window_height:.1f}cm", True)
+        elif core_shape == "Toroidal":
+            mean_radius = (window_width + core_width) / 4
+            label(mean_radius, -0.5, f"Toroidal Core: Ø{2*mean_radius:.1f}cm")
+            label(mean_radius, mean_radius, f"Window: Ø{window_width:.1f}cm", True)
+        
+        pdf.set_dash_pattern()
+        pdf.set_draw_color(0, 0, 0)
+        pdf.set_line_width(0.2)
+        pdf.set_font(*font)
+        pdf.set_y(top + height)
+
+
+def _flatten_report_items(items, prefix=""):
+    """(name, value) pairs with nested dicts expanded to "Parent / Child" names"""
+    for name, value in items:
+        if isinstance(value, dict):
+            yield from _flatten_report_items(value.items(), f"{prefix}{name} / ")
+        else:
+            yield f"{prefix}{name}", value
+
+
+def _format_report_value(value):
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return "" if value is None else str(value)
+
+
+def _json_value(value):
+    # NumPy scalars and anything else unusual
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class ReportWriter:
+    """Base of the streaming text report backends used by TransformerDesign.write_report.
+
+    begin() is called once with the report title, section() once per
+    report section with an iterable of (name, value) pairs, and end() last;
+    each writes its part to the text stream straight away.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def begin(self, title):
+        pass
+    
+    def section(self, title, items):
+        raise NotImplementedError
+    
+    def end(self):
+        pass
+
+
+class JSONReportWriter(ReportWriter):
+    """One JSON object: {"title": ..., "<section>": {<name>: <value>, ...}, ...} with nesting kept"""
+    def begin(self, title):
+        self.stream.write("{" + json.dumps("title") + ": " + json.dumps(title, ensure_ascii=False))
+    
+    def section(self, title, items):
+        write = self.stream.write
+        write(",\n" + json.dumps(title, ensure_ascii=False) + ": {")
+        separator = ""
+        for name, value in items:
+            write(separator + json.dumps(name, ensure_ascii=False) + ": "
+                  + json.dumps(value, ensure_ascii=False, default=_json_value))
+            separator = ", "
+        write("}")
+    
+    def end(self):
+        self.stream.write("}\n")
+
+
+class MarkdownReportWriter(ReportWriter):
+    """Markdown document with one two-column table per section"""
+    def begin(self, title):
+        self.stream.write(f"# {title}\n")
+    
+    def section(self, title, items):
+        write = self.stream.write
+        write(f"\n## {title}\n\n| Parameter | Value |\n| --- | --- |\n")
+        for name, value in _flatten_report_items(items):
+            text = _format_report_value(value).replace("|", "\\|")
+            write(f"| {name} | {text} |\n")
+
+
+class HTMLReportWriter(ReportWriter):
+    """Self-contained HTML page with one table per section"""
+    def begin(self, title):
+        from html import escape
+        self.escape = escape
+        self.stream.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+                          f"<title>{escape(title)}</title></head><body>\n<h1>{escape(title)}</h1>\n")
+    
+    def section(self, title, items):
+        write = self.stream.write
+        escape = self.escape
+        write(f"<h2>{escape(title)}</h2>\n<table>\n")
+        for name, value in _flatten_report_items(items):
+            write(f"<tr><th>{escape(name)}</th><td>{escape(_format_report_value(value))}</td></tr>\n")
+        write("</table>\n")
+    
+    def end(self):
+        self.stream.write("</body></html>\n")
+
+
+class CSVReportWriter(ReportWriter):
+    """Long-format CSV summary: Section, Parameter, Value rows with full-precision values"""
+    def begin(self, title):
+        self.writer = csv.writer(self.stream)
+        self.writer.writerow(["Section", "Parameter", "Value"])
+    
+    def section(self, title, items):
+        self.writer.writerows((title, name, "" if value is None else value)
+                              for name, value in _flatten_report_items(items))
+
+
+# Text report backends by format name (and file extension), see TransformerDesign.write_report
+REPORT_WRITERS = {
+    "json": JSONReportWriter,
+    "html": HTMLReportWriter,
+    "htm": HTMLReportWriter,
+    "md": MarkdownReportWriter,
+    "markdown": MarkdownReportWriter,
+    "csv": CSVReportWriter
+}
+
+
+def register_report_writer(name, writer_class):
+    """Add or replace a ReportWriter backend available to write_report() under name"""
+    REPORT_WRITERS[name.lower()] = writer_class
+
+
+def evaluate_spec(spec, cache=None):
+    """Calculate a design from a DesignSpec (or spec mapping) and return a new DesignResult.
+
+    Reentrant: every call works on its own TransformerDesign, so any number
+    of threads may evaluate specs at once. A DesignCache may be shared
+    between them.
+    """
+    if not isinstance(spec, DesignSpec):
+        spec = DesignSpec.from_mapping(spec)
+    design = spec.design()
+    design.design_cache = cache
+    design.calculate_design()
+    return design.design_result
+
+
+def optimize_spec(spec, cache=None):
+    """Optimize Bm and J for a DesignSpec (or spec mapping) without touching shared state.
+
+    Returns an OptimizedDesign with the optimized spec, its DesignResult
+    and the optimization_results report. Reentrant like evaluate_spec().
+    """
+    if not isinstance(spec, DesignSpec):
+        spec = DesignSpec.from_mapping(spec)
+    design = spec.design()
+    design.design_cache = cache
+    design.optimize_design(verbose=False)
+    return OptimizedDesign(design.spec(), design.design_result, design.optimization_results)
+
+
+# Functions timed by Profiler: (module, owner, attribute) -> category. Modules
+# other than this one are only instrumented when they can be imported.
+PROFILED_FUNCTIONS = dict(
+    [((None, "TransformerDesign", name), "stage") for name in (
+        "calculate_core_dimensions", "calculate_turns", "calculate_currents", "calculate_conductor_size",
+        "calculate_winding", "calculate_core_loss", "calculate_eddy_losses", "calculate_stray_losses",
+        "calculate_harmonic_losses", "calculate_temperature_rise", "calculate_noise_level",
+        "calculate_mechanical_parameters", "calculate_short_circuit", "calculate_inrush_current",
+        "calculate_cost")] +
+    [((None, "TransformerDesign", name), "design") for name in (
+        "calculate_design", "build_design_steps", "calculate_design_batch")] +
+    [((None, "TransformerDesign", name), "optimizer") for name in (
+        "optimize_design", "optimize_design_multistart", "optimize_design_global", "optimize_from",
+        "pareto_front", "evaluate", "evaluate_gradient")] +
+    [((None, "EvaluationCache", name), "optimizer") for name in ("__call__", "gradient")] +
+    [((None, "TransformerDesign", name), "report") for name in (
+        "generate_pdf_report", "build_pdf_report", "add_detailed_sections", "add_core_diagram",
+        "render_core_diagram", "draw_core_diagram_vector")] +
+    [(("fpdf", "FPDF", "image"), "report"), (("fpdf", "FPDF", "output"), "report"),
+     (("matplotlib.figure", "Figure", "savefig"), "figure")]
+)
+
+
+class Profiler:
+    """Opt-in wall/CPU timing of the functions in PROFILED_FUNCTIONS.
+
+    While enabled (``with Profiler() as profiler: ...``) the listed methods
+    are replaced by timing wrappers; disabling puts the originals back, so
+    a disabled profiler costs nothing. Every call is recorded with its
+    thread, wall time and thread CPU time; summary() aggregates calls per
+    function (optimizer evaluation counts included), and chrome_trace()
+    and speedscope() export the timeline for chrome://tracing/Perfetto and
+    speedscope.app. Work that run_batch and generate_pdf_reports hand to
+    worker processes is timed there and merged in (see _submit_profiled);
+    other process pools are not recorded.
+    """
+    _active = None
+    
+    def __init__(self, functions=None):
+        self.functions = PROFILED_FUNCTIONS if functions is None else functions
+        self.events = []  # (name, category, process id, thread id, start ns, wall ns, cpu ns)
+        self._originals = []
+        self._origin = 0
+    
+    def _wrap(self, name, category, function):
+        events = self.events
+        
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            cpu = time.thread_time_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                events.append((name, category, os.getpid(), threading.get_ident(), start,
+                               time.perf_counter_ns() - start, time.thread_time_ns() - cpu))
+        return timed
+    
+    def enable(self):
+        """Install the timing wrappers"""
+        if Profiler._active is not None:
+            raise RuntimeError("Another Profiler is already enabled")
+        Profiler._active = self
+        self._origin = time.perf_counter_ns()
+        for (module, owner, attribute), category in self.functions.items():
+            if module is None:
+                namespace = globals()
+            else:
+                try:
+                    namespace = vars(__import__(module, fromlist=[owner]))
+                except ImportError:
+                    continue
+            owner_class = namespace[owner]
+            original = owner_class.__dict__[attribute]
+            self._originals.append((owner_class, attribute, original))
+            setattr(owner_class, attribute, self._wrap(f"{owner}.{attribute}", category, original))
+        return self
+    
+    def disable(self):
+        """Restore the original functions; recorded events are kept"""
+        for owner_class, attribute, original in reversed(self._originals):
+            setattr(owner_class, attribute, original)
+        self._originals = []
+        if Profiler._active is self:
+            Profiler._active = None
+    
+    def __enter__(self):
+        return self.enable()
+    
+    def __exit__(self, *exc):
+        self.disable()
+    
+    def clear(self):
+        """Forget the recorded events"""
+        self.events.clear()
+    
+    def summary(self):
+        """Per-function call counts and wall/CPU totals, slowest total first (JSON-ready)"""
+        totals = {}
+        for name, category, _, _, _, wall, cpu in self.events:
+            entry = totals.setdefault(name, [category, 0, 0, 0, 0])
+            entry[1] += 1
+            entry[2] += wall
+            entry[3] += cpu
+            entry[4] = max(entry[4], wall)
+        return {name: {"Category": category,
+                       "Calls": calls,
+                       "Wall Time (s)": wall / 1e9,
+                       "CPU Time (s)": cpu / 1e9,
+                       "Mean Wall Time (µs)": wall / calls / 1e3,
+                       "Max Wall Time (µs)": longest / 1e3}
+                for name, (category, calls, wall, cpu, longest)
+                in sorted(totals.items(), key=lambda item: -item[1][2])}
+    
+    def chrome_trace(self):
+        """Trace Event Format dict (complete events, µs) for chrome://tracing or Perfetto"""
+        return {"traceEvents": [{"name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+                                 "ts": (start - self._origin) / 1e3, "dur": wall / 1e3,
+                                 "args": {"cpu_us": cpu / 1e3}}
+                                for name, category, pid, tid, start, wall, cpu in self.events],
+                "displayTimeUnit": "ms"}
+    
+    def speedscope(self):
+        """speedscope.app file dict with one evented profile per process thread"""
+        frames = {}
+        threads = {}
+        for name, _, pid, tid, start, wall, _ in self.events:
+            frames.setdefault(name, len(frames))
+            threads.setdefault((pid, tid), []).append((start - self._origin, -wall, frames[name]))
+        profiles = []
+        for (pid, tid), spans in threads.items():
+            # Open spans in start order (outer first) and close each before the next one opens
+            spans.sort()
+            events = []
+            stack = []
+            for start, negative_wall, frame in spans:
+                while stack and stack[-1][0] <= start:
+                    end, closing = stack.pop()
+                    events.append({"type": "C", "frame": closing, "at": end})
+                events.append({"type": "O", "frame": frame, "at": start})
+                stack.append((start - negative_wall, frame))
+            while stack:
+                end, closing = stack.pop()
+                events.append({"type": "C", "frame": closing, "at": end})
+            profiles.append({"type": "evented", "name": f"Process {pid} thread {tid}", "unit": "nanoseconds",
+                             "startValue": events[0]["at"], "endValue": events[-1]["at"], "events": events})
+        return {"$schema": "https://www.speedscope.app/file-format-schema.json",
+                "name": "Transformer design profile",
+                "shared": {"frames": [{"name": name} for name in frames]},
+                "profiles": profiles}
+    
+    def save(self, path, format="summary"):
+        """Write summary(), chrome_trace() or speedscope() as JSON"""
+        exports = {"summary": self.summary, "chrome": self.chrome_trace, "speedscope": self.speedscope}
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(exports[format](), handle, ensure_ascii=False)
+
+
+# Result of a worker task run under _run_profiled, with the events it recorded
+ProfiledCall = namedtuple("ProfiledCall", ["result", "events"])
+
+
+def _run_profiled(function, *args):
+    """Worker side of _submit_profiled: call function with the Profiler on and return a ProfiledCall"""
+    profiler = Profiler._active
+    if profiler is None:
+        # A spawned worker inherits nothing; its Profiler stays on for later tasks
+        profiler = Profiler().enable()
+    # A forked worker inherits the parent's enabled Profiler and its events so far
+    first = len(profiler.events)
+    result = function(*args)
+    events = profiler.events[first:]
+    del profiler.events[first:]
+    return ProfiledCall(result, events)
+
+
+def _submit_profiled(executor, function, *args):
+    """executor.submit(function, *args), also timing the call in the worker while a Profiler is enabled"""
+    if Profiler._active is None:
+        return executor.submit(function, *args)
+    return executor.submit(_run_profiled, function, *args)
+
+
+def _profiled_result(future):
+    """Result of a _submit_profiled future, merging the worker's events into the enabled Profiler"""
+    result = future.result()
+    if isinstance(result, ProfiledCall):
+        if Profiler._active is not None:
+            Profiler._active.events.extend(result.events)
+        result = result.result
+    return result
+
+
+def measure_startup_time(repeat=5):
+    """Best-of-N time to import this module and create a design in a fresh interpreter"""
+    probe = ("import importlib.util, time\n"
+             "start = time.perf_counter()\n"
+             f"spec = importlib.util.spec_from_file_location('transformer_design', {os.path.abspath(__file__)!r})\n"
+             "module = importlib.util.module_from_spec(spec)\n"
+             "spec.loader.exec_module(module)\n"
+             "module.TransformerDesign()\n"
+             "print(time.perf_counter() - start)")
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+        timings.append(float(output))
+    return min(timings)
+
+
+def benchmark_startup(budget=STARTUP_BUDGET, repeat=5):
+    """Measure module startup against the budget; returns True when within it"""
+    elapsed = measure_startup_time(repeat)
+    within = elapsed <= budget
+    print(f"Startup: {elapsed * 1000:.1f} ms (budget {budget * 1000:.0f} ms) - {'OK' if within else 'OVER BUDGET'}")
+    return within
+
+
+def _time_runs(function, repeat, number=1):
+    """Seconds per call of function() for each of repeat runs of number calls"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - started) / number)
+    return timings
+
+
+def run_benchmarks(repeat=5, batch_size=1000000, include_reports=True):
+    """Time the production paths on BENCHMARK_SPEC and return one history entry.
+
+    Covers module import, calculate_design() for every core shape (all
+    stages recomputed), optimize_design() for every optimization target,
+    a calculate_design_batch() sweep of batch_size designs and, when fpdf
+    and matplotlib are installed, generate_pdf_report() plus
+    add_core_diagram() (raster and vector). Each benchmark reports the best and median seconds
+    per call and, where it makes sense, items per second.
+    """
+    import platform
+    import statistics
+    import tempfile
+    
+    benchmarks = {}
+    
+    def record(name, timings, items=1):
+        best = min(timings)
+        benchmarks[name] = {"Best (s)": best, "Median (s)": statistics.median(timings),
+                            "Runs": len(timings), "Items": items, "Items/s": items / best}
+    
+    record("import", [measure_startup_time(1) for _ in range(repeat)])
+    
+    for shape in CORE_SHAPES:
+        design = TransformerDesign.from_spec(dict(BENCHMARK_SPEC, core_shape=shape))
         
-        pdf.image(temp_img, x=50, y=None, w=100)
+        def calculate():
+            design.invalidate_stages()
+            design.calculate_design()
+        record(f"calculate_design[{shape}]", _time_runs(calculate, repeat, 200))
+    
+    for target in OPTIMIZATION_TARGETS:
+        spec = dict(BENCHMARK_SPEC, optimization_target=target)
+        record(f"optimize_design[{target}]",
+               _time_runs(lambda: TransformerDesign.from_spec(spec).optimize_design(verbose=False), repeat))
+    
+    design = TransformerDesign.from_spec(BENCHMARK_SPEC)
+    rng = np.random.default_rng(0)
+    Bm = rng.uniform(*OPTIMIZATION_BOUNDS[0], batch_size)
+    J = rng.uniform(*OPTIMIZATION_BOUNDS[1], batch_size)
+    shapes = rng.integers(len(CORE_SHAPES), size=batch_size)
+    record(f"calculate_design_batch[{batch_size}]",
+           _time_runs(lambda: design.calculate_design_batch(design.power, design.V1, design.V2, design.frequency,
+                                                            Bm, J, core_shape=shapes), repeat),
+           batch_size)
+    
+    if include_reports:
+        try:
+            from fpdf import FPDF
+            import matplotlib  # noqa: F401
+        except ImportError:
+            pass
+        else:
+            design.calculate_design()
+            with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(None):
+                def report():
+                    # Time a real render rather than a CORE_DIAGRAMS hit
+                    CORE_DIAGRAMS.clear()
+                    design.generate_pdf_report(os.path.join(directory, "report.pdf"))
+                    pdf = FPDF()
+                    pdf.add_page()
+                    design.add_core_diagram(pdf)
+                record("generate_pdf_report+add_core_diagram", _time_runs(report, repeat))
+                
+                def vector_diagram():
+                    pdf = FPDF()
+                    pdf.add_page()
+                    design.add_core_diagram(pdf, vector=True)
+                record("add_core_diagram[vector]", _time_runs(vector_diagram, repeat, 20))
+    
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "Timestamp": datetime.now().isoformat(timespec="seconds"),
+        "Commit": commit,
+        "Machine": platform.node(),
+        "Platform": platform.platform(),
+        "Python": platform.python_version(),
+        "NumPy": np.__version__,
+        "CPU Count": os.cpu_count(),
+        "Benchmarks": benchmarks
+    }
 
-# Main program execution
-if __name__ == "__main__":
+
+def benchmark_baseline(entries):
+    """Per-benchmark median of the best times in history entries: name -> {"Best (s)": median}"""
+    import statistics
+    timings = {}
+    for entry in entries:
+        for name, timing in entry["Benchmarks"].items():
+            timings.setdefault(name, []).append(timing["Best (s)"])
+    return {"Benchmarks": {name: {"Best (s)": statistics.median(values)} for name, values in timings.items()}}
+
+
+def compare_benchmarks(current, previous, tolerance=BENCHMARK_TOLERANCE):
+    """Benchmarks whose best time grew by more than tolerance: name -> slowdown ratio"""
+    regressions = {}
+    for name, timing in current["Benchmarks"].items():
+        before = previous["Benchmarks"].get(name)
+        if before:
+            ratio = timing["Best (s)"] / before["Best (s)"]
+            if ratio > 1 + tolerance:
+                regressions[name] = ratio
+    return regressions
+
+
+def benchmark(history_path="benchmark_history.jsonl", repeat=5, batch_size=1000000, include_reports=True,
+              tolerance=BENCHMARK_TOLERANCE, baseline_runs=BENCHMARK_BASELINE_RUNS):
+    """Run the benchmarks, append them to the JSON-lines history and report regressions.
+
+    The baseline is the median of the last baseline_runs passing entries
+    from the same machine and Python version (see benchmark_baseline), so
+    neither one noisy run nor a slow creep over several runs moves it.
+    A failing run is stored with its "Regressions" and never becomes part
+    of a baseline. Returns True when nothing regressed.
+    """
+    entry = run_benchmarks(repeat, batch_size, include_reports)
+    earlier = []
+    if os.path.exists(history_path):
+        with open(history_path, encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    previous = json.loads(line)
+                    if ((previous.get("Machine"), previous.get("Python")) == (entry["Machine"], entry["Python"])
+                            and not previous.get("Regressions")):
+                        earlier.append(previous)
+    earlier = earlier[-baseline_runs:]
+    
+    regressions = compare_benchmarks(entry, benchmark_baseline(earlier), tolerance) if earlier else {}
+    if regressions:
+        entry["Regressions"] = regressions
+    with open(history_path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    
+    for name, timing in entry["Benchmarks"].items():
+        rate = f"  {timing['Items/s']:,.0f} items/s" if timing["Items"] > 1 else ""
+        change = f"  REGRESSION x{regressions[name]:.2f}" if name in regressions else ""
+        print(f"{name:<40} {timing['Best (s)'] * 1e3:10.3f} ms{rate}{change}")
+    print(f"History: {history_path}" + (f" (compared with the median of {len(earlier)} runs since "
+                                        f"{earlier[0]['Timestamp']})" if earlier else ""))
+    return not regressions
+
+
+def write_records(chunks, path, total=None):
+    """Write an iterable of structured-array chunks to columnar storage, one chunk at a time.
+
+    A .parquet path is written with pyarrow as one row group per chunk; a
+    .npy path is a memory-mapped structured array of total rows (required,
+    since the file is sized up front), filled chunk by chunk. Only the
+    current chunk is ever held in memory. Returns the number of rows written.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    written = 0
+    if extension == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.table({name: chunk[name] for name in chunk.dtype.names})
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif extension == ".npy":
+        if total is None:
+            raise ValueError("total row count is required for .npy output")
+        out = None
+        for chunk in chunks:
+            if out is None:
+                out = np.lib.format.open_memmap(path, mode="w+", dtype=chunk.dtype, shape=(total,))
+            out[written:written + len(chunk)] = chunk
+            written += len(chunk)
+            out.flush()
+        del out
+    else:
+        raise ValueError(f"Unsupported record file type: {path}")
+    return written
+
+
+def read_design_specs(path):
+    """Yield specification dicts from a CSV, JSON-lines (.jsonl/.ndjson), JSON list or Parquet file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, newline="", encoding="utf-8") as handle:
+            yield from csv.DictReader(handle)
+    elif extension in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+    elif extension == ".json":
+        with open(path, encoding="utf-8") as handle:
+            yield from json.load(handle)
+    elif extension == ".parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported specification file type: {path}")
+
+
+def run_design_specs(indexed_specs, optimize=False, cache_path=None):
+    """Calculate a list of (index, spec) pairs, reporting failures per design instead of raising"""
+    cache = DesignCache(cache_path) if cache_path else None
+    records = []
+    for index, spec in indexed_specs:
+        record = {"Index": index, "ID": spec.get("id", "")}
+        try:
+            designer = TransformerDesign.from_spec(spec)
+            designer.design_cache = cache
+            if optimize:
+                designer.optimize_design(verbose=False)
+            else:
+                designer.calculate_design()
+            record.update(designer.summary_record())
+            record["Error"] = ""
+        except Exception as error:
+            record["Error"] = f"{type(error).__name__}: {error}"
+        records.append(record)
+    if cache is not None:
+        cache.close()
+    return records
+
+
+def run_batch(input_path, output_path, max_workers=None, chunk_size=64, optimize=False, cache_path=None):
+    """Run every specification in input_path through the design engine unattended.
+
+    Specs are sent to a process pool in chunks, with a bounded number of
+    chunks in flight, and results are appended to output_path (CSV, or JSON
+    lines for .jsonl/.ndjson) as they finish. Rows carry their input index;
+    failed designs get an Error message instead of aborting the batch.
+    With cache_path, outcomes are looked up in and stored to a DesignCache.
+    Returns (succeeded, failed) counts.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    as_json = os.path.splitext(output_path)[1].lower() in (".jsonl", ".ndjson")
+    fields = ["Index", "ID"] + list(SUMMARY_FIELDS) + ["Error"]
+    succeeded = failed = 0
+    
+    specs = enumerate(read_design_specs(input_path))
+    with open(output_path, "w", newline="", encoding="utf-8") as handle, \
+            ProcessPoolExecutor(max_workers=max_workers) as executor:
+        writer = None if as_json else csv.DictWriter(handle, fieldnames=fields)
+        if writer:
+            writer.writeheader()
+        pending = set()
+        while True:
+            # Keep a bounded number of chunks queued so memory stays flat
+            while len(pending) < max_workers * 2:
+                chunk = list(itertools.islice(specs, chunk_size))
+                if not chunk:
+                    break
+                pending.add(_submit_profiled(executor, run_design_specs, chunk, optimize, cache_path))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for record in _profiled_result(future):
+                    if record["Error"]:
+                        failed += 1
+                    else:
+                        succeeded += 1
+                    if writer:
+                        writer.writerow(record)
+                    else:
+                        handle.write(json.dumps(record) + "\n")
+            handle.flush()
+    
+    print(f"Batch complete: {succeeded} designs succeeded, {failed} failed -> {output_path}")
+    return succeeded, failed
+
+
+def _init_report_worker(core_diagram=False):
+    """Process pool initializer for generate_pdf_reports: import and warm fpdf (and matplotlib) once per worker"""
+    # No static page template is shared: the labels move with optional rows
+    # (connection type, noise, yoke, litz wire, winding configuration) and
+    # cost only about 15 % of a report, while the value-dependent methodology
+    # text takes about 60 %, so each report is laid out with build_pdf_report()
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.add_page()
+    for style in ("", "B"):
+        pdf.set_font("Arial", style, 10)
+    if core_diagram:
+        import matplotlib.figure  # noqa: F401
+
+
+def render_pdf_reports(indexed_designs, core_diagram=False, optimize=False, diagram_dpi=300,
+                       vector_diagram=False):
+    """Worker for generate_pdf_reports: (index, PDF bytes or None, error message) per design.
+
+    Items are TransformerDesign instances, DesignSpecs or spec mappings;
+    designs without results are calculated (or optimized) first.
+    """
+    rendered = []
+    for index, design in indexed_designs:
+        try:
+            if not isinstance(design, TransformerDesign):
+                design = TransformerDesign.from_spec(design)
+            if optimize:
+                design.optimize_design(verbose=False)
+            elif design.design_result is None:
+                design.calculate_design()
+            pdf = design.build_pdf_report()
+            if core_diagram:
+                design.add_core_diagram(pdf, diagram_dpi, vector_diagram)
+            data = pdf.output(dest="S")
+            # fpdf 1.x returns a latin-1 str, fpdf2 a bytearray
+            data = data.encode("latin-1") if isinstance(data, str) else bytes(data)
+            rendered.append((index, data, ""))
+        except Exception as error:
+            rendered.append((index, None, f"{type(error).__name__}: {error}"))
+    return rendered
+
+
+def _write_report(path, data):
+    with open(path, "wb") as handle:
+        handle.write(data)
+
+
+def generate_pdf_reports(designs, directory="reports", name_pattern="transformer_design_report_{id}.pdf",
+                         max_workers=None, chunk_size=8, max_writers=4, core_diagram=False, optimize=False,
+                         diagram_dpi=300, vector_diagram=False):
+    """Render the PDF report of many designs across a process pool.
+
+    designs yields TransformerDesign instances, DesignSpecs or spec mappings
+    (such as read_design_specs() rows). Each worker imports and warms fpdf
+    (and matplotlib for a raster core_diagram) once and renders whole chunks of
+    reports in memory; the parent writes the files through at most
+    max_writers writer threads while a bounded number of chunks is queued,
+    so memory stays flat for any number of reports. name_pattern is
+    formatted with the input index and the spec's "id" (the index when
+    missing). Failed designs are reported and skipped. Returns
+    (written, failed) counts.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    max_workers = max_workers or os.cpu_count() or 1
+    os.makedirs(directory, exist_ok=True)
+    names = {}
+    written = failed = 0
+    
+    def named(items):
+        for index, design in items:
+            spec_id = design.get("id") if isinstance(design, dict) else None
+            names[index] = os.path.join(directory, name_pattern.format(index=index, id=spec_id or index))
+            yield index, design
+    
+    items = named(enumerate(designs))
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_report_worker,
+                             initargs=(core_diagram and not vector_diagram,)) as executor, \
+            ThreadPoolExecutor(max_workers=max_writers) as writers:
+        pending = set()
+        writes = set()
+        while True:
+            # Keep a bounded number of chunks queued so memory stays flat
+            while len(pending) < max_workers * 2:
+                chunk = list(itertools.islice(items, chunk_size))
+                if not chunk:
+                    break
+                pending.add(_submit_profiled(executor, render_pdf_reports, chunk, core_diagram, optimize,
+                                             diagram_dpi, vector_diagram))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for index, data, error in _profiled_result(future):
+                    path = names.pop(index)
+                    if error:
+                        failed += 1
+                        print(f"Report {index} failed: {error}")
+                        continue
+                    writes.add(writers.submit(_write_report, path, data))
+                    written += 1
+            # Wait for the writers to catch up before more rendered reports pile up
+            while len(writes) > max_writers * 2:
+                finished, writes = wait(writes, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+        for future in writes:
+            future.result()
+    
+    elapsed = time.perf_counter() - started
+    print(f"Reports complete: {written} written, {failed} failed -> {directory} "
+          f"({written / elapsed if elapsed else 0:.1f} reports/s)")
+    return written, failed
+
+
+# Rows of the comparison report tables: (section, [(label, SUMMARY_FIELDS name or design attribute)])
+COMPARISON_ROWS = (
+    ("Inputs", [("Power (VA)", "Power Rating (VA)"), ("Primary (V)", "Primary Voltage (V)"),
+                ("Secondary (V)", "Secondary Voltage (V)"), ("Frequency (Hz)", "Frequency (Hz)"),
+                ("Material", "Core Material"), ("Core Shape", "Core Shape"), ("Cooling", "Cooling Type"),
+                ("Bm (T)", "Flux Density (T)"), ("J (A/mm²)", "Current Density (A/mm²)")]),
+    ("Results", [("Core Area (cm²)", "Core Area (cm²)"), ("Primary Turns", "Primary Turns"),
+                 ("Secondary Turns", "Secondary Turns"), ("Primary Conductor", "Primary Conductor"),
+                 ("Secondary Conductor", "Secondary Conductor"), ("Total Losses (W)", "Total Losses (W)"),
+                 ("Efficiency (%)", "Efficiency (%)"), ("Temp. Rise (°C)", "Temperature Rise (°C)"),
+                 ("Hot Spot (°C)", "Hot Spot Temperature (°C)"), ("Core Weight (kg)", "Core Weight (kg)"),
+                 ("Copper Weight (kg)", "Copper Weight (kg)"), ("Total Cost (USD)", "Total Cost (USD)"),
+                 ("Noise (dB)", "Noise Level (dB)")]),
+)
+
+
+def draw_comparison_charts(designs, labels, dpi=150):
+    """Loss, cost and temperature bar charts of many designs as one shared-axis figure (PNG bytes)"""
+    import io
+    from matplotlib.collections import PolyCollection
+    from matplotlib.figure import Figure
+    
+    results = [design.design_result for design in designs]
+    x = np.arange(len(designs))
+    fig = Figure(figsize=(11, 7.5))
+    # Fixed margins: tight_layout would lay the whole figure out a second time
+    fig.subplots_adjust(left=0.08, right=0.98, top=0.98, bottom=0.11 if len(labels) > 12 else 0.06, hspace=0.08)
+    loss_ax, cost_ax, temp_ax = fig.subplots(3, 1, sharex=True)
+    
+    def bars(ax, left, width, bottom, heights, label, color):
+        # One collection per series instead of one Rectangle artist per bar
+        corners = np.empty((len(left), 4, 2))
+        corners[:, :, 0] = left[:, None] + np.array([0, 0, width, width])
+        corners[:, :, 1] = bottom[:, None] + heights[:, None] * np.array([0, 1, 1, 0])
+        ax.add_collection(PolyCollection(corners, facecolors=color, label=label))
+    
+    def stacked(ax, parts, ylabel):
+        bottom = np.zeros(len(x))
+        for color, (name, values) in enumerate(parts):
+            values = np.asarray(values, dtype=float)
+            bars(ax, x - 0.4, 0.8, bottom, values, name, f"C{color}")
+            bottom += values
+        ax.autoscale_view()
+        ax.set_ylim(bottom=0)
+        ax.set_ylabel(ylabel)
+        ax.legend(loc="upper left", fontsize=7, ncol=len(parts))
+        ax.grid(axis="y", alpha=0.3)
+    
+    stacked(loss_ax, [("Core", [r.losses.core.loss for r in results]),
+                      ("Copper", [r.losses.total_copper for r in results]),
+                      ("Eddy", [r.losses.total_eddy for r in results]),
+                      ("Stray", [r.losses.stray.loss for r in results])], "Losses (W)")
+    stacked(cost_ax, [("Core", [r.cost.core_cost for r in results]),
+                      ("Winding", [r.cost.winding_cost for r in results]),
+                      ("Labor", [r.cost.total_cost - r.cost.core_cost - r.cost.winding_cost - r.cost.cooling_cost
+                                 for r in results]),
+                      ("Cooling", [r.cost.cooling_cost for r in results])], "Cost (USD)")
+    
+    zero = np.zeros(len(x))
+    bars(temp_ax, x - 0.4, 0.4, zero, np.array([r.thermal.temp_rise for r in results]), "Temperature Rise", "C0")
+    bars(temp_ax, x, 0.4, zero, np.array([r.thermal.hot_spot for r in results]), "Hot Spot", "C1")
+    temp_ax.plot(x, [design.max_temp_rise for design in designs], "r_", markersize=12, label="Rise Limit")
+    temp_ax.autoscale_view()
+    temp_ax.set_ylim(bottom=0)
+    temp_ax.set_ylabel("Temperature (°C)")
+    temp_ax.legend(loc="upper left", fontsize=7, ncol=3)
+    temp_ax.grid(axis="y", alpha=0.3)
+    temp_ax.set_xticks(x)
+    temp_ax.set_xticklabels(labels, rotation=90 if len(labels) > 12 else 0, fontsize=7)
+    
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi)
+    return buffer.getvalue()
+
+
+def generate_comparison_report(designs, filename="transformer_comparison_report.pdf", labels=None,
+                               columns_per_page=8, dpi=150):
+    """Write one PDF comparing many designs side by side.
+
+    designs are TransformerDesign instances (calculated when they have no
+    results yet), DesignSpecs or spec mappings; labels default to the
+    spec "id" or the position. The report holds COMPARISON_ROWS tables with
+    columns_per_page designs per landscape page, followed by the loss,
+    cost and temperature charts of all designs, drawn as one matplotlib
+    figure with shared x axes.
+    """
+    from fpdf import FPDF
+    
+    items = list(designs)
+    if labels is None:
+        labels = [str(item.get("id") or index + 1) if isinstance(item, dict) else str(index + 1)
+                  for index, item in enumerate(items)]
+    designs = []
+    for item in items:
+        design = item if isinstance(item, TransformerDesign) else TransformerDesign.from_spec(item)
+        if design.design_result is None:
+            design.calculate_design()
+        designs.append(design)
+    records = [design.summary_record() for design in designs]
+    
+    pdf = FPDF(orientation="L")
+    pdf.set_auto_page_break(True, margin=10)
+    label_width = 45
+    column_width = (pdf.w - pdf.l_margin - pdf.r_margin - label_width) / columns_per_page
+    
+    def fitted(text, width):
+        # Cells do not clip, so long names are shortened to their column
+        while len(text) > 1 and pdf.get_string_width(text) > width - 1:
+            text = text[:-1]
+        return text
+    
+    for first in range(0, len(designs), columns_per_page):
+        page = range(first, min(first + columns_per_page, len(designs)))
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 14)
+        pdf.cell(0, 10, f"Design Comparison ({page.start + 1}-{page.stop} of {len(designs)})", align="C")
+        pdf.ln(12)
+        pdf.set_font("Arial", "B", 8)
+        pdf.cell(label_width, 6, "Design", border=1)
+        for index in page:
+            pdf.cell(column_width, 6, fitted(labels[index], column_width), border=1, align="C")
+        pdf.ln(6)
+        for section, rows in COMPARISON_ROWS:
+            pdf.set_font("Arial", "B", 8)
+            pdf.cell(label_width + column_width * len(page), 5, section, border=1)
+            pdf.ln(5)
+            pdf.set_font("Arial", "", 7)
+            for label, field in rows:
+                pdf.cell(label_width, 5, label, border=1)
+                for index in page:
+                    value = records[index][field]
+                    text = f"{value:.4g}" if isinstance(value, float) else "" if value is None else str(value)
+                    pdf.cell(column_width, 5, fitted(text, column_width), border=1, align="R")
+                pdf.ln(5)
+    
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, "Losses, Cost and Temperature", align="C")
+    pdf.ln(12)
+    # The 11 x 7.5 in figure is scaled to fit the rest of the page
+    width = min(pdf.w - pdf.l_margin - pdf.r_margin, (pdf.h - pdf.get_y() - pdf.b_margin) * 11 / 7.5)
+    embed_png(pdf, draw_comparison_charts(designs, labels, dpi), x=(pdf.w - width) / 2, y=None, w=width)
+    pdf.output(filename)
+    print(f"\nComparison report generated: {filename} ({len(designs)} designs)")
+
+
+def run_design_request(action, spec):
+    """Worker for DesignService: evaluate one request on a fresh design and return JSON-ready data"""
+    designer = TransformerDesign.from_spec(spec)
+    if action == "optimize":
+        designer.optimize_design(verbose=False)
+    else:
+        designer.calculate_design()
+    response = {
+        "summary": designer.summary_record(),
+        "results": designer.results,
+        "cost": designer.cost_results
+    }
+    if action == "optimize":
+        response["optimization"] = designer.optimization_results
+    return response
+
+
+class DesignService:
+    """Small asyncio HTTP/JSON front end for the calculation and optimization paths.
+
+    POST /design and POST /optimize take a specification object (as for
+    TransformerDesign.from_spec) and answer with the summary, results and
+    cost of a design built fresh for that request, so no state is shared
+    between requests. GET /health reports counters. CPU work runs in a
+    process pool; identical requests in flight at the same time share one
+    computation, and once max_pending distinct computations are queued new
+    ones are refused with 503 and Retry-After instead of piling up.
+    Connections are kept alive between requests.
+    """
+    REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 422: "Unprocessable Entity", 503: "Service Unavailable"}
+    ROUTES = {"/design": "calculate", "/optimize": "optimize"}
+    
+    def __init__(self, max_workers=None, max_pending=256, max_body=1 << 20, executor=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_body = max_body
+        self.executor = executor
+        self._own_executor = executor is None
+        self._inflight = {}
+        self._connections = {}
+        self._server = None
+        self.requests = 0
+        self.coalesced = 0
+        self.rejected = 0
+    
+    async def start(self, host="127.0.0.1", port=8080):
+        """Start listening; returns the asyncio server"""
+        import asyncio
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+    
+    async def stop(self):
+        """Stop listening, drop idle keep-alive connections and shut the worker pool down"""
+        import asyncio
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections.values()):
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        if self._own_executor and self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+    
+    def serve_forever(self, host="127.0.0.1", port=8080):
+        """Blocking entry point used by the 'serve' command"""
+        import asyncio
+        
+        async def main():
+            server = await self.start(host, port)
+            print(f"Serving transformer designs on http://{host}:{port}")
+            try:
+                await server.serve_forever()
+            finally:
+                await self.stop()
+        
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            pass
+    
+    @contextlib.contextmanager
+    def running(self, host="127.0.0.1", port=0):
+        """Serve from a background thread inside a with block; yields the bound port (for tests and tools)"""
+        import asyncio
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(self.start(host, port))
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            yield server.sockets[0].getsockname()[1]
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.run_until_complete(self.stop())
+            loop.close()
+    
+    def stats(self):
+        """Request counters for /health"""
+        return {"Requests": self.requests, "Coalesced": self.coalesced, "Rejected": self.rejected,
+                "In Flight": len(self._inflight)}
+    
+    async def handle(self, action, spec):
+        """Run (or join an identical in-flight) request; returns (status, JSON-ready payload)"""
+        import asyncio
+        self.requests += 1
+        key = json.dumps([action, spec], sort_keys=True, default=str)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        elif len(self._inflight) >= self.max_pending:
+            self.rejected += 1
+            return 503, {"error": "Service busy, retry later"}
+        else:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, run_design_request, action, spec)
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._inflight.pop(key, None))
+        try:
+            # Shielded so a client hanging up does not cancel the shared computation
+            return 200, await asyncio.shield(future)
+        except Exception as error:
+            return 422, {"error": f"{type(error).__name__}: {error}"}
+    
+    async def _dispatch(self, method, path, body):
+        if path == "/health":
+            return 200, {"status": "ok", **self.stats()}
+        action = self.ROUTES.get(path)
+        if action is None:
+            return 404, {"error": f"Unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST with a JSON specification"}
+        try:
+            spec = json.loads(body or b"{}")
+        except ValueError as error:
+            return 400, {"error": f"Invalid JSON: {error}"}
+        if not isinstance(spec, dict):
+            return 400, {"error": "Specification must be a JSON object"}
+        return await self.handle(action, spec)
+    
+    async def _handle_connection(self, reader, writer):
+        import asyncio
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > self.max_body:
+                    status, payload = 413, {"error": "Request body too large"}
+                    headers["connection"] = "close"
+                else:
+                    body = await reader.readexactly(length)
+                    status, payload = await self._dispatch(method, path.split("?")[0], body)
+                
+                data = json.dumps(payload, default=str).encode("utf-8")
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                head = [f"HTTP/1.1 {status} {self.REASONS.get(status, '')}",
+                        "Content-Type: application/json",
+                        f"Content-Length: {len(data)}",
+                        "Connection: " + ("keep-alive" if keep_alive else "close")]
+                if status == 503:
+                    head.append("Retry-After: 1")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+
+class DesignServiceClient:
+    """Blocking JSON client for DesignService over one keep-alive connection (standard library only)"""
+    def __init__(self, host="127.0.0.1", port=8080, timeout=120):
+        import http.client
+        self._connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    
+    def request(self, method, path, payload=None):
+        """Send a request; returns (status, decoded JSON body)"""
+        body = None if payload is None else json.dumps(payload)
+        self._connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = self._connection.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+    
+    def design(self, spec):
+        return self.request("POST", "/design", spec)
+    
+    def optimize(self, spec):
+        return self.request("POST", "/optimize", spec)
+    
+    def health(self):
+        return self.request("GET", "/health")
+    
+    def close(self):
+        self._connection.close()
+
+
+def run_interactive():
+    """Interactive console session: prompt for a design, optionally optimize, write the PDF report"""
     print("=== Advanced Transformer Design Software ===")
     print("This program designs transformers with comprehensive features")
     
@@ -1599,3 +4777,111 @@ if __name__ == "__main__":
     designer.generate_pdf_report(report_name)
     
     print("\nDesign process completed successfully!")
+
+
+def main(argv=None):
+    """Command-line entry point; without a command the interactive session runs"""
+    parser = argparse.ArgumentParser(description="Advanced transformer design calculator")
+    parser.add_argument("--startup-benchmark", action="store_true",
+                        help="check module import time against STARTUP_BUDGET")
+    parser.add_argument("--profile", metavar="PATH", help="time the run with Profiler and write the result to PATH "
+                        "(batch and reports workers included, serve workers are not recorded)")
+    parser.add_argument("--profile-format", choices=("summary", "chrome", "speedscope"), default="summary",
+                        help="--profile output: per-function summary, Chrome trace or speedscope JSON")
+    commands = parser.add_subparsers(dest="command")
+    batch = commands.add_parser("batch", help="design every specification in a CSV/JSON-lines/Parquet file")
+    batch.add_argument("input", help="specification file (.csv, .jsonl, .ndjson, .json or .parquet)")
+    batch.add_argument("-o", "--output", default="transformer_designs.csv",
+                       help="results file (.csv, or .jsonl/.ndjson for JSON lines)")
+    batch.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    batch.add_argument("--chunk-size", type=int, default=64, help="specifications per worker task")
+    batch.add_argument("--optimize", action="store_true", help="optimize each design before reporting it")
+    batch.add_argument("--cache", metavar="PATH", help="SQLite design cache to reuse earlier outcomes")
+    reports = commands.add_parser("reports", help="write the PDF report of every specification in a file")
+    reports.add_argument("input", help="specification file (.csv, .jsonl, .ndjson, .json or .parquet)")
+    reports.add_argument("-d", "--directory", default="reports", help="output directory")
+    reports.add_argument("--name", default="transformer_design_report_{id}.pdf",
+                         help="file name pattern, formatted with {index} and {id}")
+    reports.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    reports.add_argument("--writers", type=int, default=4, help="concurrent file writers")
+    reports.add_argument("--chunk-size", type=int, default=8, help="reports per worker task")
+    reports.add_argument("--diagram", action="store_true", help="include the core diagram")
+    reports.add_argument("--vector-diagram", action="store_true",
+                         help="draw the core diagram with PDF vector graphics (no matplotlib)")
+    reports.add_argument("--dpi", type=int, default=300, help="resolution of the raster core diagram")
+    reports.add_argument("--optimize", action="store_true", help="optimize each design before reporting it")
+    compare = commands.add_parser("compare", help="write one PDF comparing every specification in a file")
+    compare.add_argument("input", help="specification file (.csv, .jsonl, .ndjson, .json or .parquet)")
+    compare.add_argument("-o", "--output", default="transformer_comparison_report.pdf", help="PDF file")
+    compare.add_argument("--optimize", action="store_true", help="optimize each design before comparing")
+    bench = commands.add_parser("benchmark", help="time the production paths and append to a JSON-lines history")
+    bench.add_argument("--history", default="benchmark_history.jsonl", help="benchmark history file")
+    bench.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    bench.add_argument("--batch-size", type=int, default=1000000, help="designs in the batch sweep benchmark")
+    bench.add_argument("--no-reports", action="store_true", help="skip the PDF report benchmark")
+    bench.add_argument("--tolerance", type=float, default=BENCHMARK_TOLERANCE,
+                       help="slowdown against the baseline that fails the benchmark")
+    bench.add_argument("--baseline-runs", type=int, default=BENCHMARK_BASELINE_RUNS,
+                       help="earlier passing runs whose median is the baseline")
+    serve = commands.add_parser("serve", help="run the HTTP/JSON design service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    serve.add_argument("--max-pending", type=int, default=256,
+                       help="distinct computations queued before requests are refused with 503")
+    args = parser.parse_args(argv)
+    
+    if args.startup_benchmark:
+        return 0 if benchmark_startup() else 1
+    if args.profile:
+        with Profiler() as profiler:
+            status = run_command(args)
+        profiler.save(args.profile, args.profile_format)
+        return status
+    return run_command(args)
+
+
+def run_command(args):
+    """Run the command parsed by main()"""
+    if args.command == "batch":
+        run_batch(args.input, args.output, args.workers, args.chunk_size, args.optimize, args.cache)
+        return 0
+    if args.command == "reports":
+        generate_pdf_reports(read_design_specs(args.input), args.directory, args.name, args.workers,
+                             args.chunk_size, args.writers, args.diagram or args.vector_diagram, args.optimize,
+                             args.dpi, args.vector_diagram)
+        return 0
+    if args.command == "compare":
+        designs, labels = [], []
+        for index, spec in enumerate(read_design_specs(args.input)):
+            # A bad specification is reported and left out of the comparison
+            try:
+                design = TransformerDesign.from_spec(spec)
+                if args.optimize:
+                    design.optimize_design(verbose=False)
+                else:
+                    design.calculate_design()
+            except Exception as error:
+                print(f"Design {index} failed: {type(error).__name__}: {error}")
+                continue
+            designs.append(design)
+            labels.append(str(spec.get("id") or index + 1))
+        if not designs:
+            print("No design to compare")
+            return 1
+        generate_comparison_report(designs, args.output, labels=labels)
+        return 0
+    if args.command == "benchmark":
+        passed = benchmark(args.history, args.repeat, args.batch_size, not args.no_reports, args.tolerance,
+                           args.baseline_runs)
+        return 0 if passed else 1
+    if args.command == "serve":
+        DesignService(args.workers, args.max_pending).serve_forever(args.host, args.port)
+        return 0
+    run_interactive()
+    return 0
+
+
+# Main program execution
+if __name__ == "__main__":
+    sys.exit(main())